@@ -7,6 +7,13 @@ from config import Config
 
 app = App()
 
+# Réglages chargés une seule fois : défauts, profil de l'étape, environnement puis contexte CDK
+Config.configure(context=app.node.try_get_context)
+
+# cdk synth -c SKIP_BUNDLING=true : aucune pile n'est empaquetée (les assets gardent l'empreinte des sources)
+if Config.get_skip_bundling():
+    app.node.set_context("aws:cdk:bundling-stacks", [])
+
 # Créer la stack de traitement d'images
 image_processing_stack = ImageProcessingStack(
     app, "ImageProcessingStack",
@@ -0,0 +1,142 @@
+"""Mesure le coût d'import du handler et la durée d'init des démarrages à froid.
+
+Mode local : chaque mesure importe le module app dans un interpréteur neuf avec
+-X importtime et en extrait le temps cumulé ainsi que les modules les plus lents.
+
+    python -m benchmarks.bench_cold_start [--repeat 10] [--top 15]
+
+Mode déployé : force un démarrage à froid (mise à jour d'une variable d'environnement)
+avant chaque invocation et relève l'« Init Duration » de la ligne REPORT.
+
+    python -m benchmarks.bench_cold_start --function <nom> [--repeat 10]
+
+--output enregistre les résultats, --baseline compare à une mesure précédente et
+termine en erreur au-delà de --max-regression (en pourcentage).
+"""
+import argparse
+import base64
+import json
+import os
+import re
+import subprocess
+import sys
+import time
+
+from benchmarks.corpus import LAMBDA_DIR, percentile
+
+# Variables d'environnement minimales pour importer le handler hors de Lambda
+LOCAL_ENVIRONMENT = {
+    "AWS_DEFAULT_REGION": "eu-west-1",
+    "DESTINATION_BUCKET": "bench-destination",
+    "INGEST_BUCKET": "bench-ingest",
+    "RENDITIONS": json.dumps([{"name": "medium", "width": 800, "height": 600}]),
+}
+
+IMPORTTIME_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \| (.*)$")
+INIT_DURATION = re.compile(r"Init Duration: ([\d.]+) ms")
+
+
+def measure_import():
+    environment = dict(os.environ, **LOCAL_ENVIRONMENT, PYTHONPATH=LAMBDA_DIR, PYTHONDONTWRITEBYTECODE="1")
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app"],
+        cwd=LAMBDA_DIR, env=environment, capture_output=True, text=True, check=True
+    )
+
+    # Chaque ligne : temps propre | temps cumulé | module (indenté selon la profondeur)
+    modules = {}
+    total_us = 0
+    for line in result.stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if not match:
+            continue
+        self_us, cumulative_us, name = int(match.group(1)), int(match.group(2)), match.group(3)
+        modules[name.strip()] = self_us
+        if name == name.lstrip():
+            total_us += cumulative_us
+    return total_us / 1000, modules
+
+
+def run_local(repeat, top):
+    totals = []
+    module_times = {}
+    for _ in range(repeat):
+        total_ms, modules = measure_import()
+        totals.append(total_ms)
+        for name, self_us in modules.items():
+            module_times.setdefault(name, []).append(self_us / 1000)
+
+    print(f"Import du handler sur {repeat} mesures : p50 {percentile(totals, 50):.1f} ms, "
+          f"p95 {percentile(totals, 95):.1f} ms, min {min(totals):.1f} ms")
+    print()
+    print(f"{'module':<50} {'temps propre médian (ms)':>25}")
+    slowest = sorted(module_times.items(), key=lambda item: percentile(item[1], 50), reverse=True)[:top]
+    for name, timings in slowest:
+        print(f"{name:<50} {percentile(timings, 50):>25.2f}")
+
+    return {"mode": "local", "p50_ms": percentile(totals, 50), "p95_ms": percentile(totals, 95)}
+
+
+def run_deployed(function_name, repeat, payload):
+    import boto3
+
+    client = boto3.client("lambda")
+    init_durations = []
+    for _ in range(repeat):
+        # Modifier la configuration invalide les environnements d'exécution existants
+        configuration = client.get_function_configuration(FunctionName=function_name)
+        variables = configuration.get("Environment", {}).get("Variables", {})
+        variables["COLD_START_NONCE"] = str(time.time_ns())
+        client.update_function_configuration(FunctionName=function_name, Environment={"Variables": variables})
+        client.get_waiter("function_updated_v2").wait(FunctionName=function_name)
+
+        response = client.invoke(FunctionName=function_name, LogType="Tail", Payload=json.dumps(payload).encode())
+        log_tail = base64.b64decode(response["LogResult"]).decode()
+        match = INIT_DURATION.search(log_tail)
+        if match:
+            init_durations.append(float(match.group(1)))
+
+    if not init_durations:
+        raise SystemExit("Aucune ligne REPORT avec Init Duration n'a été trouvée")
+
+    print(f"Init Duration de {function_name} sur {len(init_durations)} démarrages à froid : "
+          f"p50 {percentile(init_durations, 50):.1f} ms, p95 {percentile(init_durations, 95):.1f} ms")
+    return {"mode": "deployed", "function": function_name,
+            "p50_ms": percentile(init_durations, 50), "p95_ms": percentile(init_durations, 95)}
+
+
+def check_regression(result, baseline_path, max_regression):
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    regression = 100 * (result["p50_ms"] / baseline["p50_ms"] - 1)
+    print(f"p50 : {baseline['p50_ms']:.1f} ms -> {result['p50_ms']:.1f} ms ({regression:+.0f}%)")
+    if regression > max_regression:
+        raise SystemExit(f"Régression du démarrage à froid supérieure à {max_regression}%")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--function", help="Nom de la fonction déployée à mesurer")
+    parser.add_argument("--payload", default='{"routeKey": "GET /jobs/{jobId}", "pathParameters": {"jobId": "cold-start"}}',
+                        help="Événement JSON envoyé à la fonction déployée")
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--top", type=int, default=15, help="Nombre de modules les plus lents affichés")
+    parser.add_argument("--output", help="Fichier JSON où enregistrer le résultat")
+    parser.add_argument("--baseline", help="Résultat JSON de référence")
+    parser.add_argument("--max-regression", type=float, default=20.0)
+    args = parser.parse_args()
+
+    if args.function:
+        result = run_deployed(args.function, args.repeat, json.loads(args.payload))
+    else:
+        result = run_local(args.repeat, args.top)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(result, f, indent=2)
+    if args.baseline:
+        check_regression(result, args.baseline, args.max_regression)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""Compare le décodage pleine résolution au décodage réduit (draft/reduce).
+
+Chaque mesure tourne dans un processus neuf pour que le pic de RSS soit
+propre à l'image et au mode testés.
+
+    python -m benchmarks.bench_decode [--corpus DIR] [--repeat 3] [--scenario legacy|config]
+"""
+import argparse
+import multiprocessing
+import time
+from io import BytesIO
+
+from benchmarks.corpus import add_lambda_to_path, generate_corpus, load_corpus, peak_rss_mb
+
+# Rendition historique unique (800x600) et jeu de renditions configuré
+SCENARIOS = {
+    "legacy": [{"name": "medium", "width": 800, "height": 600, "fit": "fill"}],
+    "config": None,
+}
+
+
+def _measure(args):
+    data, reducing_gap, renditions = args
+    add_lambda_to_path()
+    from PIL import Image
+    from renditions import build_renditions, decode_for_renditions, parse_rendition
+    from config import Config
+
+    specs = [parse_rendition(raw) for raw in renditions or Config.get_renditions()]
+    baseline = peak_rss_mb()
+
+    start = time.perf_counter()
+    image = decode_for_renditions(Image.open(BytesIO(data)), specs, reducing_gap=reducing_gap)
+    build_renditions(image, specs)
+    elapsed = time.perf_counter() - start
+
+    return elapsed, peak_rss_mb() - baseline
+
+
+def run(corpus, repeat, renditions):
+    context = multiprocessing.get_context("spawn")
+    print(f"{'image':<22} {'mode':<8} {'latence (ms)':>13} {'pic RSS (Mo)':>13}")
+    totals = {"full": [0.0, 0.0], "reduced": [0.0, 0.0]}
+
+    for name, data in corpus:
+        for mode, reducing_gap in (("full", None), ("reduced", 2.0)):
+            results = []
+            for _ in range(repeat):
+                with context.Pool(processes=1, maxtasksperchild=1) as pool:
+                    results.append(pool.apply(_measure, ((data, reducing_gap, renditions),)))
+            elapsed = min(r[0] for r in results) * 1000
+            peak = min(r[1] for r in results)
+            totals[mode][0] += elapsed
+            totals[mode][1] += peak
+            print(f"{name:<22} {mode:<8} {elapsed:>13.1f} {peak:>13.1f}")
+
+    full, reduced = totals["full"], totals["reduced"]
+    print()
+    print(f"Latence totale : {full[0]:.0f} ms -> {reduced[0]:.0f} ms ({100 * (1 - reduced[0] / full[0]):.0f}% de gain)")
+    print(f"Pic RSS cumulé : {full[1]:.0f} Mo -> {reduced[1]:.0f} Mo ({100 * (1 - reduced[1] / full[1]):.0f}% de gain)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--corpus", help="Répertoire d'images à utiliser au lieu du corpus généré")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--scenario", choices=sorted(SCENARIOS), default="legacy")
+    args = parser.parse_args()
+
+    corpus = load_corpus(args.corpus) if args.corpus else generate_corpus(formats=["JPEG", "PNG"])
+    run(corpus, args.repeat, SCENARIOS[args.scenario])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""Compare temps d'encodage et octets produits par format et preset d'encodage.
+
+La référence est l'encodage historique : même format que la source, paramètres par défaut.
+
+    python -m benchmarks.bench_formats [--corpus DIR] [--width 1600] [--repeat 3]
+"""
+import argparse
+import time
+from io import BytesIO
+
+from benchmarks.corpus import add_lambda_to_path, generate_corpus, load_corpus
+
+add_lambda_to_path()
+
+from PIL import Image  # noqa: E402
+from formats import AVIF_AVAILABLE, ENCODE_PRESETS, encode_image  # noqa: E402
+
+
+def _encode(image, output_format, preset, repeat):
+    timings = []
+    for _ in range(repeat):
+        buffer = BytesIO()
+        start = time.perf_counter()
+        if preset is None:
+            image.save(buffer, format=output_format)
+        else:
+            encode_image(image, output_format, buffer, preset=preset)
+        timings.append(time.perf_counter() - start)
+    return min(timings) * 1000, buffer.getbuffer().nbytes
+
+
+def run(corpus, width, repeat):
+    formats = ["JPEG", "PNG", "WEBP"] + (["AVIF"] if AVIF_AVAILABLE else [])
+    totals = {}
+
+    print(f"{'image':<22} {'format':<6} {'preset':<9} {'encodage (ms)':>14} {'octets':>10} {'gain':>7}")
+    for name, data in corpus:
+        source = Image.open(BytesIO(data))
+        source_format = source.format
+        image = source.convert("RGB")
+        image.thumbnail((width, width), Image.LANCZOS)
+
+        _, baseline = _encode(image, source_format, None, 1)
+        print(f"{name:<22} {source_format:<6} {'legacy':<9} {'-':>14} {baseline:>10} {'-':>7}")
+
+        for output_format in formats:
+            for preset in ENCODE_PRESETS:
+                elapsed, size = _encode(image, output_format, preset, repeat)
+                saved = 100 * (1 - size / baseline)
+                total = totals.setdefault((output_format, preset), [0.0, 0, 0])
+                total[0] += elapsed
+                total[1] += size
+                total[2] += baseline
+                print(f"{'':<22} {output_format:<6} {preset:<9} {elapsed:>14.1f} {size:>10} {saved:>6.0f}%")
+
+    print()
+    print("Synthèse sur le corpus (gain en octets par rapport à l'encodage historique)")
+    for (output_format, preset), (elapsed, size, baseline) in sorted(totals.items(), key=lambda item: item[1][1]):
+        print(f"{output_format:<6} {preset:<9} {elapsed:>10.0f} ms {size:>12} octets {100 * (1 - size / baseline):>6.0f}%")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--corpus", help="Répertoire d'images à utiliser au lieu du corpus généré")
+    parser.add_argument("--width", type=int, default=1600, help="Largeur maximale de la rendition encodée")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    corpus = load_corpus(args.corpus) if args.corpus else generate_corpus(resolutions=[(1280, 960), (4000, 3000)])
+    run(corpus, args.width, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,271 @@
+"""Mesure le handler de bout en bout, en local, contre un S3 simulé par moto.
+
+Chaque scénario invoque lambda_handler dans le processus avec un corpus d'images
+généré (formats et résolutions) et relève la latence p50/p95/p99, le débit,
+le pic de RSS (corpus et S3 simulé compris) et la durée de chaque étape à partir
+de la ligne EMF émise par le handler.
+
+    python -m benchmarks.bench_handler [--scenario resize transform s3] [--iterations 5]
+
+Mode charge : --concurrency N lance N processus (un par environnement d'exécution
+Lambda simulé) qui enchaînent les requêtes pendant --duration secondes.
+
+    python -m benchmarks.bench_handler --concurrency 4 --duration 30
+
+--cache hit mesure le chemin où toutes les renditions sont déjà en cache,
+--cache miss (défaut) vide le cache avant chaque requête.
+--output enregistre les résultats, --baseline compare le p95 de chaque scénario
+à une mesure précédente et termine en erreur au-delà de --max-regression (en pourcentage).
+"""
+import argparse
+import base64
+import contextlib
+import io
+import json
+import multiprocessing
+import os
+import time
+
+from benchmarks.corpus import add_lambda_to_path, generate_corpus, load_corpus, peak_rss_mb, percentile
+
+SCENARIOS = ["resize", "transform", "s3"]
+
+SOURCE_PREFIX = "uploads/bench/"
+
+# Requête de transformation à la volée représentative d'une vignette de galerie
+TRANSFORM_QUERY = {"w": "640", "fmt": "webp"}
+
+
+def handler_environment():
+    # Même configuration que celle déployée par ImageProcessingStack
+    from config import Config
+
+    return {
+        "AWS_DEFAULT_REGION": Config.get_env()["region"],
+        "AWS_ACCESS_KEY_ID": "bench",
+        "AWS_SECRET_ACCESS_KEY": "bench",
+        "DESTINATION_BUCKET": "bench-destination",
+        "INGEST_BUCKET": "bench-ingest",
+        "IMAGES_TABLE": "bench-images",
+        "LOCKS_TABLE": "bench-locks",
+        "RUNTIME_CONFIG": json.dumps(Config.get_runtime_config(), separators=(",", ":")),
+        "LOG_LEVEL": "WARNING",
+    }
+
+
+def _content_type(name):
+    extension = name.rsplit(".", 1)[-1]
+    return "jpeg" if extension == "jpg" else extension
+
+
+def build_event(scenario, name, data):
+    key = f"{SOURCE_PREFIX}{name}"
+    if scenario == "resize":
+        return {"routeKey": "POST /resize-image", "body": json.dumps({"image": base64.b64encode(data).decode()})}
+    if scenario == "transform":
+        return {"routeKey": "GET /img/{key+}", "pathParameters": {"key": key},
+                "queryStringParameters": dict(TRANSFORM_QUERY), "headers": {"accept": "image/webp,*/*"}}
+    return {"Records": [{"eventSource": "aws:s3", "s3": {
+        "bucket": {"name": os.environ["INGEST_BUCKET"]}, "object": {"key": key, "size": len(data)}}}]}
+
+
+def create_resources(corpus):
+    # Buckets et tables du handler dans le S3/DynamoDB simulés (moto déjà actif), corpus déposé
+    # sous SOURCE_PREFIX du bucket d'ingestion
+    import boto3
+
+    s3 = boto3.client("s3")
+    region = os.environ["AWS_DEFAULT_REGION"]
+    # us-east-1 refuse une contrainte de région explicite
+    location = {} if region == "us-east-1" else {"CreateBucketConfiguration": {"LocationConstraint": region}}
+    for bucket in (os.environ["DESTINATION_BUCKET"], os.environ["INGEST_BUCKET"]):
+        s3.create_bucket(Bucket=bucket, **location)
+    # Même schéma que ImagesTable dans ImageProcessingStack
+    boto3.client("dynamodb").create_table(
+        TableName=os.environ["IMAGES_TABLE"],
+        KeySchema=[{"AttributeName": "pk", "KeyType": "HASH"}, {"AttributeName": "sk", "KeyType": "RANGE"}],
+        AttributeDefinitions=[{"AttributeName": name, "AttributeType": kind}
+                              for name, kind in (("pk", "S"), ("sk", "S"), ("entity", "S"), ("createdAt", "N"))],
+        GlobalSecondaryIndexes=[{
+            "IndexName": "ImagesByCreation",
+            "KeySchema": [{"AttributeName": "entity", "KeyType": "HASH"},
+                          {"AttributeName": "createdAt", "KeyType": "RANGE"}],
+            "Projection": {"ProjectionType": "ALL"}
+        }],
+        BillingMode="PAY_PER_REQUEST"
+    )
+    boto3.client("dynamodb").create_table(
+        TableName=os.environ["LOCKS_TABLE"],
+        KeySchema=[{"AttributeName": "lockKey", "KeyType": "HASH"}],
+        AttributeDefinitions=[{"AttributeName": "lockKey", "AttributeType": "S"}],
+        BillingMode="PAY_PER_REQUEST"
+    )
+    for name, data in corpus:
+        s3.put_object(Bucket=os.environ["INGEST_BUCKET"], Key=f"{SOURCE_PREFIX}{name}", Body=data,
+                      ContentType=f"image/{_content_type(name)}")
+    return s3
+
+
+def load_handler():
+    # moto doit être actif avant l'import du handler, qui crée son client S3 au chargement
+    add_lambda_to_path()
+    import app
+
+    return app
+
+
+def _setup(corpus):
+    # Processus dédié à la mesure : environnement et moto restent actifs jusqu'à sa fin
+    os.environ.update(handler_environment())
+    from moto import mock_aws
+
+    mock_aws().start()
+    return create_resources(corpus), load_handler()
+
+
+def _clear_cache(s3):
+    bucket = os.environ["DESTINATION_BUCKET"]
+    for page in s3.get_paginator("list_objects_v2").paginate(Bucket=bucket):
+        objects = [{"Key": item["Key"]} for item in page.get("Contents", [])]
+        if objects:
+            s3.delete_objects(Bucket=bucket, Delete={"Objects": objects})
+
+
+def _invoke(app, event):
+    # Le handler écrit sa ligne EMF sur stdout : on la capture pour le détail par étape
+    output = io.StringIO()
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(output):
+        response = app.lambda_handler(event, None)
+    latency = (time.perf_counter() - start) * 1000
+
+    stages = {}
+    for line in output.getvalue().splitlines():
+        if line.startswith('{"_aws"'):
+            document = json.loads(line)
+            for metric in document["_aws"]["CloudWatchMetrics"][0]["Metrics"]:
+                if metric["Name"].endswith("Duration"):
+                    stages[metric["Name"][:-len("Duration")]] = document[metric["Name"]]
+
+    status = response.get("statusCode", 200) if isinstance(response, dict) else 200
+    return latency, status, stages
+
+
+def _worker(args):
+    scenario, corpus, iterations, duration, cache = args
+    s3, app = _setup(corpus)
+
+    # Première invocation hors mesure : imports paresseux et pools de connexions
+    _invoke(app, build_event(scenario, *corpus[0]))
+
+    samples = []
+    deadline = time.perf_counter() + duration if duration else None
+    started = time.perf_counter()
+    while True:
+        for name, data in corpus:
+            if cache == "miss":
+                _clear_cache(s3)
+            latency, status, stages = _invoke(app, build_event(scenario, name, data))
+            samples.append({"image": name, "latency_ms": latency, "status": status, "stages": stages})
+            if deadline and time.perf_counter() >= deadline:
+                break
+        if deadline:
+            if time.perf_counter() >= deadline:
+                break
+        elif len(samples) >= iterations * len(corpus):
+            break
+
+    return {"samples": samples, "elapsed_s": time.perf_counter() - started, "peak_rss_mb": peak_rss_mb()}
+
+
+def run_scenario(scenario, corpus, iterations, concurrency, duration, cache):
+    # Un processus neuf par environnement d'exécution : pic de RSS et cache de modules propres
+    context = multiprocessing.get_context("spawn")
+    with context.Pool(processes=concurrency, maxtasksperchild=1) as pool:
+        workers = pool.map(_worker, [(scenario, corpus, iterations, duration, cache)] * concurrency)
+
+    samples = [sample for worker in workers for sample in worker["samples"]]
+    latencies = [sample["latency_ms"] for sample in samples]
+    stage_names = sorted({name for sample in samples for name in sample["stages"]},
+                         key=lambda name: (name == "Total", name))
+
+    return {
+        "scenario": scenario,
+        "cache": cache,
+        "concurrency": concurrency,
+        "requests": len(samples),
+        "errors": sum(1 for sample in samples if sample["status"] >= 500),
+        # Les processus tournent en parallèle : le débit se rapporte au plus long d'entre eux
+        "throughput_rps": len(samples) / max(worker["elapsed_s"] for worker in workers),
+        "p50_ms": percentile(latencies, 50),
+        "p95_ms": percentile(latencies, 95),
+        "p99_ms": percentile(latencies, 99),
+        "peak_rss_mb": max(worker["peak_rss_mb"] for worker in workers),
+        "stages": {
+            name: {
+                f"p{pct}_ms": percentile([sample["stages"][name] for sample in samples if name in sample["stages"]], pct)
+                for pct in (50, 95, 99)
+            }
+            for name in stage_names
+        },
+    }
+
+
+def report(result):
+    print(f"== {result['scenario']} (cache {result['cache']}, concurrence {result['concurrency']}) : "
+          f"{result['requests']} requêtes, {result['errors']} erreurs, {result['throughput_rps']:.1f} req/s, "
+          f"pic RSS {result['peak_rss_mb']:.0f} Mo")
+    print(f"{'étape':<16} {'p50 (ms)':>10} {'p95 (ms)':>10} {'p99 (ms)':>10}")
+    for name, timings in result["stages"].items():
+        print(f"{name:<16} {timings['p50_ms']:>10.1f} {timings['p95_ms']:>10.1f} {timings['p99_ms']:>10.1f}")
+    print(f"{'bout en bout':<16} {result['p50_ms']:>10.1f} {result['p95_ms']:>10.1f} {result['p99_ms']:>10.1f}")
+    print()
+
+
+def check_regression(results, baseline_path, max_regression):
+    with open(baseline_path) as f:
+        baseline = {entry["scenario"]: entry for entry in json.load(f)}
+
+    regressions = []
+    for result in results:
+        reference = baseline.get(result["scenario"])
+        if reference is None:
+            continue
+        regression = 100 * (result["p95_ms"] / reference["p95_ms"] - 1)
+        print(f"{result['scenario']} p95 : {reference['p95_ms']:.1f} ms -> {result['p95_ms']:.1f} ms ({regression:+.0f}%)")
+        if regression > max_regression:
+            regressions.append(result["scenario"])
+
+    if regressions:
+        raise SystemExit(f"Régression du p95 supérieure à {max_regression}% : {', '.join(regressions)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--corpus", help="Répertoire d'images (corpus généré par défaut)")
+    parser.add_argument("--scenario", nargs="+", choices=SCENARIOS, default=SCENARIOS)
+    parser.add_argument("--iterations", type=int, default=5, help="Passages sur le corpus par processus")
+    parser.add_argument("--concurrency", type=int, default=1, help="Nombre de processus en parallèle")
+    parser.add_argument("--duration", type=float, help="Durée du mode charge en secondes (remplace --iterations)")
+    parser.add_argument("--cache", choices=["miss", "hit"], default="miss")
+    parser.add_argument("--output", help="Fichier JSON où enregistrer les résultats")
+    parser.add_argument("--baseline", help="Résultats JSON de référence")
+    parser.add_argument("--max-regression", type=float, default=20.0)
+    args = parser.parse_args()
+
+    corpus = load_corpus(args.corpus) if args.corpus else generate_corpus()
+    results = []
+    for scenario in args.scenario:
+        result = run_scenario(scenario, corpus, args.iterations, args.concurrency, args.duration, args.cache)
+        report(result)
+        results.append(result)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+    if args.baseline:
+        check_regression(results, args.baseline, args.max_regression)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+import os
+import random
+import sys
+from io import BytesIO
+from PIL import Image, ImageDraw, ImageFilter
+
+# Les modules de la Lambda sont à plat dans lambda/image_processor (pas un package)
+LAMBDA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "lambda", "image_processor")
+
+DEFAULT_RESOLUTIONS = [(1280, 960), (4000, 3000), (6000, 4000)]
+DEFAULT_FORMATS = ["JPEG", "PNG", "WEBP"]
+
+
+def add_lambda_to_path():
+    if LAMBDA_DIR not in sys.path:
+        sys.path.insert(0, LAMBDA_DIR)
+
+
+def synthetic_image(size, seed=0):
+    # Dégradés, formes et bruit : se compresse comme une photo plutôt qu'un aplat
+    rng = random.Random(seed)
+    width, height = size
+    image = Image.linear_gradient("L").resize(size).convert("RGB")
+    draw = ImageDraw.Draw(image)
+    for _ in range(40):
+        x0, y0 = rng.randrange(width), rng.randrange(height)
+        x1, y1 = x0 + rng.randrange(width // 4 + 1), y0 + rng.randrange(height // 4 + 1)
+        draw.ellipse((x0, y0, x1, y1), fill=(rng.randrange(256), rng.randrange(256), rng.randrange(256)))
+    image = image.filter(ImageFilter.GaussianBlur(2))
+    noise = Image.effect_noise(size, 24).convert("RGB")
+    return Image.blend(image, noise, 0.15)
+
+
+def generate_corpus(resolutions=None, formats=None):
+    # [(nom, bytes), ...] généré en mémoire, reproductible
+    corpus = []
+    for index, size in enumerate(resolutions or DEFAULT_RESOLUTIONS):
+        image = synthetic_image(size, seed=index)
+        for image_format in formats or DEFAULT_FORMATS:
+            buffer = BytesIO()
+            image.save(buffer, format=image_format)
+            corpus.append((f"{size[0]}x{size[1]}.{image_format.lower()}", buffer.getvalue()))
+    return corpus
+
+
+def load_corpus(directory):
+    corpus = []
+    for name in sorted(os.listdir(directory)):
+        path = os.path.join(directory, name)
+        if os.path.isfile(path):
+            with open(path, "rb") as f:
+                corpus.append((name, f.read()))
+    return corpus
+
+
+def peak_rss_mb():
+    # VmHWM repart de zéro à chaque exec, contrairement à ru_maxrss hérité du parent
+    with open("/proc/self/status") as status:
+        for line in status:
+            if line.startswith("VmHWM:"):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100 * len(ordered) + 0.5)) - 1))
+    return ordered[index]
@@ -0,0 +1,167 @@
+"""Compare coût et latence des variantes mémoire/architecture déployées.
+
+Nécessite un déploiement avec TUNING_ENABLED=1 : ImageProcessingStack crée alors
+une fonction par couple architecture/mémoire (TUNING_ARCHITECTURES, TUNING_MEMORY_SIZES).
+Le corpus est déposé dans le bucket d'ingestion puis rejoué sur chaque variante
+sous forme de notifications S3 ; le bucket de destination dédié est vidé avant
+chaque invocation pour mesurer le traitement complet et non le cache.
+
+    python -m benchmarks.power_tuning [--stack ImageProcessingStack] [--repeat 5] [--max-p95-ms 3000]
+
+La durée facturée et la mémoire maximale sont relevées dans la ligne REPORT de
+chaque invocation. Le coût par image combine le prix GB-seconde de l'architecture
+et le prix par requête ; la variante recommandée est la moins chère dont le p95
+respecte --max-p95-ms, traduite en variables LAMBDA_MEMORY_SIZE/LAMBDA_ARCHITECTURE.
+"""
+import argparse
+import base64
+import json
+import re
+from io import BytesIO
+
+import boto3
+
+from benchmarks.corpus import generate_corpus, load_corpus, percentile
+
+# Hors du préfixe uploads/ : le dépôt du corpus ne déclenche pas la fonction de production
+SOURCE_PREFIX = "tuning/"
+
+COST_HEADER = "coût / million d'images (USD)"
+
+# Tarifs Lambda eu-west-1 (USD), à ajuster si la région change
+PRICE_PER_GB_SECOND = {"x86_64": 0.0000166667, "arm64": 0.0000133334}
+PRICE_PER_REQUEST = 0.20 / 1_000_000
+
+REPORT_FIELDS = {
+    "duration_ms": re.compile(r"\tDuration: ([\d.]+) ms"),
+    "billed_ms": re.compile(r"Billed Duration: (\d+) ms"),
+    "max_memory_mb": re.compile(r"Max Memory Used: (\d+) MB"),
+}
+
+
+def stack_outputs(stack_name):
+    stack = boto3.client("cloudformation").describe_stacks(StackName=stack_name)["Stacks"][0]
+    return {output["OutputKey"]: output["OutputValue"] for output in stack.get("Outputs", [])}
+
+
+def upload_corpus(bucket, corpus):
+    s3 = boto3.client("s3")
+    for name, data in corpus:
+        s3.upload_fileobj(BytesIO(data), bucket, f"{SOURCE_PREFIX}{name}")
+
+
+def purge_bucket(bucket):
+    s3 = boto3.client("s3")
+    for page in s3.get_paginator("list_objects_v2").paginate(Bucket=bucket):
+        objects = [{"Key": item["Key"]} for item in page.get("Contents", [])]
+        if objects:
+            s3.delete_objects(Bucket=bucket, Delete={"Objects": objects})
+
+
+def parse_report(log_tail):
+    report = {}
+    for field, pattern in REPORT_FIELDS.items():
+        match = pattern.search(log_tail)
+        if match:
+            report[field] = float(match.group(1))
+    return report
+
+
+def run_variant(function_name, architecture, memory_size, events, destination_bucket, repeat):
+    client = boto3.client("lambda")
+    reports = []
+    errors = 0
+    for iteration in range(repeat + 1):
+        for event in events:
+            purge_bucket(destination_bucket)
+            response = client.invoke(FunctionName=function_name, LogType="Tail", Payload=json.dumps(event).encode())
+            if response.get("FunctionError"):
+                errors += 1
+                continue
+            report = parse_report(base64.b64decode(response["LogResult"]).decode())
+            # Premier passage ignoré : démarrage à froid et connexions à établir
+            if iteration > 0 and "billed_ms" in report:
+                reports.append(report)
+
+    if not reports:
+        raise SystemExit(f"Aucune mesure exploitable pour {function_name}")
+
+    durations = [report["duration_ms"] for report in reports]
+    billed_seconds = sum(report["billed_ms"] for report in reports) / 1000 / len(reports)
+    cost = billed_seconds * memory_size / 1024 * PRICE_PER_GB_SECOND[architecture] + PRICE_PER_REQUEST
+    return {
+        "architecture": architecture,
+        "memory_size": memory_size,
+        "invocations": len(reports),
+        "errors": errors,
+        "p50_ms": percentile(durations, 50),
+        "p95_ms": percentile(durations, 95),
+        "max_memory_mb": max(report["max_memory_mb"] for report in reports),
+        "cost_per_image_usd": cost,
+    }
+
+
+def recommend(results, max_p95_ms):
+    eligible = [result for result in results if result["errors"] == 0 and result["p95_ms"] <= max_p95_ms]
+    if not eligible:
+        return None
+    return min(eligible, key=lambda result: (result["cost_per_image_usd"], result["p95_ms"]))
+
+
+def report(results, best):
+    print(f"{'variante':<16} {'p50 (ms)':>10} {'p95 (ms)':>10} {'mémoire max (Mo)':>17} "
+          f"{COST_HEADER:>30} {'erreurs':>8}")
+    for result in sorted(results, key=lambda r: (r["architecture"], r["memory_size"])):
+        variant = f"{result['architecture']}-{result['memory_size']}"
+        marker = " <" if result is best else ""
+        print(f"{variant:<16} {result['p50_ms']:>10.0f} {result['p95_ms']:>10.0f} {result['max_memory_mb']:>17.0f} "
+              f"{result['cost_per_image_usd'] * 1_000_000:>30.2f} {result['errors']:>8}{marker}")
+    print()
+    if best is None:
+        print("Aucune variante ne respecte la contrainte de latence")
+    else:
+        print("Configuration recommandée :")
+        print(f"    LAMBDA_ARCHITECTURE={best['architecture']} LAMBDA_MEMORY_SIZE={best['memory_size']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--stack", default="ImageProcessingStack")
+    parser.add_argument("--corpus", help="Répertoire d'images (corpus généré par défaut)")
+    parser.add_argument("--repeat", type=int, default=5, help="Passages mesurés sur le corpus par variante")
+    parser.add_argument("--max-p95-ms", type=float, default=3000.0, help="Latence p95 maximale acceptée")
+    parser.add_argument("--output", help="Fichier JSON où enregistrer les courbes coût/latence")
+    args = parser.parse_args()
+
+    outputs = stack_outputs(args.stack)
+    if "TuningFunctions" not in outputs:
+        raise SystemExit(f"{args.stack} n'a pas été déployée avec TUNING_ENABLED=1")
+    variants = json.loads(outputs["TuningFunctions"])
+    ingest_bucket = outputs["IngestBucketName"]
+    destination_bucket = outputs["TuningDestinationBucketName"]
+
+    corpus = load_corpus(args.corpus) if args.corpus else generate_corpus()
+    upload_corpus(ingest_bucket, corpus)
+    events = [
+        {"Records": [{"eventSource": "aws:s3", "s3": {
+            "bucket": {"name": ingest_bucket}, "object": {"key": f"{SOURCE_PREFIX}{name}", "size": len(data)}}}]}
+        for name, data in corpus
+    ]
+
+    results = []
+    for variant, function_name in variants.items():
+        architecture, memory_size = variant.rsplit("-", 1)
+        print(f"Mesure de {variant} ({function_name})")
+        results.append(run_variant(function_name, architecture, int(memory_size), events, destination_bucket, args.repeat))
+
+    best = recommend(results, args.max_p95_ms)
+    print()
+    report(results, best)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"results": results, "recommended": best}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
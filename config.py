@@ -1,10 +1,68 @@
-from dataclasses import dataclass
-from typing import Dict, Any
+from dataclasses import dataclass, fields
+from typing import Any, Callable, ClassVar, Dict, List, Optional
+import json
 import os
 
+PROFILES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "profiles")
+
+# Bornes imposées par Lambda
+LAMBDA_MEMORY_RANGE = (128, 10240)
+LAMBDA_MAX_TIMEOUT = 900
+ARCHITECTURES = ("x86_64", "arm64")
+LOG_LEVELS = ("DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL")
+
+# Variables lues par la Lambda -> getter du réglage correspondant. Elles sont regroupées dans une seule
+# variable RUNTIME_CONFIG (JSON compact) ; une variable d'environnement du même nom reste
+# prioritaire, pour les surcharges propres à une fonction (haute mémoire, tuning)
+RUNTIME_SETTINGS = {
+    "UPLOAD_URL_EXPIRATION": "get_upload_url_expiration",
+    "MAX_UPLOAD_BYTES": "get_max_upload_bytes",
+    "RENDITIONS": "get_renditions",
+    "IMAGE_CACHE_MAX_AGE": "get_image_cache_max_age",
+    "RENDITION_TOUCH_DAYS": "get_rendition_touch_days",
+    "SINGLE_FLIGHT_LOCK_SECONDS": "get_single_flight_lock_seconds",
+    "SINGLE_FLIGHT_WAIT_SECONDS": "get_single_flight_wait_seconds",
+    "ANIMATION_MAX_FRAMES": "get_animation_max_frames",
+    "JOBS_MAX_RECEIVE_COUNT": "get_batch_max_receive_count",
+    "MAX_JOB_ITEMS": "get_max_job_items",
+    "JOB_TTL_DAYS": "get_job_ttl_days",
+    "MAX_INPUT_BYTES": "get_max_input_bytes",
+    "MAX_INPUT_PIXELS": "get_max_input_pixels",
+    "INLINE_MAX_DECODED_PIXELS": "get_inline_max_decoded_pixels",
+    "PARALLEL_WORKERS": "get_lambda_parallel_workers",
+    "CLIENT_MAX_POOL_CONNECTIONS": "get_client_max_pool_connections",
+    "CLIENT_MAX_ATTEMPTS": "get_client_max_attempts",
+    "CLIENT_CONNECT_TIMEOUT": "get_client_connect_timeout",
+    "CLIENT_READ_TIMEOUT": "get_client_read_timeout",
+    "PRESIGNED_URL_EXPIRATION": "get_presigned_url_expiration",
+    "PRESIGNED_URL_CACHE_SECONDS": "get_presigned_url_cache_seconds",
+    "LOG_LEVEL": "get_log_level",
+    "METRICS_NAMESPACE": "get_metrics_namespace",
+}
+
+
+def _coerce(raw: Any, default: Any) -> Any:
+    # Valeur d'une couche (texte pour l'environnement et `-c`, JSON pour les profils)
+    # convertie dans le type de la valeur par défaut
+    if isinstance(default, bool):
+        if isinstance(raw, str):
+            return raw.strip().lower() in ('1', 'true', 'yes', 'on')
+        return bool(raw)
+    if isinstance(default, tuple):
+        if isinstance(raw, str):
+            raw = json.loads(raw) if raw.lstrip().startswith('[') else [item.strip() for item in raw.split(',')]
+        item_type = type(default[0]) if default else str
+        return tuple(item if isinstance(item, dict) else item_type(item) for item in raw)
+    if isinstance(default, (int, float)) and isinstance(raw, str):
+        return type(default)(raw.replace('_', ''))
+    return type(default)(raw)
+
 
 @dataclass
 class Config:
+    # Stage Configuration (profil chargé depuis profiles/<STAGE>.json, aucun par défaut)
+    STAGE: str = ""
+
     # AWS Configuration
     AWS_ACCOUNT: str = "532673134317"
     AWS_REGION: str = "eu-west-1"
@@ -18,6 +76,90 @@ class Config:
     # Lambda Configuration
     LAMBDA_MEMORY_SIZE: int = 512
     LAMBDA_TIMEOUT: int = 30
+    LAMBDA_RUNTIME: str = "python3.11"
+    LAMBDA_ARCHITECTURE: str = "x86_64"
+    # 0 : autant de threads que de vCPU alloués (selon la mémoire), 1 : traitement séquentiel
+    LAMBDA_PARALLEL_WORKERS: int = 0
+
+    # Synth Configuration (sans bundling Docker : templates validés en quelques secondes, non déployables)
+    SKIP_BUNDLING: bool = False
+
+    # Cold Start Configuration
+    LAMBDA_SLIM_PACKAGE: bool = True
+    LAMBDA_DEPENDENCIES_LAYER: bool = False
+    LAMBDA_SNAPSTART: bool = False
+    LAMBDA_PROVISIONED_CONCURRENCY: int = 0
+
+    # Power Tuning Configuration (variantes déployées côte à côte, hors API)
+    TUNING_ENABLED: bool = False
+    TUNING_MEMORY_SIZES: tuple = (512, 1024, 1769, 2048, 3008)
+    TUNING_ARCHITECTURES: tuple = ("x86_64", "arm64")
+
+    # Upload Configuration
+    UPLOAD_URL_EXPIRATION: int = 900
+    MAX_UPLOAD_BYTES: int = 50 * 1024 * 1024
+
+    # Admission Configuration (budgets vérifiés sur l'en-tête, avant tout décodage)
+    MAX_INPUT_BYTES: int = 50 * 1024 * 1024
+    MAX_INPUT_PIXELS: int = 100_000_000
+    # Pixels décodés au-delà desquels le traitement passe par la Lambda haute mémoire (asynchrone)
+    INLINE_MAX_DECODED_PIXELS: int = 25_000_000
+    HEAVY_LAMBDA_MEMORY_SIZE: int = 3008
+    HEAVY_LAMBDA_TIMEOUT: int = 300
+    HEAVY_RESERVED_CONCURRENCY: int = 5
+
+    # Single-flight Configuration (une seule invocation calcule une variante donnée à la fois)
+    SINGLE_FLIGHT_LOCK_SECONDS: int = 30
+    SINGLE_FLIGHT_WAIT_SECONDS: int = 10
+
+    # Animation Configuration (trames encodées au plus par rendition animée, sous-échantillonnées au-delà)
+    ANIMATION_MAX_FRAMES: int = 300
+
+    # API Throttling Configuration (requêtes/s et rafale, étape par défaut de l'API HTTP)
+    API_THROTTLE_RATE_LIMIT: int = 100
+    API_THROTTLE_BURST_LIMIT: int = 200
+    RESIZE_THROTTLE_RATE_LIMIT: int = 20
+    RESIZE_THROTTLE_BURST_LIMIT: int = 40
+
+    # AWS Clients Configuration (clients partagés entre invocations chaudes)
+    CLIENT_MAX_POOL_CONNECTIONS: int = 50
+    CLIENT_MAX_ATTEMPTS: int = 5
+    CLIENT_CONNECT_TIMEOUT: int = 2
+    CLIENT_READ_TIMEOUT: int = 10
+    PRESIGNED_URL_EXPIRATION: int = 3600
+    PRESIGNED_URL_CACHE_SECONDS: int = 300
+
+    # Renditions Configuration (la première est renvoyée comme imageUrl)
+    RENDITIONS: tuple = (
+        {"name": "medium", "width": 800, "height": 600, "fit": "smart"},
+        {"name": "thumbnail", "width": 200, "height": 200, "fit": "smart", "quality": 80},
+        {"name": "retina", "width": 1600, "height": 1200, "fit": "contain", "quality": 85},
+    )
+
+    # Storage Lifecycle Configuration (renditions traitées comme un cache : expirées puis régénérées à la demande)
+    RENDITION_EXPIRATION_DAYS: int = 90
+    # Une rendition lue plus de N jours après son écriture est réécrite : son expiration repart de zéro
+    RENDITION_TOUCH_DAYS: int = 30
+    NONCURRENT_VERSION_EXPIRATION_DAYS: int = 7
+
+    # On-the-fly Transformation Configuration (/img/{key})
+    IMAGE_SIZE_STEP: int = 10
+    IMAGE_CACHE_MAX_AGE: int = 365 * 24 * 3600
+
+    # Batch Jobs Configuration (SQS)
+    BATCH_SIZE: int = 10
+    BATCH_MAX_WINDOW_SECONDS: int = 5
+    BATCH_RESERVED_CONCURRENCY: int = 20
+    BATCH_MAX_RECEIVE_COUNT: int = 3
+    MAX_JOB_ITEMS: int = 10000
+    JOB_TTL_DAYS: int = 7
+
+    # Observability Configuration (métriques EMF, tableau de bord et alarmes)
+    LOG_LEVEL: str = "INFO"
+    METRICS_NAMESPACE: str = "ImageProcessor"
+    ALARM_P95_DURATION_MS: int = 5000
+    ALARM_MEMORY_RATIO: float = 0.9
+    ALARM_EMAIL: str = ""
 
     # GitHub Configuration
     GITHUB_SECRET_NAME: str = "github-token"
@@ -25,54 +167,353 @@ class Config:
     GITHUB_OWNER: str = "Piercuta"
     GITHUB_REPO: str = "react-sample"
     GITHUB_BRANCH: str = "main"
+    GITHUB_CONNECTION_ARN: str = "arn:aws:codeconnections:eu-west-1:532673134317:connection/2a30a395-8d38-43ab-827b-f39a83c9986a"
+
+    # Chargement en couches, une seule fois par processus (synth, tests, benchmarks) :
+    # valeurs par défaut ci-dessus < profil de l'étape (profiles/<STAGE>.json)
+    # < variables d'environnement < contexte CDK (cdk synth -c STAGE=dev -c LAMBDA_MEMORY_SIZE=1024)
+    _context: ClassVar[Optional[Callable[[str], Any]]] = None
+    _settings: ClassVar[Optional["Config"]] = None
+
+    @classmethod
+    def configure(cls, context: Optional[Callable[[str], Any]] = None) -> None:
+        # context : lecture du contexte CDK (app.node.try_get_context) ; recharge les réglages
+        cls._context = context
+        cls._settings = None
+
+    @classmethod
+    def settings(cls) -> "Config":
+        if cls._settings is None:
+            cls._settings = cls._load()
+        return cls._settings
+
+    @classmethod
+    def _load(cls) -> "Config":
+        context = cls._context or (lambda key: None)
+        names = [field.name for field in fields(cls)]
+        context_values = {name: context(name) for name in names}
+        stage = context_values["STAGE"] or os.getenv("STAGE", cls.STAGE)
+        layers = [cls._profile(stage), os.environ, context_values]
+
+        values, errors = {}, []
+        for field in fields(cls):
+            raw = field.default
+            for layer in layers:
+                if layer.get(field.name) is not None:
+                    raw = layer[field.name]
+            try:
+                values[field.name] = _coerce(raw, field.default)
+            except (TypeError, ValueError):
+                errors.append(f"{field.name} : valeur {raw!r} invalide ({type(field.default).__name__} attendu)")
+        if errors:
+            raise ValueError("Configuration invalide :\n- " + "\n- ".join(errors))
+
+        settings = cls(**values)
+        settings.validate()
+        return settings
+
+    @staticmethod
+    def _profile(stage: str) -> Dict[str, Any]:
+        if not stage:
+            return {}
+        path = os.path.join(PROFILES_DIR, f"{stage}.json")
+        if not os.path.exists(path):
+            raise ValueError(f"Profil de configuration introuvable pour l'étape '{stage}' : {path}")
+        with open(path) as f:
+            return json.load(f)
+
+    def validate(self) -> None:
+        errors = []
+        for field in fields(self):
+            value = getattr(self, field.name)
+            if type(value) in (int, float) and value < 0:
+                errors.append(f"{field.name} doit être positif ou nul")
+        for name in ("LAMBDA_MEMORY_SIZE", "HEAVY_LAMBDA_MEMORY_SIZE"):
+            if not LAMBDA_MEMORY_RANGE[0] <= getattr(self, name) <= LAMBDA_MEMORY_RANGE[1]:
+                errors.append(f"{name} doit être compris entre {LAMBDA_MEMORY_RANGE[0]} et {LAMBDA_MEMORY_RANGE[1]} Mo")
+        if any(not LAMBDA_MEMORY_RANGE[0] <= size <= LAMBDA_MEMORY_RANGE[1] for size in self.TUNING_MEMORY_SIZES):
+            errors.append(f"TUNING_MEMORY_SIZES doit être compris entre {LAMBDA_MEMORY_RANGE[0]} et {LAMBDA_MEMORY_RANGE[1]} Mo")
+        for name in ("LAMBDA_TIMEOUT", "HEAVY_LAMBDA_TIMEOUT"):
+            if not 1 <= getattr(self, name) <= LAMBDA_MAX_TIMEOUT:
+                errors.append(f"{name} doit être compris entre 1 et {LAMBDA_MAX_TIMEOUT} secondes")
+        if any(name not in ARCHITECTURES for name in (self.LAMBDA_ARCHITECTURE, *self.TUNING_ARCHITECTURES)):
+            errors.append(f"Architecture inconnue, valeurs possibles : {', '.join(ARCHITECTURES)}")
+        if self.LOG_LEVEL not in LOG_LEVELS:
+            errors.append(f"LOG_LEVEL doit valoir {', '.join(LOG_LEVELS)}")
+        if self.INLINE_MAX_DECODED_PIXELS > self.MAX_INPUT_PIXELS:
+            errors.append("INLINE_MAX_DECODED_PIXELS ne peut pas dépasser MAX_INPUT_PIXELS")
+        # Un verrou plus court que le traitement laisserait une seconde invocation le reprendre
+        if self.SINGLE_FLIGHT_LOCK_SECONDS < self.LAMBDA_TIMEOUT:
+            errors.append("SINGLE_FLIGHT_LOCK_SECONDS doit couvrir LAMBDA_TIMEOUT")
+        # Une rendition lue régulièrement doit être réécrite avant d'expirer
+        if self.RENDITION_EXPIRATION_DAYS and not 0 < self.RENDITION_TOUCH_DAYS < self.RENDITION_EXPIRATION_DAYS:
+            errors.append("RENDITION_TOUCH_DAYS doit être compris entre 1 et RENDITION_EXPIRATION_DAYS")
+        if not 0 < self.ALARM_MEMORY_RATIO <= 1:
+            errors.append("ALARM_MEMORY_RATIO doit être compris entre 0 et 1")
+        names = [rendition.get("name") if isinstance(rendition, dict) else None for rendition in self.RENDITIONS]
+        if not names or len(set(names)) != len(names) or not all(
+                name and all(type(rendition.get(key)) is int and rendition[key] > 0 for key in ("width", "height"))
+                for name, rendition in zip(names, self.RENDITIONS)):
+            errors.append("RENDITIONS : chaque rendition doit avoir un nom unique, une largeur et une hauteur")
+        if errors:
+            raise ValueError("Configuration invalide :\n- " + "\n- ".join(errors))
+
+    @classmethod
+    def get_stage(cls) -> str:
+        return cls.settings().STAGE
 
     @classmethod
     def get_env(cls) -> Dict[str, Any]:
         return {
-            "account": os.getenv('AWS_ACCOUNT', cls.AWS_ACCOUNT),
-            "region": os.getenv('AWS_REGION', cls.AWS_REGION)
+            "account": cls.settings().AWS_ACCOUNT,
+            "region": cls.settings().AWS_REGION
         }
 
+    @classmethod
+    def get_runtime_config(cls) -> Dict[str, Any]:
+        # Réglages de la Lambda, transmis dans la seule variable RUNTIME_CONFIG
+        return {name: getattr(cls, getter)() for name, getter in RUNTIME_SETTINGS.items()}
+
     @classmethod
     def get_domain_name(cls) -> str:
-        return os.getenv('DOMAIN_NAME', cls.DOMAIN_NAME)
+        return cls.settings().DOMAIN_NAME
 
     @classmethod
     def get_hosted_zone_id(cls) -> str:
-        return os.getenv('HOSTED_ZONE_ID', cls.HOSTED_ZONE_ID)
+        return cls.settings().HOSTED_ZONE_ID
 
     @classmethod
     def get_zone_name(cls) -> str:
-        return os.getenv('ZONE_NAME', cls.ZONE_NAME)
+        return cls.settings().ZONE_NAME
 
     @classmethod
     def get_certificate_arn(cls) -> str:
-        return os.getenv('CERTIFICATE_ARN', cls.CERTIFICATE_ARN)
+        return cls.settings().CERTIFICATE_ARN
 
     @classmethod
     def get_lambda_memory_size(cls) -> int:
-        return os.getenv('LAMBDA_MEMORY_SIZE', cls.LAMBDA_MEMORY_SIZE)
+        return cls.settings().LAMBDA_MEMORY_SIZE
 
     @classmethod
     def get_lambda_timeout(cls) -> int:
-        return os.getenv('LAMBDA_TIMEOUT', cls.LAMBDA_TIMEOUT)
+        return cls.settings().LAMBDA_TIMEOUT
+
+    @classmethod
+    def get_lambda_runtime(cls) -> str:
+        return cls.settings().LAMBDA_RUNTIME
+
+    @classmethod
+    def get_lambda_architecture(cls) -> str:
+        return cls.settings().LAMBDA_ARCHITECTURE
+
+    @classmethod
+    def get_lambda_parallel_workers(cls) -> int:
+        return cls.settings().LAMBDA_PARALLEL_WORKERS
+
+    @classmethod
+    def get_tuning_enabled(cls) -> bool:
+        return cls.settings().TUNING_ENABLED
+
+    @classmethod
+    def get_tuning_memory_sizes(cls) -> List[int]:
+        return list(cls.settings().TUNING_MEMORY_SIZES)
+
+    @classmethod
+    def get_tuning_architectures(cls) -> List[str]:
+        return list(cls.settings().TUNING_ARCHITECTURES)
+
+    @classmethod
+    def get_skip_bundling(cls) -> bool:
+        return cls.settings().SKIP_BUNDLING
+
+    @classmethod
+    def get_lambda_slim_package(cls) -> bool:
+        return cls.settings().LAMBDA_SLIM_PACKAGE
+
+    @classmethod
+    def get_lambda_dependencies_layer(cls) -> bool:
+        return cls.settings().LAMBDA_DEPENDENCIES_LAYER
+
+    @classmethod
+    def get_lambda_snapstart(cls) -> bool:
+        return cls.settings().LAMBDA_SNAPSTART
+
+    @classmethod
+    def get_lambda_provisioned_concurrency(cls) -> int:
+        return cls.settings().LAMBDA_PROVISIONED_CONCURRENCY
+
+    @classmethod
+    def get_upload_url_expiration(cls) -> int:
+        return cls.settings().UPLOAD_URL_EXPIRATION
+
+    @classmethod
+    def get_max_upload_bytes(cls) -> int:
+        return cls.settings().MAX_UPLOAD_BYTES
+
+    @classmethod
+    def get_max_input_bytes(cls) -> int:
+        return cls.settings().MAX_INPUT_BYTES
+
+    @classmethod
+    def get_max_input_pixels(cls) -> int:
+        return cls.settings().MAX_INPUT_PIXELS
+
+    @classmethod
+    def get_inline_max_decoded_pixels(cls) -> int:
+        return cls.settings().INLINE_MAX_DECODED_PIXELS
+
+    @classmethod
+    def get_heavy_lambda_memory_size(cls) -> int:
+        return cls.settings().HEAVY_LAMBDA_MEMORY_SIZE
+
+    @classmethod
+    def get_heavy_lambda_timeout(cls) -> int:
+        return cls.settings().HEAVY_LAMBDA_TIMEOUT
+
+    @classmethod
+    def get_heavy_reserved_concurrency(cls) -> int:
+        return cls.settings().HEAVY_RESERVED_CONCURRENCY
+
+    @classmethod
+    def get_single_flight_lock_seconds(cls) -> int:
+        return cls.settings().SINGLE_FLIGHT_LOCK_SECONDS
+
+    @classmethod
+    def get_single_flight_wait_seconds(cls) -> int:
+        return cls.settings().SINGLE_FLIGHT_WAIT_SECONDS
+
+    @classmethod
+    def get_animation_max_frames(cls) -> int:
+        return cls.settings().ANIMATION_MAX_FRAMES
+
+    @classmethod
+    def get_api_throttle_rate_limit(cls) -> int:
+        return cls.settings().API_THROTTLE_RATE_LIMIT
+
+    @classmethod
+    def get_api_throttle_burst_limit(cls) -> int:
+        return cls.settings().API_THROTTLE_BURST_LIMIT
+
+    @classmethod
+    def get_resize_throttle_rate_limit(cls) -> int:
+        return cls.settings().RESIZE_THROTTLE_RATE_LIMIT
+
+    @classmethod
+    def get_resize_throttle_burst_limit(cls) -> int:
+        return cls.settings().RESIZE_THROTTLE_BURST_LIMIT
+
+    @classmethod
+    def get_client_max_pool_connections(cls) -> int:
+        return cls.settings().CLIENT_MAX_POOL_CONNECTIONS
+
+    @classmethod
+    def get_client_max_attempts(cls) -> int:
+        return cls.settings().CLIENT_MAX_ATTEMPTS
+
+    @classmethod
+    def get_client_connect_timeout(cls) -> int:
+        return cls.settings().CLIENT_CONNECT_TIMEOUT
+
+    @classmethod
+    def get_client_read_timeout(cls) -> int:
+        return cls.settings().CLIENT_READ_TIMEOUT
+
+    @classmethod
+    def get_presigned_url_expiration(cls) -> int:
+        return cls.settings().PRESIGNED_URL_EXPIRATION
+
+    @classmethod
+    def get_presigned_url_cache_seconds(cls) -> int:
+        return cls.settings().PRESIGNED_URL_CACHE_SECONDS
+
+    @classmethod
+    def get_renditions(cls) -> List[Dict[str, Any]]:
+        return list(cls.settings().RENDITIONS)
+
+    @classmethod
+    def get_rendition_expiration_days(cls) -> int:
+        return cls.settings().RENDITION_EXPIRATION_DAYS
+
+    @classmethod
+    def get_rendition_touch_days(cls) -> int:
+        return cls.settings().RENDITION_TOUCH_DAYS
+
+    @classmethod
+    def get_noncurrent_version_expiration_days(cls) -> int:
+        return cls.settings().NONCURRENT_VERSION_EXPIRATION_DAYS
+
+    @classmethod
+    def get_image_size_step(cls) -> int:
+        return cls.settings().IMAGE_SIZE_STEP
+
+    @classmethod
+    def get_image_cache_max_age(cls) -> int:
+        return cls.settings().IMAGE_CACHE_MAX_AGE
+
+    @classmethod
+    def get_batch_size(cls) -> int:
+        return cls.settings().BATCH_SIZE
+
+    @classmethod
+    def get_batch_max_window_seconds(cls) -> int:
+        return cls.settings().BATCH_MAX_WINDOW_SECONDS
+
+    @classmethod
+    def get_batch_reserved_concurrency(cls) -> int:
+        return cls.settings().BATCH_RESERVED_CONCURRENCY
+
+    @classmethod
+    def get_batch_max_receive_count(cls) -> int:
+        return cls.settings().BATCH_MAX_RECEIVE_COUNT
+
+    @classmethod
+    def get_max_job_items(cls) -> int:
+        return cls.settings().MAX_JOB_ITEMS
+
+    @classmethod
+    def get_job_ttl_days(cls) -> int:
+        return cls.settings().JOB_TTL_DAYS
+
+    @classmethod
+    def get_log_level(cls) -> str:
+        return cls.settings().LOG_LEVEL
+
+    @classmethod
+    def get_metrics_namespace(cls) -> str:
+        return cls.settings().METRICS_NAMESPACE
+
+    @classmethod
+    def get_alarm_p95_duration_ms(cls) -> int:
+        return cls.settings().ALARM_P95_DURATION_MS
+
+    @classmethod
+    def get_alarm_memory_ratio(cls) -> float:
+        return cls.settings().ALARM_MEMORY_RATIO
+
+    @classmethod
+    def get_alarm_email(cls) -> str:
+        return cls.settings().ALARM_EMAIL
 
     @classmethod
     def get_github_secret_name(cls) -> str:
-        return os.getenv('GITHUB_SECRET_NAME', cls.GITHUB_SECRET_NAME)
+        return cls.settings().GITHUB_SECRET_NAME
 
     @classmethod
     def get_github_secret_json_field(cls) -> str:
-        return os.getenv('GITHUB_SECRET_JSON_FIELD', cls.GITHUB_SECRET_JSON_FIELD)
+        return cls.settings().GITHUB_SECRET_JSON_FIELD
 
     @classmethod
     def get_github_owner(cls) -> str:
-        return os.getenv('GITHUB_OWNER', cls.GITHUB_OWNER)
+        return cls.settings().GITHUB_OWNER
 
     @classmethod
     def get_github_repo(cls) -> str:
-        return os.getenv('GITHUB_REPO', cls.GITHUB_REPO)
+        return cls.settings().GITHUB_REPO
 
     @classmethod
     def get_github_branch(cls) -> str:
-        return os.getenv('GITHUB_BRANCH', cls.GITHUB_BRANCH)
+        return cls.settings().GITHUB_BRANCH
+
+    @classmethod
+    def get_github_connection_arn(cls) -> str:
+        return cls.settings().GITHUB_CONNECTION_ARN
@@ -0,0 +1,67 @@
+import warnings
+from PIL import Image, UnidentifiedImageError
+from renditions import decoded_pixels
+from settings import setting
+
+# Budgets vérifiés avant tout décodage : taille de la source, pixels déclarés dans
+# l'en-tête, et pixels réellement alloués au décodage pour le traitement en ligne
+MAX_INPUT_BYTES = int(setting('MAX_INPUT_BYTES', str(50 * 1024 * 1024)))
+MAX_INPUT_PIXELS = int(setting('MAX_INPUT_PIXELS', '100000000'))
+INLINE_MAX_DECODED_PIXELS = int(setting('INLINE_MAX_DECODED_PIXELS', '25000000'))
+
+# Garde-fou de Pillow contre les bombes de décompression aligné sur notre budget :
+# le dépassement est signalé par TooLarge plutôt que par un avertissement
+Image.MAX_IMAGE_PIXELS = MAX_INPUT_PIXELS
+warnings.simplefilter('ignore', Image.DecompressionBombWarning)
+
+
+class AdmissionError(Exception):
+    status_code = 400
+
+
+class TooLarge(AdmissionError):
+    status_code = 413
+
+
+class Unprocessable(AdmissionError):
+    status_code = 422
+
+
+class NeedsHighMemory(AdmissionError):
+    # Image valide mais trop coûteuse pour la fonction courante : à traiter en asynchrone
+    status_code = 413
+
+
+def check_bytes(size):
+    if size > MAX_INPUT_BYTES:
+        raise TooLarge(f"Image de {size} octets, limite de {MAX_INPUT_BYTES} octets")
+
+
+def inspect(source, source_bytes):
+    # Lecture du seul en-tête (format, dimensions) : aucun pixel n'est décodé
+    check_bytes(source_bytes)
+    try:
+        image = Image.open(source)
+    except Image.DecompressionBombError as e:
+        raise TooLarge(str(e))
+    except UnidentifiedImageError as e:
+        raise Unprocessable(f"Format d'image non reconnu: {str(e)}")
+
+    if image.width * image.height > MAX_INPUT_PIXELS:
+        raise TooLarge(f"Image de {image.width}x{image.height} pixels, limite de {MAX_INPUT_PIXELS} pixels")
+    return image
+
+
+def admit(image, specs, buffered_pixels=0):
+    # Coût estimé du décodage pour ces renditions (réduction JPEG comprise), plus les
+    # pixels conservés en mémoire pendant l'encodage (trames des animations)
+    pixels = decoded_pixels(image, specs) + buffered_pixels
+    if pixels > INLINE_MAX_DECODED_PIXELS:
+        # Fonction haute mémoire (budget déjà égal à celui des sources) : aucune autre
+        # fonction ne peut la traiter, le refus est définitif au lieu d'un renvoi en file
+        if INLINE_MAX_DECODED_PIXELS >= MAX_INPUT_PIXELS:
+            raise TooLarge(f"Traitement de {pixels} pixels, limite de {INLINE_MAX_DECODED_PIXELS} pixels")
+        raise NeedsHighMemory(
+            f"Décodage de {pixels} pixels, limite de {INLINE_MAX_DECODED_PIXELS} pixels en traitement direct"
+        )
+    return pixels
@@ -0,0 +1,140 @@
+import dataclasses
+import math
+import shutil
+import tempfile
+from PIL import Image, ImageSequence
+from formats import encode_params, load_plugin
+from renditions import RenditionSpec, build_renditions, output_size
+from settings import setting
+from storage import SPOOL_MAX_MEMORY
+
+# Formats de sortie conservant l'animation (PNG : APNG, TIFF : multi-pages) ;
+# les autres ne reçoivent que la première trame
+ANIMATED_FORMATS = ('GIF', 'WEBP', 'PNG', 'TIFF')
+
+# Encodeurs parcourant les trames une seule fois, au fil de l'eau : elles leur sont
+# fournies à la demande. GIF et APNG les parcourent plusieurs fois (et les conservent
+# toutes pour optimiser les différences entre trames) : elles sont redimensionnées d'avance
+STREAMED_FORMATS = ('WEBP', 'TIFF')
+
+# Le writer TIFF multi-pages relit et réécrit ses en-têtes : sortie dans un fichier
+# temporaire avant d'être recopiée dans le flux de sortie
+SEEKABLE_OUTPUT_FORMATS = ('TIFF',)
+
+# Au-delà, une trame sur N est conservée (durées cumulées) pour borner le temps d'encodage
+MAX_FRAMES = int(setting('ANIMATION_MAX_FRAMES', '300'))
+
+# Disposal (trame opaque, trame transparente) : les codes diffèrent entre GIF et APNG,
+# WebP et TIFF l'ignorent
+DISPOSAL = {'GIF': (1, 2), 'PNG': (0, 1), 'WEBP': (0, 0), 'TIFF': (0, 0)}
+
+# Durée appliquée aux trames qui n'en déclarent pas (ms)
+DEFAULT_FRAME_DURATION = 100
+
+
+def is_animated(image: Image.Image) -> bool:
+    # Lu depuis les en-têtes de trames, sans décoder les pixels
+    return getattr(image, 'n_frames', 1) > 1
+
+
+def frame_step(image: Image.Image) -> int:
+    # Une trame conservée sur frame_step
+    return max(1, math.ceil(image.n_frames / MAX_FRAMES))
+
+
+def frame_count(image: Image.Image) -> int:
+    return math.ceil(image.n_frames / frame_step(image))
+
+
+def buffered_pixels(image: Image.Image, specs, formats) -> int:
+    # Pixels des trames redimensionnées conservées par les encodeurs GIF et APNG
+    return sum(frame_count(image) * math.prod(output_size(image.size, spec))
+               for spec in specs if formats[spec.name] not in STREAMED_FORMATS)
+
+
+def has_alpha(image: Image.Image) -> bool:
+    return image.mode in ('RGBA', 'LA', 'PA') or 'transparency' in image.info
+
+
+class FrameSequence:
+    # Séquence multi-trames au sens de save_all (n_frames, seek, tell) dont les trames sont
+    # produites à la demande par un itérateur : l'encodeur n'a jamais qu'une trame
+    # redimensionnée en mémoire à la fois.
+    # Les autres attributs sont ceux de la trame courante.
+    def __init__(self, frames, n_frames):
+        self._frames = frames
+        self._frame = None
+        self._index = -1
+        self.n_frames = n_frames
+
+    def seek(self, index):
+        if index == self._index:
+            return
+        if index != self._index + 1 or index >= self.n_frames:
+            raise EOFError("Accès séquentiel uniquement")
+        self._frame = next(self._frames)
+        self._index = index
+
+    def tell(self):
+        return self._index
+
+    def __getattr__(self, name):
+        return getattr(self._frame, name)
+
+
+def resized_frames(image: Image.Image, spec: RenditionSpec, step, durations, mode):
+    # Trames composées par Pillow (transparence et disposal de la source appliqués), une sur
+    # step, redimensionnées une à une. Chaque trame n'est produite qu'une fois les durées des
+    # trames écartées cumulées dans durations, que l'encodeur lit au fil de l'eau.
+    pending = None
+    for index, frame in enumerate(ImageSequence.Iterator(image)):
+        duration = frame.info.get('duration') or DEFAULT_FRAME_DURATION
+        if index % step:
+            durations[-1] += duration
+            continue
+        if pending is not None:
+            yield pending
+        pending = build_renditions(frame.convert(mode), [spec])[spec.name]
+        durations.append(duration)
+    if pending is not None:
+        yield pending
+
+
+def encode_animation(image: Image.Image, spec: RenditionSpec, output_format: str, output):
+    # Encode toutes les trames, sous-échantillonnées au-delà de MAX_FRAMES
+    load_plugin(output_format)
+    # Recadrage intelligent évalué trame par trame : il ferait sauter le cadre
+    if spec.fit == 'smart':
+        spec = dataclasses.replace(spec, fit='cover')
+
+    mode = 'RGBA' if has_alpha(image) else 'RGB'
+    if output_format in SEEKABLE_OUTPUT_FORMATS:
+        with tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_MEMORY) as spool:
+            save_frames(image, spec, output_format, spool, mode)
+            spool.seek(0)
+            shutil.copyfileobj(spool, output)
+    else:
+        save_frames(image, spec, output_format, output, mode)
+
+
+def save_frames(image: Image.Image, spec: RenditionSpec, output_format: str, output, mode):
+    durations = []
+    frames = resized_frames(image, spec, frame_step(image), durations, mode)
+    first = next(frames)
+    if output_format in STREAMED_FORMATS:
+        append_images = [FrameSequence(frames, frame_count(image) - 1)]
+    else:
+        append_images = list(frames)
+    params = encode_params(output_format, spec.preset, spec.quality)
+    params.pop('quantize', None)
+    first.save(
+        output,
+        format=output_format,
+        save_all=True,
+        append_images=append_images,
+        duration=durations,
+        loop=image.info.get('loop', 0),
+        # Trames complètes : le fond n'est effacé entre deux trames que si elles sont transparentes
+        disposal=DISPOSAL[output_format][mode == 'RGBA'],
+        **params
+    )
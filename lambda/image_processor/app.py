@@ -1,21 +1,724 @@
 import json
 import base64
+import hashlib
 import os
 import logging
 from io import BytesIO
-from PIL import Image
-import boto3
+from urllib.parse import unquote_plus
+from admission import AdmissionError, NeedsHighMemory, admit, check_bytes, inspect
+from cache import cache_key, find_cached, read_cached
+from catalog import GUARANTEED_DISTANCE, find_similar, get_image, list_images, put_image
+from jobs import create_job, forward_item, get_job, record_item_result
+from metadata import extract_exif, extract_signature
+from metrics import metrics
+from parallel import parallel_map
+from settings import setting
+from singleflight import SingleFlight, acquire, enabled as single_flight_enabled
+from renditions import (
+    build_renditions,
+    decode_for_renditions,
+    encode_rendition,
+    load_renditions,
+    parse_rendition,
+    parse_transform,
+    select_renditions
+)
+from storage import (
+    CONTENT_TYPE_EXTENSIONS,
+    S3StreamWriter,
+    create_upload_ticket,
+    download_to_spool,
+    format_for_key,
+    head_image,
+    manifest_key_for_upload,
+    presigned_get_url,
+    read_image,
+    upload_executor,
+    upload_manifest,
+    upload_source
+)
 
-# Configurer le logging
+# Configurer le logging : les étapes du traitement sont en DEBUG, les durées
+# et volumes sont publiés via les métriques EMF plutôt que dans des messages libres
 logger = logging.getLogger()
-logger.setLevel(logging.INFO)
+logger.setLevel(setting('LOG_LEVEL', 'INFO'))
 
-s3 = boto3.client('s3')
+# Jeu de renditions configuré pour le déploiement (tailles, formats, qualité, ajustement)
+RENDITIONS = load_renditions(setting('RENDITIONS'))
+
+# Limite de réponse Lambda (6 Mo) une fois encodée en base64 : au-delà on redirige vers S3
+MAX_INLINE_BYTES = 4 * 1024 * 1024
+
+# Erreurs définitives : le message SQS n'est pas renvoyé en file (source supprimée comprise)
+PERMANENT_ERRORS = (ValueError, AdmissionError, FileNotFoundError)
+
+# Durée pendant laquelle une image dont des renditions ont expiré n'est pas remise en file
+# une seconde fois par les lectures suivantes du catalogue
+REGENERATION_LOCK_SECONDS = int(setting('REGENERATION_LOCK_SECONDS', '900'))
+
+
+def _response(status_code, body):
+    return {
+        'statusCode': status_code,
+        'headers': {
+            'Access-Control-Allow-Origin': '*',
+            'Access-Control-Allow-Credentials': True,
+            'Content-Type': 'application/json'
+        },
+        'body': json.dumps(body)
+    }
+
+
+def _accept_header(event):
+    # HTTP API (payload v2) transmet les en-têtes en minuscules
+    return (event.get('headers') or {}).get('accept')
+
+
+def _image_response(body, image_format, negotiated=False):
+    headers = {
+        'Content-Type': f'image/{image_format.lower()}',
+        'Cache-Control': f"public, max-age={setting('IMAGE_CACHE_MAX_AGE')}, immutable"
+    }
+    if negotiated:
+        headers['Vary'] = 'Accept'
+    return {
+        'statusCode': 200,
+        'headers': headers,
+        'body': base64.b64encode(body).decode(),
+        'isBase64Encoded': True
+    }
+
+
+def _redirect_response(url, max_age):
+    # Durée de cache inférieure à l'expiration de l'URL présignée
+    return {
+        'statusCode': 302,
+        'headers': {
+            'Location': url,
+            'Cache-Control': f'public, max-age={max_age}'
+        },
+        'body': ''
+    }
+
+
+def process_image(source, source_hash, specs, bucket_name, accept=None, source_key=None):
+    source.seek(0, os.SEEK_END)
+    source_bytes = source.tell()
+    source.seek(0)
+
+    # Ouvrir l'image avec Pillow : seul l'en-tête est lu, les pixels ne sont pas décodés.
+    # Les sources hors budget (octets, pixels) sont rejetées avant tout décodage
+    with metrics.stage('Inspect'):
+        image = inspect(source, source_bytes)
+    source_format = image.format
+    metrics.add('InputPixels', image.width * image.height)
+    logger.debug(f"Image ouverte avec succès. Format: {source_format}, Taille: {image.size}")
+
+    # Clés déterministes (empreinte de la source + paramètres) : les renditions
+    # déjà présentes dans le bucket sont renvoyées sans aucun traitement
+    formats = {spec.name: spec.output_format(source_format, accept) for spec in specs}
+    keys = {spec.name: cache_key(source_hash, spec, formats[spec.name]) for spec in specs}
+
+    with metrics.stage('CacheLookup'):
+        manifest = cached_manifest(bucket_name, keys, formats)
+
+    missing = [spec for spec in specs if spec.name not in manifest]
+    metrics.add('CacheHits', len(manifest))
+    metrics.add('CacheMisses', len(missing))
+    if not missing:
+        logger.debug("Toutes les renditions sont déjà en cache")
+        return manifest
+
+    # Single-flight : une seule invocation produit ces renditions, les invocations
+    # concurrentes pour la même source et les mêmes paramètres attendent leur publication
+    missing_keys = {spec.name: keys[spec.name] for spec in missing}
+    lock_key = f"{bucket_name}/{hashlib.sha256(' '.join(sorted(missing_keys.values())).encode()).hexdigest()}"
+    with SingleFlight(lock_key) as flight:
+        if not flight.leader:
+            with metrics.stage('Coalesce'):
+                coalesced = flight.wait(lambda: complete_manifest(cached_manifest(bucket_name, missing_keys, formats),
+                                                                  missing_keys))
+            metrics.add('Coalesced', 1 if coalesced is not None else 0)
+            if coalesced is not None:
+                manifest.update(coalesced)
+                return {spec.name: manifest[spec.name] for spec in specs}
+
+        render_missing(image, source_hash, source_bytes, missing, keys, formats, bucket_name, source_key, manifest)
+
+    return {spec.name: manifest[spec.name] for spec in specs}
+
+
+def cached_manifest(bucket_name, keys, formats):
+    return {
+        name: {
+            'key': keys[name],
+            'width': int(cached['metadata'].get('width', 0)),
+            'height': int(cached['metadata'].get('height', 0)),
+            'format': formats[name].lower(),
+            'bytes': cached['bytes']
+        }
+        for name, cached in find_cached(bucket_name, keys).items()
+    }
+
+
+def complete_manifest(manifest, keys):
+    return manifest if len(manifest) == len(keys) else None
+
+
+def render_missing(image, source_hash, source_bytes, missing, keys, formats, bucket_name, source_key, manifest):
+    # Décodage, renditions et envoi vers S3 des renditions absentes du cache (ajoutées à
+    # manifest), puis indexation de la source avec l'ensemble des renditions
+    # Import à la demande, comme pour smartcrop : les réponses servies depuis le cache
+    # et les routes du catalogue ne chargent pas le module des animations
+    from animation import ANIMATED_FORMATS, buffered_pixels, encode_animation, frame_count, is_animated
+
+    source_format = image.format
+    source_size = image.size
+    # Image ouverte sur la source : les trames des animations y sont relues au fil de l'encodage
+    source_image = image
+
+    # Sources animées : les renditions dans un format animé conservent toutes les trames,
+    # les autres sont produites à partir de la première
+    animated = [spec for spec in missing if formats[spec.name] in ANIMATED_FORMATS] if is_animated(image) else []
+    static = [spec for spec in missing if spec not in animated]
+
+    # Décodage trop coûteux pour cette fonction : NeedsHighMemory, traité par l'appelant
+    admit(image, missing, buffered_pixels(image, animated, formats))
+
+    # Métadonnées extraites une seule fois, lors du premier traitement de la source
+    exif = extract_exif(image)
+
+    # Décodage à échelle réduite lorsque les renditions sont bien plus petites que la source
+    with metrics.stage('Decode'):
+        image = decode_for_renditions(image, missing)
+    metrics.add('DecodedPixels', image.width * image.height)
+    logger.debug(f"Image décodée en {image.size}")
+    signature = extract_signature(image)
+
+    with metrics.stage('Resize'):
+        images = build_renditions(image, missing)
+
+    # Chaque rendition est envoyée vers S3 au fil de son encodage (multipart pour
+    # les plus volumineuses) ; les renditions indépendantes sont encodées en parallèle
+    with upload_executor() as executor:
+        def encode_and_stream(spec):
+            rendition = images[spec.name]
+            metadata = {'width': str(rendition.width), 'height': str(rendition.height)}
+            with S3StreamWriter(bucket_name, keys[spec.name], formats[spec.name], executor, metadata) as writer:
+                encode_rendition(rendition, spec, formats[spec.name], writer)
+            return writer
+
+        def encode_and_stream_animation(spec):
+            rendition = images[spec.name]
+            frames = frame_count(source_image)
+            metadata = {'width': str(rendition.width), 'height': str(rendition.height), 'frames': str(frames)}
+            with S3StreamWriter(bucket_name, keys[spec.name], formats[spec.name], executor, metadata) as writer:
+                encode_animation(source_image, spec, formats[spec.name], writer)
+            metrics.add('Frames', frames)
+            return writer
+
+        with metrics.stage('Encode'):
+            writers = parallel_map(encode_and_stream, static)
+            # Les trames sont lues une à une dans la source partagée : encodage séquentiel
+            writers += [encode_and_stream_animation(spec) for spec in animated]
+
+        for spec, writer in zip(static + animated, writers):
+            rendition = images[spec.name]
+            manifest[spec.name] = {
+                'key': keys[spec.name],
+                'width': rendition.width,
+                'height': rendition.height,
+                'format': formats[spec.name].lower(),
+                'bytes': writer.tell()
+            }
+            metrics.add('OutputPixels', rendition.width * rendition.height)
+            metrics.add('OutputBytes', writer.tell(), 'Bytes')
+
+        # Attente des envois encore en vol
+        with metrics.stage('Upload'):
+            for writer in writers:
+                writer.close().result()
+    logger.debug(f"Upload vers le bucket {bucket_name} réussi")
+
+    # Fiche de l'image dans le catalogue, indexée par l'empreinte SHA-256 de la source
+    with metrics.stage('Index'):
+        put_image(source_hash, {
+            'width': source_size[0],
+            'height': source_size[1],
+            'format': source_format,
+            'bytes': source_bytes,
+            **exif,
+            **signature
+        }, {name: dict(rendition) for name, rendition in manifest.items()}, source_key)
+
+    return manifest
+
+
+def add_presigned_urls(bucket_name, manifest):
+    with metrics.stage('Presign'):
+        for rendition in manifest.values():
+            rendition['url'] = presigned_get_url(bucket_name, rendition['key'])
+    return manifest
+
+
+def _operation(event):
+    if 'Records' in event:
+        return 'SqsBatch' if event['Records'][0].get('eventSource') == 'aws:sqs' else 'S3Event'
+    return event.get('routeKey', 'POST /resize-image')
 
 
 def lambda_handler(event, context):
+    metrics.reset(_operation(event))
+    if context is not None:
+        metrics.set_property('FunctionName', getattr(context, 'function_name', None))
+        metrics.set_property('RequestId', getattr(context, 'aws_request_id', None))
+
+    try:
+        response = route(event)
+        status_code = response.get('statusCode') if isinstance(response, dict) else None
+        if status_code is not None:
+            metrics.set_property('StatusCode', status_code)
+        metrics.add('Errors', 1 if status_code and status_code >= 500 else 0)
+        return response
+    except Exception:
+        metrics.add('Errors', 1)
+        raise
+    finally:
+        metrics.flush()
+
+
+def route(event):
+    if 'Records' in event:
+        # Lots de jobs SQS ou notifications S3 du bucket d'ingestion
+        if event['Records'][0].get('eventSource') == 'aws:sqs':
+            return handle_sqs_event(event)
+        return handle_s3_event(event)
+
+    if event.get('routeKey') == 'POST /jobs':
+        return handle_create_job(event)
+
+    if event.get('routeKey') == 'GET /jobs/{jobId}':
+        return handle_job_status(event)
+
+    if event.get('routeKey') == 'POST /upload-ticket':
+        return handle_upload_ticket(event)
+
+    if event.get('routeKey') == 'GET /img/{key+}':
+        return handle_transform_request(event)
+
+    if event.get('routeKey') == 'HEAD /img/{key+}':
+        # Mêmes en-têtes que le GET (la variante est produite et mise en cache), sans le corps
+        return dict(handle_transform_request(event), body='', isBase64Encoded=False)
+
+    if event.get('routeKey') == 'GET /images':
+        return handle_list_images(event)
+
+    if event.get('routeKey') == 'GET /images/{imageId}':
+        return handle_get_image(event)
+
+    if event.get('routeKey') == 'GET /images/{imageId}/similar':
+        return handle_similar_images(event)
+
+    return handle_resize_request(event)
+
+
+def handle_upload_ticket(event):
+    try:
+        body = json.loads(event.get('body') or '{}')
+        content_type = body.get('contentType', 'image/jpeg')
+
+        if content_type not in CONTENT_TYPE_EXTENSIONS:
+            raise ValueError(f"Type de contenu non supporté: {content_type}")
+
+        upload_id, key, post = create_upload_ticket(
+            os.environ['INGEST_BUCKET'],
+            content_type,
+            int(setting('MAX_UPLOAD_BYTES')),
+            int(setting('UPLOAD_URL_EXPIRATION'))
+        )
+        logger.info(f"Ticket d'upload généré: {key}")
+
+        # Manifeste des renditions, disponible une fois le traitement déclenché par S3 terminé
+        result_url = presigned_get_url(os.environ['DESTINATION_BUCKET'], manifest_key_for_upload(key))
+
+        return _response(200, {
+            'uploadId': upload_id,
+            'key': key,
+            'uploadUrl': post['url'],
+            'fields': post['fields'],
+            'resultUrl': result_url
+        })
+
+    except json.JSONDecodeError as e:
+        logger.error(f"Erreur de décodage JSON: {str(e)}")
+        return _response(400, {'message': f'Erreur de format de requête: {str(e)}'})
+    except ValueError as e:
+        logger.error(f"Erreur de validation: {str(e)}")
+        return _response(400, {'message': f'Erreur de validation: {str(e)}'})
+    except Exception as e:
+        logger.error(f"Erreur inattendue: {str(e)}")
+        return _response(500, {'message': f'Erreur lors de la génération du ticket: {str(e)}'})
+
+
+def handle_transform_request(event):
     try:
-        logger.info("Début du traitement de l'image")
+        source_key = unquote_plus(event['pathParameters']['key'])
+        source_bucket = os.environ['INGEST_BUCKET']
+        destination_bucket = os.environ['DESTINATION_BUCKET']
+
+        spec = parse_transform(event.get('queryStringParameters') or {})
+        output_format = spec.output_format(format_for_key(source_key), _accept_header(event))
+
+        source_head = head_image(source_bucket, source_key)
+        if source_head is None:
+            return _response(404, {'message': f'Image introuvable: {source_key}'})
+
+        # L'ETag identifie le contenu de la source sans avoir à la télécharger
+        key = cache_key(f"etag-{source_head['etag']}", spec, output_format)
+        body = read_cached(destination_bucket, key)
+
+        if body is None:
+            # Requêtes simultanées pour la même variante : une seule la calcule
+            with SingleFlight(f"{destination_bucket}/{key}") as flight:
+                if not flight.leader:
+                    with metrics.stage('Coalesce'):
+                        body = flight.wait(lambda: read_image(destination_bucket, key))
+                    metrics.add('Coalesced', 1 if body is not None else 0)
+                if body is None:
+                    body = render_transform(source_bucket, source_key, source_head, spec, output_format,
+                                            destination_bucket, key)
+
+        if body is None or len(body) > MAX_INLINE_BYTES:
+            return _redirect_response(presigned_get_url(destination_bucket, key), max_age=600)
+
+        return _image_response(body, output_format, negotiated=spec.format == 'auto')
+
+    except AdmissionError as e:
+        logger.error(f"Image refusée: {str(e)}")
+        return _response(e.status_code, {'message': f'Image refusée: {str(e)}'})
+    except ValueError as e:
+        logger.error(f"Erreur de validation: {str(e)}")
+        return _response(400, {'message': f'Erreur de validation: {str(e)}'})
+    except Exception as e:
+        logger.error(f"Erreur inattendue: {str(e)}")
+        return _response(500, {'message': f'Erreur lors de la transformation de l\'image: {str(e)}'})
+
+
+def render_transform(source_bucket, source_key, source_head, spec, output_format, destination_bucket, key):
+    from animation import ANIMATED_FORMATS, buffered_pixels, encode_animation, frame_count, is_animated
+
+    logger.debug(f"Transformation de {source_key} vers {key}")
+    metrics.add('InputBytes', source_head['bytes'], 'Bytes')
+    check_bytes(source_head['bytes'])
+    with metrics.stage('Download'):
+        source, _ = download_to_spool(source_bucket, source_key)
+    with source, upload_executor() as executor:
+        with metrics.stage('Inspect'):
+            image = inspect(source, source_head['bytes'])
+            # Source animée vers un format animé : trames lues dans la source pendant l'encodage
+            animated = is_animated(image) and output_format in ANIMATED_FORMATS
+            admit(image, [spec], buffered_pixels(image, [spec] if animated else [], {spec.name: output_format}))
+        source_image = image
+        with metrics.stage('Decode'):
+            image = decode_for_renditions(image, [spec])
+        with metrics.stage('Resize'):
+            rendition = build_renditions(image, [spec])[spec.name]
+
+        metadata = {'width': str(rendition.width), 'height': str(rendition.height)}
+        if animated:
+            metadata['frames'] = str(frame_count(source_image))
+            metrics.add('Frames', frame_count(source_image))
+        with metrics.stage('Encode'):
+            with S3StreamWriter(destination_bucket, key, output_format, executor, metadata) as writer:
+                if animated:
+                    encode_animation(source_image, spec, output_format, writer)
+                else:
+                    encode_rendition(rendition, spec, output_format, writer)
+        with metrics.stage('Upload'):
+            writer.close().result()
+
+    # Sortie envoyée en multipart : trop volumineuse pour être renvoyée directement
+    metrics.add('OutputBytes', writer.tell(), 'Bytes')
+    return writer.getvalue()
+
+
+def handle_create_job(event):
+    try:
+        body = json.loads(event.get('body') or '{}')
+        source_keys = body.get('keys')
+
+        if not isinstance(source_keys, list) or not source_keys:
+            raise ValueError("Liste 'keys' manquante ou vide dans le body")
+        if len(source_keys) > int(setting('MAX_JOB_ITEMS')):
+            raise ValueError(f"Un job est limité à {setting('MAX_JOB_ITEMS')} images")
+
+        specs = select_renditions(RENDITIONS, body.get('renditions'))
+        job_id = create_job(source_keys, specs, int(setting('JOB_TTL_DAYS')))
+        logger.info(f"Job {job_id} créé avec {len(source_keys)} images")
+
+        return _response(202, {
+            'jobId': job_id,
+            'total': len(source_keys),
+            'statusPath': f'/jobs/{job_id}'
+        })
+
+    except json.JSONDecodeError as e:
+        logger.error(f"Erreur de décodage JSON: {str(e)}")
+        return _response(400, {'message': f'Erreur de format de requête: {str(e)}'})
+    except ValueError as e:
+        logger.error(f"Erreur de validation: {str(e)}")
+        return _response(400, {'message': f'Erreur de validation: {str(e)}'})
+    except Exception as e:
+        logger.error(f"Erreur inattendue: {str(e)}")
+        return _response(500, {'message': f'Erreur lors de la création du job: {str(e)}'})
+
+
+def _page_limit(query, default, maximum):
+    # Taille de page demandée, plafonnée : DynamoDB refuse une limite inférieure à 1
+    limit = int(query.get('limit', default))
+    if limit < 1:
+        raise ValueError("Le paramètre 'limit' doit être supérieur ou égal à 1")
+    return min(limit, maximum)
+
+
+def handle_job_status(event):
+    try:
+        job_id = event['pathParameters']['jobId']
+        query = event.get('queryStringParameters') or {}
+        limit = _page_limit(query, 100, 1000)
+
+        job = get_job(job_id, limit, query.get('cursor'))
+        if job is None:
+            return _response(404, {'message': f'Job introuvable: {job_id}'})
+
+        destination_bucket = os.environ['DESTINATION_BUCKET']
+        job['items'] = [
+            {
+                'itemId': item['itemId'],
+                'key': item['key'],
+                'status': item['itemStatus'],
+                'error': item.get('error'),
+                'renditions': {
+                    name: presigned_get_url(destination_bucket, key)
+                    for name, key in item.get('renditions', {}).items()
+                }
+            }
+            for item in job['items']
+        ]
+        return _response(200, job)
+
+    except ValueError as e:
+        logger.error(f"Erreur de validation: {str(e)}")
+        return _response(400, {'message': f'Erreur de validation: {str(e)}'})
+    except Exception as e:
+        logger.error(f"Erreur inattendue: {str(e)}")
+        return _response(500, {'message': f'Erreur lors de la lecture du job: {str(e)}'})
+
+
+def handle_list_images(event):
+    try:
+        query = event.get('queryStringParameters') or {}
+        limit = _page_limit(query, 50, 200)
+        return _response(200, list_images(limit, query.get('cursor'), query.get('format')))
+
+    except ValueError as e:
+        logger.error(f"Erreur de validation: {str(e)}")
+        return _response(400, {'message': f'Erreur de validation: {str(e)}'})
+    except Exception as e:
+        logger.error(f"Erreur inattendue: {str(e)}")
+        return _response(500, {'message': f'Erreur lors de la lecture du catalogue: {str(e)}'})
+
+
+def handle_get_image(event):
+    try:
+        image_id = event['pathParameters']['imageId']
+        image = get_image(image_id)
+        if image is None:
+            return _response(404, {'message': f'Image introuvable: {image_id}'})
+
+        bucket_name = os.environ['DESTINATION_BUCKET']
+        renditions = image['renditions']
+        # Renditions expirées par le cycle de vie du bucket : régénérées en tâche de fond
+        # depuis la source, les autres sont rafraîchies si elles approchent de l'expiration
+        cached = find_cached(bucket_name, {name: rendition['key'] for name, rendition in renditions.items()})
+        evicted = [name for name in renditions if name not in cached]
+        add_presigned_urls(bucket_name, {name: renditions[name] for name in cached})
+        for name in evicted:
+            renditions[name]['status'] = 'evicted'
+        metrics.add('EvictedRenditions', len(evicted))
+
+        if evicted:
+            regeneration = request_regeneration(image_id, image.get('sourceKey'), evicted)
+            if regeneration:
+                image['regeneration'] = regeneration
+
+        return _response(200, image)
+
+    except Exception as e:
+        logger.error(f"Erreur inattendue: {str(e)}")
+        return _response(500, {'message': f'Erreur lors de la lecture du catalogue: {str(e)}'})
+
+
+def request_regeneration(image_id, source_key, names):
+    # Seules les renditions configurées sont régénérables : les paramètres des renditions
+    # décrites dans une requête ne sont pas conservés. Les images reçues en ligne par l'API
+    # n'ont pas de source stockée : le client les renvoie pour les régénérer
+    specs = [spec for spec in RENDITIONS if spec.name in names]
+    if source_key is None or not specs:
+        return None
+    # Un seul job par image tant que le verrou n'a pas expiré
+    if single_flight_enabled() and acquire(f"regenerate/{image_id}", REGENERATION_LOCK_SECONDS) is None:
+        return {'status': 'pending'}
+
+    job_id = create_job([source_key], specs, int(setting('JOB_TTL_DAYS')))
+    logger.info(f"Image {image_id}: régénération de {', '.join(spec.name for spec in specs)} (job {job_id})")
+    return {'status': 'queued', 'jobId': job_id, 'statusPath': f'/jobs/{job_id}'}
+
+
+def handle_similar_images(event):
+    try:
+        image_id = event['pathParameters']['imageId']
+        query = event.get('queryStringParameters') or {}
+        max_distance = int(query.get('distance', GUARANTEED_DISTANCE))
+        if not 0 <= max_distance <= 64:
+            raise ValueError("La distance doit être comprise entre 0 et 64")
+
+        similar = find_similar(image_id, max_distance)
+        if similar is None:
+            return _response(404, {'message': f'Image introuvable: {image_id}'})
+
+        return _response(200, {
+            'imageId': image_id,
+            'distance': max_distance,
+            # Au-delà de cette distance, des quasi-doublons peuvent manquer
+            'exhaustive': max_distance <= GUARANTEED_DISTANCE,
+            'items': similar
+        })
+
+    except ValueError as e:
+        logger.error(f"Erreur de validation: {str(e)}")
+        return _response(400, {'message': f'Erreur de validation: {str(e)}'})
+    except Exception as e:
+        logger.error(f"Erreur inattendue: {str(e)}")
+        return _response(500, {'message': f'Erreur lors de la recherche de doublons: {str(e)}'})
+
+
+def handle_sqs_event(event):
+    # Rapport d'échec partiel : seuls les messages en erreur transitoire sont renvoyés en file
+    source_bucket = os.environ['INGEST_BUCKET']
+    destination_bucket = os.environ['DESTINATION_BUCKET']
+    max_receive_count = int(setting('JOBS_MAX_RECEIVE_COUNT'))
+    failures = []
+
+    for record in event['Records']:
+        try:
+            message = json.loads(record['body'])
+            job_id, source_key = message.get('jobId'), message['key']
+        except (ValueError, KeyError, TypeError) as e:
+            # Message illisible : sans job ni clé, il ne peut qu'être laissé à la DLQ
+            logger.error(f"Message {record['messageId']} invalide: {str(e)}")
+            failures.append({'itemIdentifier': record['messageId']})
+            continue
+
+        try:
+            specs = [parse_rendition(raw) for raw in message['renditions']]
+            with metrics.stage('Download'):
+                source, source_hash = download_to_spool(source_bucket, source_key)
+            with source:
+                manifest = process_image(source, source_hash, specs, destination_bucket, source_key=source_key)
+            complete_item(message, destination_bucket, manifest=manifest)
+
+        except NeedsHighMemory as e:
+            # Seule la fonction standard a un budget inférieur à la taille maximale des sources
+            logger.info(f"Job {job_id}, {source_key}: transféré au traitement haute mémoire: {str(e)}")
+            try:
+                forward_item(message, os.environ['HEAVY_JOBS_QUEUE_URL'])
+            except Exception as forward_error:
+                # Seul ce message est renvoyé en file, pas le lot entier
+                logger.error(f"Job {job_id}, {source_key}: transfert impossible: {str(forward_error)}")
+                failures.append({'itemIdentifier': record['messageId']})
+
+        except PERMANENT_ERRORS as e:
+            logger.error(f"Job {job_id}, {source_key}: erreur définitive: {str(e)}")
+            try:
+                complete_item(message, destination_bucket, error=e)
+            except Exception as complete_error:
+                logger.error(f"Job {job_id}, {source_key}: résultat non enregistré: {str(complete_error)}")
+                failures.append({'itemIdentifier': record['messageId']})
+
+        except Exception as e:
+            logger.error(f"Job {job_id}, {source_key}: erreur transitoire: {str(e)}")
+            # Dernière tentative avant la DLQ : l'élément est compté en échec
+            if int(record['attributes']['ApproximateReceiveCount']) >= max_receive_count:
+                try:
+                    complete_item(message, destination_bucket, error=e)
+                except Exception as complete_error:
+                    logger.error(f"Job {job_id}, {source_key}: résultat non enregistré: {str(complete_error)}")
+            failures.append({'itemIdentifier': record['messageId']})
+
+    metrics.add('BatchItemFailures', len(failures))
+    return {'batchItemFailures': failures}
+
+
+def complete_item(message, bucket_name, manifest=None, error=None):
+    # Élément de job : résultat enregistré dans la table des jobs. Upload direct
+    # transféré au traitement haute mémoire : manifeste attendu par le client
+    if 'manifestKey' in message:
+        result = {'error': str(error)} if manifest is None else {'renditions': add_presigned_urls(bucket_name, manifest)}
+        upload_manifest(bucket_name, message['manifestKey'], result)
+        return
+
+    renditions = {name: rendition['key'] for name, rendition in (manifest or {}).items()}
+    record_item_result(message['jobId'], message['itemId'], message['key'], manifest is not None,
+                       renditions=renditions, error=None if error is None else str(error))
+
+
+def handle_s3_event(event):
+    destination_bucket = os.environ['DESTINATION_BUCKET']
+    processed = []
+
+    for record in event['Records']:
+        source_bucket = record['s3']['bucket']['name']
+        source_key = unquote_plus(record['s3']['object']['key'])
+        source_size = record['s3']['object'].get('size', 0)
+        manifest_key = manifest_key_for_upload(source_key)
+        logger.info(f"Traitement de l'objet s3://{source_bucket}/{source_key}")
+        metrics.add('InputBytes', source_size, 'Bytes')
+
+        try:
+            # Taille connue par la notification : rejet sans téléchargement
+            check_bytes(source_size)
+            with metrics.stage('Download'):
+                source, source_hash = download_to_spool(source_bucket, source_key)
+            with source:
+                manifest = process_image(source, source_hash, RENDITIONS, destination_bucket, source_key=source_key)
+
+            upload_manifest(destination_bucket, manifest_key, {
+                'renditions': add_presigned_urls(destination_bucket, manifest)
+            })
+            logger.info(f"Image traitée, manifeste stocké: {manifest_key}")
+
+        except NeedsHighMemory as e:
+            logger.info(f"{source_key}: transféré au traitement haute mémoire: {str(e)}")
+            forward_item({
+                'key': source_key,
+                'renditions': [spec.to_dict() for spec in RENDITIONS],
+                'manifestKey': manifest_key
+            }, os.environ['HEAVY_JOBS_QUEUE_URL'])
+
+        except AdmissionError as e:
+            # Erreur définitive : le client la lit dans le manifeste au lieu d'attendre
+            logger.error(f"{source_key}: image refusée: {str(e)}")
+            upload_manifest(destination_bucket, manifest_key, {'error': str(e)})
+
+        processed.append(manifest_key)
+
+    return {'processed': processed}
+
+
+def handle_resize_request(event):
+    try:
+        logger.debug("Début du traitement de l'image")
 
         # Vérifier si le body est présent
         if 'body' not in event:
@@ -27,98 +730,52 @@ def lambda_handler(event, context):
         if 'image' not in body:
             raise ValueError("Clé 'image' manquante dans le body")
 
-        logger.info("Image reçue, début du décodage base64")
-        image_data = base64.b64decode(body['image'])
-        logger.info("Image décodée avec succès")
+        specs = select_renditions(RENDITIONS, body.get('renditions'))
 
-        # Ouvrir l'image avec Pillow
-        image = Image.open(BytesIO(image_data))
-        logger.info(f"Image ouverte avec succès. Format: {image.format}, Taille: {image.size}")
+        # Taille décodée déduite de la longueur base64 : rejet avant tout décodage
+        check_bytes(len(body['image']) * 3 // 4)
 
-        # Redimensionner l'image (par exemple à 800x600)
-        resized_image = image.resize((800, 600), Image.LANCZOS)
-        logger.info("Image redimensionnée avec succès")
+        with metrics.stage('Base64Decode'):
+            image_data = base64.b64decode(body.pop('image'))
+        metrics.add('InputBytes', len(image_data), 'Bytes')
 
-        # Convertir l'image redimensionnée en bytes
-        output_buffer = BytesIO()
-        resized_image.save(output_buffer, format=image.format)
-        output_buffer.seek(0)
-        logger.info("Image convertie en bytes avec succès")
+        source_hash = hashlib.sha256(image_data).hexdigest()
+        logger.debug(f"Empreinte de la source: {source_hash}")
 
-        # Générer un nom de fichier unique
-        file_name = f"resized_{int(context.get_remaining_time_in_millis())}.{image.format.lower()}"
-        logger.info(f"Nom de fichier généré: {file_name}")
-
-        # Upload vers S3
         bucket_name = os.environ['DESTINATION_BUCKET']
-        logger.info(f"Upload vers le bucket: {bucket_name}")
-
-        s3.put_object(
-            Bucket=bucket_name,
-            Key=file_name,
-            Body=output_buffer,
-            ContentType=f'image/{image.format.lower()}'
-        )
-        logger.info("Upload vers S3 réussi")
-
-        # Générer l'URL de l'image (presigned url)
-        # image_url = f"https://{bucket_name}.s3.amazonaws.com/{file_name}"
-        image_url = s3.generate_presigned_url(
-            'get_object',
-            Params={'Bucket': bucket_name, 'Key': file_name},
-            ExpiresIn=3600  # 1h
-        )
-        logger.info(f"URL de l'image générée: {image_url}")
-
-        return {
-            'statusCode': 200,
-            'headers': {
-                'Access-Control-Allow-Origin': '*',
-                'Access-Control-Allow-Credentials': True,
-                'Content-Type': 'application/json'
-            },
-            'body': json.dumps({
-                'message': 'Image redimensionnée avec succès',
-                'imageUrl': image_url
+        try:
+            manifest = process_image(BytesIO(image_data), source_hash, specs, bucket_name, _accept_header(event))
+        except NeedsHighMemory as e:
+            # Traitement asynchrone par la fonction haute mémoire, suivi comme un job
+            logger.info(f"Traitement différé: {str(e)}")
+            source_key = upload_source(os.environ['INGEST_BUCKET'], source_hash, image_data)
+            job_id = create_job([source_key], specs, int(setting('JOB_TTL_DAYS')),
+                                queue_url=os.environ['HEAVY_JOBS_QUEUE_URL'])
+            return _response(202, {
+                'message': 'Image volumineuse, traitement différé',
+                'jobId': job_id,
+                'statusPath': f'/jobs/{job_id}'
             })
-        }
 
+        # Générer les URLs des renditions (presigned url)
+        add_presigned_urls(bucket_name, manifest)
+
+        # imageUrl reste la première rendition demandée pour les clients existants
+        return _response(200, {
+            'message': 'Image redimensionnée avec succès',
+            'imageUrl': manifest[specs[0].name]['url'],
+            'renditions': manifest
+        })
+
+    except AdmissionError as e:
+        logger.error(f"Image refusée: {str(e)}")
+        return _response(e.status_code, {'message': f'Image refusée: {str(e)}'})
     except json.JSONDecodeError as e:
         logger.error(f"Erreur de décodage JSON: {str(e)}")
-        return {
-            'statusCode': 400,
-            'headers': {
-                'Access-Control-Allow-Origin': '*',
-                'Access-Control-Allow-Credentials': True,
-                'Content-Type': 'application/json'
-            },
-            'body': json.dumps({
-                'message': f'Erreur de format de requête: {str(e)}'
-            })
-        }
+        return _response(400, {'message': f'Erreur de format de requête: {str(e)}'})
     except ValueError as e:
         logger.error(f"Erreur de validation: {str(e)}")
-        return {
-            'statusCode': 400,
-            'headers': {
-                'Access-Control-Allow-Origin': '*',
-                'Access-Control-Allow-Credentials': True,
-                'Content-Type': 'application/json'
-            },
-            'body': json.dumps({
-                'message': f'Erreur de validation: {str(e)}'
-            })
-        }
+        return _response(400, {'message': f'Erreur de validation: {str(e)}'})
     except Exception as e:
         logger.error(f"Erreur inattendue: {str(e)}")
-        return {
-            'statusCode': 500,
-            'headers': {
-                'Access-Control-Allow-Origin': '*',
-                'Access-Control-Allow-Credentials': True,
-                'Content-Type': 'application/json'
-            },
-            'body': json.dumps({
-                'message': f'Erreur lors du traitement de l\'image: {str(e)}'
-            })
-        }
+        return _response(500, {'message': f'Erreur lors du traitement de l\'image: {str(e)}'})
@@ -0,0 +1,56 @@
+import hashlib
+import json
+from concurrent.futures import ThreadPoolExecutor
+from storage import head_image, read_object, touch_if_stale
+
+# À incrémenter lorsque le pipeline de traitement change le rendu, pour invalider les entrées existantes
+TRANSFORM_VERSION = 2
+
+CACHE_PREFIX = 'renditions/'
+
+
+def transform_digest(spec, output_format):
+    # Le nom de la rendition est exclu : deux renditions identiques partagent le même objet
+    params = spec.to_dict()
+    params.pop('name')
+    params['format'] = output_format.lower()
+    params['version'] = TRANSFORM_VERSION
+    return hashlib.sha256(json.dumps(params, sort_keys=True).encode()).hexdigest()[:16]
+
+
+def cache_key(source_hash, spec, output_format):
+    # Clé déterministe : même source et mêmes paramètres -> même objet
+    return f"{CACHE_PREFIX}{source_hash}/{transform_digest(spec, output_format)}.{output_format.lower()}"
+
+
+def find_cached(bucket_name, keys_by_name):
+    # HEAD concurrents : {nom: métadonnées} pour les renditions déjà présentes
+    if not keys_by_name:
+        return {}
+
+    with ThreadPoolExecutor(max_workers=len(keys_by_name)) as executor:
+        futures = {
+            name: executor.submit(_head_and_touch, bucket_name, key)
+            for name, key in keys_by_name.items()
+        }
+        results = {name: future.result() for name, future in futures.items()}
+
+    return {name: result for name, result in results.items() if result is not None}
+
+
+def read_cached(bucket_name, key):
+    # Contenu d'une entrée du cache, None si absente ou expirée
+    cached = read_object(bucket_name, key)
+    if cached is None:
+        return None
+    body, head = cached
+    touch_if_stale(bucket_name, key, head)
+    return body
+
+
+def _head_and_touch(bucket_name, key):
+    # Une entrée trouvée est une entrée servie : son expiration est repoussée
+    head = head_image(bucket_name, key)
+    if head is not None:
+        touch_if_stale(bucket_name, key, head)
+    return head
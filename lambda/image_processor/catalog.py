@@ -0,0 +1,158 @@
+import base64
+import json
+import os
+import time
+from decimal import Decimal
+import boto3
+from boto3.dynamodb.conditions import Attr, Key
+from clients import CLIENT_CONFIG
+from metadata import hamming_distance
+
+# Client créé au premier usage, comme pour la table des jobs
+_clients = {}
+
+# Table unique : une fiche par image (pk image#<empreinte SHA-256>) et, pour la recherche
+# de quasi-doublons, une entrée par bande de l'empreinte perceptuelle
+IMAGE_PREFIX = 'image#'
+PHASH_PREFIX = 'phash#'
+METADATA_SK = 'metadata'
+
+# Index secondaire listant les fiches de la plus récente à la plus ancienne
+LISTING_INDEX = 'ImagesByCreation'
+LISTING_PARTITION = 'image'
+
+# Empreinte de 64 bits découpée en 4 bandes de 16 bits : deux empreintes à une distance
+# de Hamming inférieure à 4 partagent forcément une bande (principe des tiroirs)
+PHASH_BANDS = 4
+GUARANTEED_DISTANCE = PHASH_BANDS - 1
+
+
+def _table():
+    if 'dynamodb' not in _clients:
+        _clients['dynamodb'] = boto3.resource('dynamodb', config=CLIENT_CONFIG)
+    return _clients['dynamodb'].Table(os.environ['IMAGES_TABLE'])
+
+
+def _plain(value):
+    # Les nombres DynamoDB sont des Decimal, non sérialisables en JSON
+    if isinstance(value, Decimal):
+        return int(value) if value == value.to_integral_value() else float(value)
+    if isinstance(value, dict):
+        return {key: _plain(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_plain(item) for item in value]
+    return value
+
+
+def phash_bands(phash):
+    width = len(phash) // PHASH_BANDS
+    return [f"{PHASH_PREFIX}{index}#{phash[index * width:(index + 1) * width]}" for index in range(PHASH_BANDS)]
+
+
+def encode_cursor(last_evaluated_key):
+    if not last_evaluated_key:
+        return None
+    return base64.urlsafe_b64encode(json.dumps(_plain(last_evaluated_key)).encode()).decode()
+
+
+def decode_cursor(cursor):
+    try:
+        return json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (ValueError, TypeError):
+        raise ValueError("Curseur de pagination invalide")
+
+
+def put_image(image_id, metadata, renditions, source_key=None):
+    # Fiche complétée plutôt que remplacée : les renditions d'un traitement s'ajoutent à
+    # celles déjà indexées, la date de création et la source d'origine sont conservées
+    attributes = {'entity': LISTING_PARTITION, 'imageId': image_id,
+                  **{name: value for name, value in metadata.items() if value is not None}}
+    once = {'createdAt': int(time.time()), 'sourceKey': source_key}
+    names, values, assignments = {}, {}, []
+    for index, (name, value) in enumerate(attributes.items()):
+        names[f'#a{index}'], values[f':a{index}'] = name, value
+        assignments.append(f'#a{index} = :a{index}')
+    for name, value in once.items():
+        if value is not None:
+            names[f'#{name}'], values[f':{name}'] = name, value
+            assignments.append(f'#{name} = if_not_exists(#{name}, :{name})')
+    names['#renditions'] = 'renditions'
+
+    # Deux écritures inconditionnelles, sans lecture préalable : la première crée la fiche
+    # et une table de renditions vide si besoin, la seconde y ajoute celles du traitement.
+    # Deux premières indexations concurrentes conservent ainsi chacune leurs renditions
+    # (DynamoDB refuse renditions et renditions.<nom> dans une même expression)
+    key = {'pk': f"{IMAGE_PREFIX}{image_id}", 'sk': METADATA_SK}
+    _table().update_item(
+        Key=key,
+        UpdateExpression='SET ' + ', '.join(assignments + ['#renditions = if_not_exists(#renditions, :empty)']),
+        ExpressionAttributeNames=names,
+        ExpressionAttributeValues={**values, ':empty': {}}
+    )
+    if renditions:
+        _table().update_item(
+            Key=key,
+            UpdateExpression='SET ' + ', '.join(f'#renditions.#r{index} = :r{index}' for index in range(len(renditions))),
+            ExpressionAttributeNames={'#renditions': 'renditions',
+                                      **{f'#r{index}': name for index, name in enumerate(renditions)}},
+            ExpressionAttributeValues={f':r{index}': value for index, value in enumerate(renditions.values())}
+        )
+
+    with _table().batch_writer() as batch:
+        for band in phash_bands(metadata['phash']):
+            batch.put_item(Item={'pk': band, 'sk': f"{IMAGE_PREFIX}{image_id}", 'imageId': image_id,
+                                 'phash': metadata['phash']})
+
+
+def get_image(image_id):
+    item = _table().get_item(Key={'pk': f"{IMAGE_PREFIX}{image_id}", 'sk': METADATA_SK}).get('Item')
+    if item is None:
+        return None
+    for key in ('pk', 'sk', 'entity'):
+        item.pop(key)
+    return _plain(item)
+
+
+def list_images(limit, cursor=None, image_format=None):
+    query = {
+        'IndexName': LISTING_INDEX,
+        'KeyConditionExpression': Key('entity').eq(LISTING_PARTITION),
+        'ScanIndexForward': False,
+        'Limit': limit
+    }
+    if image_format:
+        query['FilterExpression'] = Attr('format').eq(image_format.upper())
+    if cursor:
+        query['ExclusiveStartKey'] = decode_cursor(cursor)
+
+    page = _table().query(**query)
+    items = [_plain({key: value for key, value in item.items() if key not in ('pk', 'sk', 'entity')})
+             for item in page['Items']]
+    return {'items': items, 'nextCursor': encode_cursor(page.get('LastEvaluatedKey'))}
+
+
+def find_similar(image_id, max_distance):
+    # Quasi-doublons : candidats partageant au moins une bande, filtrés par distance de Hamming.
+    # Au-delà de GUARANTEED_DISTANCE, la recherche reste utile mais n'est plus exhaustive.
+    image = get_image(image_id)
+    if image is None:
+        return None
+
+    table = _table()
+    candidates = {}
+    for band in phash_bands(image['phash']):
+        query = {'KeyConditionExpression': Key('pk').eq(band)}
+        while True:
+            page = table.query(**query)
+            for item in page['Items']:
+                candidates[item['imageId']] = item['phash']
+            if 'LastEvaluatedKey' not in page:
+                break
+            query['ExclusiveStartKey'] = page['LastEvaluatedKey']
+
+    candidates.pop(image_id, None)
+    similar = [
+        {'imageId': candidate, 'distance': hamming_distance(image['phash'], phash)}
+        for candidate, phash in candidates.items()
+    ]
+    return sorted((entry for entry in similar if entry['distance'] <= max_distance), key=lambda entry: entry['distance'])
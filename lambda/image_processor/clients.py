@@ -0,0 +1,17 @@
+from botocore.config import Config
+from settings import setting
+
+# Configuration commune des clients AWS, partagée par toutes les invocations d'un conteneur :
+# pool de connexions dimensionné pour les envois concurrents, keep-alive TCP pour
+# conserver les connexions entre invocations chaudes, et retries adaptatifs qui
+# limitent le débit côté client en cas de throttling plutôt que d'insister
+CLIENT_CONFIG = Config(
+    max_pool_connections=int(setting('CLIENT_MAX_POOL_CONNECTIONS', '50')),
+    retries={
+        'mode': 'adaptive',
+        'total_max_attempts': int(setting('CLIENT_MAX_ATTEMPTS', '5'))
+    },
+    tcp_keepalive=True,
+    connect_timeout=int(setting('CLIENT_CONNECT_TIMEOUT', '2')),
+    read_timeout=int(setting('CLIENT_READ_TIMEOUT', '10'))
+)
@@ -0,0 +1,113 @@
+import importlib
+import importlib.util
+from PIL import Image
+
+# AVIF est fourni par un plugin optionnel : sans lui, la négociation se replie sur WebP.
+# Sa présence est vérifiée sans l'importer, l'import n'a lieu qu'au premier encodage AVIF.
+AVIF_AVAILABLE = importlib.util.find_spec('pillow_avif') is not None
+
+# Plugins chargés à la demande, par format de sortie
+LAZY_PLUGINS = {'AVIF': 'pillow_avif'}
+
+# Formats proposés par ordre de préférence lorsque le client les accepte
+NEGOTIATED_FORMATS = (('image/avif', 'AVIF'), ('image/webp', 'WEBP'))
+
+# Sources dont le format de repli n'est pas un format de sortie : JPEG des téléphones
+# avec segment MPF (ouverts comme MPO), restitués en JPEG simple
+FALLBACK_FORMATS = {'MPO': 'JPEG'}
+
+# Compromis taille / temps d'encodage par format : 'fast' privilégie la latence,
+# 'small' les octets transférés, 'balanced' est la valeur par défaut
+ENCODE_PRESETS = {
+    'fast': {
+        'JPEG': {'quality': 80},
+        'WEBP': {'quality': 80, 'method': 2},
+        'AVIF': {'quality': 60, 'speed': 8},
+        'PNG': {'compress_level': 1},
+    },
+    'balanced': {
+        'JPEG': {'quality': 82, 'optimize': True, 'progressive': True},
+        'WEBP': {'quality': 78, 'method': 4},
+        'AVIF': {'quality': 55, 'speed': 6},
+        # optimize (toutes les stratégies zlib essayées) triple le temps d'encodage pour ~12 %
+        # d'octets en moins : réservé au preset 'small'
+        'PNG': {'compress_level': 6},
+    },
+    'small': {
+        'JPEG': {'quality': 75, 'optimize': True, 'progressive': True},
+        'WEBP': {'quality': 70, 'method': 6},
+        'AVIF': {'quality': 45, 'speed': 4},
+        'PNG': {'optimize': True, 'quantize': 256},
+    },
+}
+
+# Formats ne supportant pas la transparence
+OPAQUE_FORMATS = ('JPEG',)
+
+
+def supported_output_formats():
+    formats = ['jpeg', 'png', 'webp', 'gif', 'tiff']
+    if AVIF_AVAILABLE:
+        formats.append('avif')
+    return formats
+
+
+def accepted_types(accept):
+    # {type MIME: q} de l'en-tête Accept ; les types refusés (q=0) ou à q invalide sont ignorés
+    accepted = {}
+    for entry in (accept or '').lower().split(','):
+        mime_type, *params = [part.strip() for part in entry.split(';')]
+        quality = 1.0
+        for param in params:
+            name, _, value = param.partition('=')
+            if name.strip() == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if mime_type and quality > 0:
+            accepted[mime_type] = max(quality, accepted.get(mime_type, 0.0))
+    return accepted
+
+
+def negotiate_format(accept, fallback_format):
+    # Format moderne accepté avec la plus haute préférence (q), à égalité dans l'ordre de
+    # NEGOTIATED_FORMATS, sinon le format de repli
+    accepted = accepted_types(accept)
+    candidates = [
+        (accepted[mime_type], -rank, image_format)
+        for rank, (mime_type, image_format) in enumerate(NEGOTIATED_FORMATS)
+        if mime_type in accepted and (image_format != 'AVIF' or AVIF_AVAILABLE)
+    ]
+    if candidates:
+        return max(candidates)[2]
+    fallback_format = fallback_format.upper()
+    return FALLBACK_FORMATS.get(fallback_format, fallback_format)
+
+
+def load_plugin(image_format):
+    module = LAZY_PLUGINS.get(image_format)
+    if module is not None:
+        importlib.import_module(module)
+
+
+def encode_params(output_format, preset='balanced', quality=None):
+    params = dict(ENCODE_PRESETS[preset].get(output_format, {}))
+    if quality is not None and output_format in ('JPEG', 'WEBP', 'AVIF'):
+        params['quality'] = quality
+    return params
+
+
+def encode_image(image, output_format, buffer, preset='balanced', quality=None):
+    load_plugin(output_format)
+    params = encode_params(output_format, preset, quality)
+
+    if output_format in OPAQUE_FORMATS and image.mode not in ('RGB', 'L', 'CMYK'):
+        image = image.convert('RGB')
+
+    # PNG quantifié : palette réduite, souvent 3 à 4 fois plus léger pour les captures d'écran
+    colors = params.pop('quantize', None)
+    if colors and image.mode in ('RGB', 'RGBA'):
+        image = image.quantize(colors=colors, method=Image.Quantize.FASTOCTREE)
+
+    image.save(buffer, format=output_format, **params)
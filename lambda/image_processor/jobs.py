@@ -0,0 +1,148 @@
+import json
+import os
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+import boto3
+from boto3.dynamodb.conditions import Key
+from botocore.exceptions import ClientError
+from clients import CLIENT_CONFIG
+
+# Clients créés au premier usage : seules les routes de jobs en ont besoin,
+# les autres invocations ne paient pas leur construction au démarrage à froid
+_clients = {}
+
+# Table unique : une ligne de synthèse par job et une ligne par élément traité
+SUMMARY_ITEM_ID = 'summary'
+ITEM_PREFIX = 'item#'
+
+SQS_BATCH_SIZE = 10
+SEND_WORKERS = 16
+
+
+def _table():
+    if 'dynamodb' not in _clients:
+        _clients['dynamodb'] = boto3.resource('dynamodb', config=CLIENT_CONFIG)
+    return _clients['dynamodb'].Table(os.environ['JOBS_TABLE'])
+
+
+def _sqs():
+    if 'sqs' not in _clients:
+        _clients['sqs'] = boto3.client('sqs', config=CLIENT_CONFIG)
+    return _clients['sqs']
+
+
+def item_id(index):
+    return f"{ITEM_PREFIX}{index:06d}"
+
+
+def create_job(source_keys, renditions, ttl_days, queue_url=None):
+    job_id = uuid.uuid4().hex
+    now = int(time.time())
+
+    _table().put_item(Item={
+        'jobId': job_id,
+        'itemId': SUMMARY_ITEM_ID,
+        'total': len(source_keys),
+        'succeeded': 0,
+        'failed': 0,
+        'createdAt': now,
+        'expiresAt': now + ttl_days * 24 * 3600
+    })
+
+    messages = [
+        {
+            'Id': str(index % SQS_BATCH_SIZE),
+            'MessageBody': json.dumps({
+                'jobId': job_id,
+                'itemId': item_id(index),
+                'key': key,
+                'renditions': [spec.to_dict() for spec in renditions]
+            })
+        }
+        for index, key in enumerate(source_keys)
+    ]
+    batches = [messages[i:i + SQS_BATCH_SIZE] for i in range(0, len(messages), SQS_BATCH_SIZE)]
+
+    # Envoi parallèle par lots de 10 (limite de SendMessageBatch) ; le client est
+    # créé avant les threads, sa construction n'étant pas thread-safe
+    _sqs()
+    queue_url = queue_url or os.environ['JOBS_QUEUE_URL']
+    with ThreadPoolExecutor(max_workers=min(SEND_WORKERS, len(batches) or 1)) as executor:
+        for response in executor.map(lambda entries: _send_batch(queue_url, entries), batches):
+            if response.get('Failed'):
+                raise RuntimeError(f"Échec de l'envoi de {len(response['Failed'])} messages")
+
+    return job_id
+
+
+def _send_batch(queue_url, entries):
+    return _sqs().send_message_batch(QueueUrl=queue_url, Entries=entries)
+
+
+def forward_item(message, queue_url):
+    # Élément renvoyé tel quel vers une autre file (traitement haute mémoire)
+    _sqs().send_message(QueueUrl=queue_url, MessageBody=json.dumps(message))
+
+
+def record_item_result(job_id, item, source_key, succeeded, renditions=None, error=None):
+    # Le premier état terminal d'un élément est le seul comptabilisé,
+    # une nouvelle livraison SQS du même message ne fausse donc pas les compteurs
+    now = int(time.time())
+    table = _table()
+    try:
+        table.put_item(
+            Item={
+                'jobId': job_id,
+                'itemId': item,
+                'key': source_key,
+                'itemStatus': 'SUCCEEDED' if succeeded else 'FAILED',
+                'renditions': renditions or {},
+                'error': error,
+                'updatedAt': now
+            },
+            ConditionExpression='attribute_not_exists(itemStatus)'
+        )
+    except ClientError as e:
+        if e.response['Error']['Code'] == 'ConditionalCheckFailedException':
+            return
+        raise
+
+    table.update_item(
+        Key={'jobId': job_id, 'itemId': SUMMARY_ITEM_ID},
+        UpdateExpression='ADD #counter :one',
+        ExpressionAttributeNames={'#counter': 'succeeded' if succeeded else 'failed'},
+        ExpressionAttributeValues={':one': 1}
+    )
+
+
+def get_job(job_id, limit, cursor=None):
+    table = _table()
+    summary = table.get_item(Key={'jobId': job_id, 'itemId': SUMMARY_ITEM_ID}).get('Item')
+    if summary is None:
+        return None
+
+    query = {
+        'KeyConditionExpression': Key('jobId').eq(job_id) & Key('itemId').begins_with(ITEM_PREFIX),
+        'Limit': limit
+    }
+    if cursor:
+        query['ExclusiveStartKey'] = {'jobId': job_id, 'itemId': cursor}
+    page = table.query(**query)
+
+    total, succeeded, failed = int(summary['total']), int(summary['succeeded']), int(summary['failed'])
+    if succeeded + failed < total:
+        status = 'RUNNING'
+    else:
+        status = 'COMPLETED' if failed == 0 else 'COMPLETED_WITH_ERRORS'
+
+    return {
+        'jobId': job_id,
+        'status': status,
+        'total': total,
+        'succeeded': succeeded,
+        'failed': failed,
+        'createdAt': int(summary['createdAt']),
+        'items': page['Items'],
+        'nextCursor': page.get('LastEvaluatedKey', {}).get('itemId')
+    }
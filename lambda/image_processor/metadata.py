@@ -0,0 +1,55 @@
+from PIL import ExifTags, Image
+
+# Taille de la miniature dont sont dérivés l'empreinte perceptuelle et la couleur dominante
+SIGNATURE_SIZE = (64, 64)
+DOMINANT_COLORS = 5
+
+EXIF_IFD = 0x8769
+
+
+def extract_exif(image: Image.Image):
+    # À appeler sur l'image ouverte, avant décodage : seul l'en-tête est lu
+    exif = image.getexif()
+    details = exif.get_ifd(EXIF_IFD)
+    taken_at = details.get(ExifTags.Base.DateTimeOriginal) or exif.get(ExifTags.Base.DateTime)
+    camera = ' '.join(
+        str(value).strip('\x00 ') for value in (exif.get(ExifTags.Base.Make), exif.get(ExifTags.Base.Model)) if value
+    )
+    return {
+        'orientation': int(exif.get(ExifTags.Base.Orientation, 1)),
+        'camera': camera or None,
+        # Format EXIF « AAAA:MM:JJ HH:MM:SS » converti en ISO 8601
+        'takenAt': str(taken_at).replace(':', '-', 2).replace(' ', 'T') if taken_at else None
+    }
+
+
+def perceptual_hash(thumbnail: Image.Image) -> str:
+    # dHash 64 bits : compare chaque pixel à son voisin de droite sur une grille 9x8
+    # en niveaux de gris ; deux images proches ont une faible distance de Hamming
+    pixels = list(thumbnail.convert('L').resize((9, 8), Image.LANCZOS).getdata())
+    bits = 0
+    for row in range(8):
+        for column in range(8):
+            bits = (bits << 1) | (pixels[row * 9 + column] > pixels[row * 9 + column + 1])
+    return f'{bits:016x}'
+
+
+def dominant_color(thumbnail: Image.Image) -> str:
+    palette_image = thumbnail.convert('RGB').quantize(colors=DOMINANT_COLORS, method=Image.Quantize.FASTOCTREE)
+    _, index = max(palette_image.getcolors())
+    red, green, blue = palette_image.getpalette()[index * 3:index * 3 + 3]
+    return f'#{red:02x}{green:02x}{blue:02x}'
+
+
+def extract_signature(decoded: Image.Image):
+    # Calculée sur l'image décodée (éventuellement réduite) : le résultat ne dépend
+    # que du contenu visuel, pas de la résolution de la source
+    thumbnail = decoded.resize(SIGNATURE_SIZE, Image.BILINEAR, reducing_gap=2.0)
+    return {
+        'phash': perceptual_hash(thumbnail),
+        'dominantColor': dominant_color(thumbnail)
+    }
+
+
+def hamming_distance(first_hash: str, second_hash: str) -> int:
+    return bin(int(first_hash, 16) ^ int(second_hash, 16)).count('1')
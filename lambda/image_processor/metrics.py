@@ -0,0 +1,91 @@
+import json
+import resource
+import time
+from contextlib import contextmanager
+from settings import setting
+
+# Namespace CloudWatch des métriques du traitement d'images
+NAMESPACE = setting('METRICS_NAMESPACE', 'ImageProcessor')
+
+
+def reset_peak_memory():
+    # Ramène le pic de RSS du processus (VmHWM) au RSS courant, Linux >= 4.0 : le pic relevé
+    # en fin d'invocation est alors celui de l'invocation, pas celui de la vie du conteneur
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+    except OSError:
+        return False
+    return True
+
+
+def peak_memory_mb():
+    with open('/proc/self/status') as f:
+        for line in f:
+            if line.startswith('VmHWM:'):
+                return int(line.split()[1]) / 1024
+    return None
+
+
+class Metrics:
+    # Métriques d'une invocation, émises en une seule ligne au format
+    # CloudWatch Embedded Metric Format (EMF) : pas d'appel PutMetricData
+
+    def __init__(self):
+        self._cold_start = True
+        self.reset('Unknown')
+
+    def reset(self, operation):
+        self.operation = operation
+        self.values = {}
+        self.units = {}
+        self.properties = {}
+        self.peak_memory_reset = reset_peak_memory()
+        self.started_at = time.perf_counter()
+
+    def add(self, name, value, unit='Count'):
+        # Les valeurs d'un même nom s'additionnent (plusieurs images par invocation)
+        self.values[name] = self.values.get(name, 0) + value
+        self.units[name] = unit
+
+    def set_property(self, name, value):
+        self.properties[name] = value
+
+    @contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(f'{name}Duration', (time.perf_counter() - start) * 1000, 'Milliseconds')
+
+    def flush(self):
+        self.add('TotalDuration', (time.perf_counter() - self.started_at) * 1000, 'Milliseconds')
+        if self.peak_memory_reset:
+            self.add('MaxMemoryUsed', peak_memory_mb(), 'Megabytes')
+        else:
+            # Pic non réinitialisable : seul le maximum depuis le démarrage du conteneur est connu
+            # (ru_maxrss est exprimé en Ko sous Linux)
+            self.add('ContainerMaxMemoryUsed', resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 'Megabytes')
+        self.add('ColdStart', 1 if self._cold_start else 0)
+        self._cold_start = False
+
+        document = {
+            '_aws': {
+                'Timestamp': int(time.time() * 1000),
+                'CloudWatchMetrics': [{
+                    'Namespace': NAMESPACE,
+                    # Par opération, et agrégé toutes opérations confondues pour les alarmes
+                    'Dimensions': [['Operation'], []],
+                    'Metrics': [{'Name': name, 'Unit': self.units[name]} for name in self.values]
+                }]
+            },
+            'Operation': self.operation,
+            **self.properties,
+            **self.values
+        }
+        # Écrit directement sur stdout : une ligne JSON par invocation, extraite par CloudWatch
+        print(json.dumps(document))
+
+
+metrics = Metrics()
@@ -0,0 +1,32 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+from settings import setting
+
+# Pool partagé par le rééchantillonnage par bandes et l'encodage des renditions.
+# Des threads suffisent : Pillow libère le GIL pendant resize() et l'encodage.
+_executors = {}
+
+
+def worker_count():
+    # PARALLEL_WORKERS=1 désactive le parallélisme, 0 (défaut) suit les vCPU alloués
+    # à la fonction, qui augmentent avec la mémoire configurée (jusqu'à 6)
+    configured = int(setting('PARALLEL_WORKERS', '0'))
+    if configured > 0:
+        return configured
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def _executor():
+    if 'threads' not in _executors:
+        _executors['threads'] = ThreadPoolExecutor(max_workers=worker_count())
+    return _executors['threads']
+
+
+def parallel_map(function, items):
+    items = list(items)
+    if worker_count() <= 1 or len(items) <= 1:
+        return [function(item) for item in items]
+    return list(_executor().map(function, items))
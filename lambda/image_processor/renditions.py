@@ -0,0 +1,296 @@
+import json
+import math
+from dataclasses import dataclass, asdict
+from io import BytesIO
+from typing import Dict, List, Optional
+from PIL import Image, ImageColor
+from formats import ENCODE_PRESETS, encode_image, negotiate_format, supported_output_formats
+from parallel import parallel_map, worker_count
+
+# fill : dimensions exactes sans conserver le ratio ; contain : dans le cadre, sans agrandir ;
+# pad : contain centré sur un fond aux dimensions exactes ; cover : recadrage centré ;
+# smart : recadrage sur la zone la plus saillante (contours et entropie)
+FIT_MODES = ('fill', 'contain', 'pad', 'cover', 'smart')
+# 'auto' : format négocié via l'en-tête Accept, à défaut celui de la source
+OUTPUT_FORMATS = ('auto', *supported_output_formats())
+MAX_DIMENSION = 4096
+
+# La source est réduite au décodage tant qu'elle reste au moins REDUCING_GAP fois
+# plus grande que la plus grande rendition, le LANCZOS final préservant la qualité
+REDUCING_GAP = 2.0
+
+# Formats supportant la réduction pendant le décodage (draft) : JPEG par facteurs 1/2, 1/4, 1/8,
+# MPO compris (JPEG des téléphones avec segment MPF, ouvert par Pillow comme JpegImageFile)
+DRAFT_FORMATS = ('JPEG', 'MPO')
+
+# Au-delà de ce nombre de pixels source, le LANCZOS est découpé en bandes horizontales
+# traitées en parallèle ; chaque bande compte au moins MIN_BAND_ROWS lignes de sortie
+PARALLEL_MIN_PIXELS = 2_000_000
+MIN_BAND_ROWS = 64
+
+
+@dataclass(frozen=True)
+class RenditionSpec:
+    name: str
+    width: int
+    height: int
+    format: str = 'auto'
+    quality: Optional[int] = None
+    fit: str = 'fill'
+    preset: str = 'balanced'
+
+    def output_format(self, source_format: str, accept: Optional[str] = None) -> str:
+        if self.format == 'auto':
+            return negotiate_format(accept, source_format)
+        return self.format.upper()
+
+    def to_dict(self) -> Dict:
+        return asdict(self)
+
+
+def parse_rendition(raw: Dict) -> RenditionSpec:
+    try:
+        spec = RenditionSpec(
+            name=str(raw['name']),
+            width=int(raw['width']),
+            height=int(raw['height']),
+            format=str(raw.get('format', 'auto')).lower(),
+            quality=int(raw['quality']) if raw.get('quality') is not None else None,
+            fit=str(raw.get('fit', 'fill')).lower(),
+            preset=str(raw.get('preset', 'balanced')).lower()
+        )
+    except (KeyError, TypeError) as e:
+        raise ValueError(f"Rendition invalide {raw}: {str(e)}")
+
+    if not 0 < spec.width <= MAX_DIMENSION or not 0 < spec.height <= MAX_DIMENSION:
+        raise ValueError(f"Dimensions invalides pour la rendition '{spec.name}'")
+    if spec.fit not in FIT_MODES:
+        raise ValueError(f"Mode d'ajustement inconnu: {spec.fit}")
+    if spec.format not in OUTPUT_FORMATS:
+        raise ValueError(f"Format de sortie inconnu: {spec.format}")
+    if spec.preset not in ENCODE_PRESETS:
+        raise ValueError(f"Preset d'encodage inconnu: {spec.preset}")
+    if spec.quality is not None and not 1 <= spec.quality <= 100:
+        raise ValueError(f"Qualité invalide pour la rendition '{spec.name}'")
+    return spec
+
+
+def load_renditions(raw_json: str) -> List[RenditionSpec]:
+    return [parse_rendition(raw) for raw in json.loads(raw_json)]
+
+
+def select_renditions(configured: List[RenditionSpec], requested) -> List[RenditionSpec]:
+    # Le client peut choisir des renditions configurées par leur nom ou en décrire de nouvelles
+    if not requested:
+        return configured
+
+    by_name = {spec.name: spec for spec in configured}
+    selected = []
+    for item in requested:
+        if isinstance(item, str):
+            if item not in by_name:
+                raise ValueError(f"Rendition inconnue: {item}")
+            selected.append(by_name[item])
+        else:
+            selected.append(parse_rendition(item))
+
+    if len({spec.name for spec in selected}) != len(selected):
+        raise ValueError("Noms de renditions dupliqués")
+    return selected
+
+
+def parse_transform(query: Dict) -> RenditionSpec:
+    # Paramètres de /img/{key}?w=&h=&fmt=&q=&fit=&preset= ; une seule dimension suffit en mode contain
+    if not query.get('w') and not query.get('h'):
+        raise ValueError("Au moins un des paramètres 'w' ou 'h' est requis")
+
+    single_dimension = not (query.get('w') and query.get('h'))
+    raw = {
+        'name': 'transform',
+        'width': query.get('w') or MAX_DIMENSION,
+        'height': query.get('h') or MAX_DIMENSION,
+        'format': query.get('fmt') or 'auto',
+        'quality': query.get('q'),
+        'fit': 'contain' if single_dimension else query.get('fit', 'contain'),
+        'preset': query.get('preset') or 'balanced'
+    }
+    try:
+        return parse_rendition(raw)
+    except ValueError as e:
+        raise ValueError(f"Paramètres de transformation invalides: {str(e)}")
+
+
+def intermediate_size(source_size, spec: RenditionSpec):
+    # Taille de l'image intermédiaire (ratio de la source) à partir de laquelle
+    # la rendition est obtenue par simple recadrage ou redimensionnement final
+    source_width, source_height = source_size
+    scale_x = spec.width / source_width
+    scale_y = spec.height / source_height
+
+    if spec.fit in ('contain', 'pad'):
+        scale = min(scale_x, scale_y, 1.0)
+    else:
+        scale = max(scale_x, scale_y)
+
+    return (max(1, math.ceil(source_width * scale)), max(1, math.ceil(source_height * scale)))
+
+
+def output_size(source_size, spec: RenditionSpec):
+    # Dimensions de la rendition produite par apply_fit : seul 'contain' garde celles de
+    # l'intermédiaire (sans agrandissement), les autres ajustements donnent celles de la spec
+    if spec.fit == 'contain':
+        return intermediate_size(source_size, spec)
+    return (spec.width, spec.height)
+
+
+def resize(image: Image.Image, size, box=None) -> Image.Image:
+    # LANCZOS éventuellement découpé en bandes de lignes de sortie. Chaque bande est
+    # calculée sur l'image entière avec une box restreinte : le filtre lit les lignes
+    # voisines au-delà de la box, il n'y a donc pas de couture entre bandes (le résultat
+    # ne diffère du redimensionnement d'un bloc que par l'arrondi des coordonnées)
+    box = box or (0, 0, image.width, image.height)
+    box_size = (box[2] - box[0], box[3] - box[1])
+    bands = min(worker_count(), size[1] // MIN_BAND_ROWS)
+    if bands <= 1 or box_size == tuple(size) or box_size[0] * box_size[1] < PARALLEL_MIN_PIXELS:
+        return image.resize(size, Image.LANCZOS, box=box)
+
+    scale = (box[3] - box[1]) / size[1]
+    edges = [round(index * size[1] / bands) for index in range(bands + 1)]
+
+    def resize_band(index):
+        top, bottom = edges[index], edges[index + 1]
+        band_box = (box[0], box[1] + top * scale, box[2], box[1] + bottom * scale)
+        return image.resize((size[0], bottom - top), Image.LANCZOS, box=band_box)
+
+    output = Image.new(image.mode, size)
+    for index, band in enumerate(parallel_map(resize_band, range(bands))):
+        output.paste(band, (0, edges[index]))
+    return output
+
+
+def cover_box(size, target):
+    # Zone centrée de la source ayant le ratio de la cible (équivalent à ImageOps.fit)
+    source_width, source_height = size
+    target_ratio = target[0] / target[1]
+    if source_width / source_height > target_ratio:
+        crop_width, crop_height = source_height * target_ratio, source_height
+    else:
+        crop_width, crop_height = source_width, source_width / target_ratio
+    left = (source_width - crop_width) / 2
+    top = (source_height - crop_height) / 2
+    return (left, top, left + crop_width, top + crop_height)
+
+
+def pad(image: Image.Image, target) -> Image.Image:
+    # Fond transparent si l'image a un canal alpha, blanc sinon
+    if image.size == tuple(target):
+        return image
+    if image.mode not in ('RGB', 'RGBA', 'L', 'LA'):
+        image = image.convert('RGB')
+    color = (0,) * len(image.getbands()) if 'A' in image.getbands() else ImageColor.getcolor('white', image.mode)
+    canvas = Image.new(image.mode, target, color)
+    canvas.paste(image, ((target[0] - image.width) // 2, (target[1] - image.height) // 2))
+    return canvas
+
+
+def apply_fit(intermediate: Image.Image, spec: RenditionSpec) -> Image.Image:
+    target = (spec.width, spec.height)
+    if spec.fit == 'contain':
+        return intermediate
+    if spec.fit == 'pad':
+        return pad(intermediate, target)
+    if spec.fit == 'cover':
+        return resize(intermediate, target, cover_box(intermediate.size, target))
+    if spec.fit == 'smart':
+        # Import à la demande : NumPy n'est chargé que par les renditions qui l'utilisent
+        from smartcrop import smart_box
+
+        box = cover_box(intermediate.size, target)
+        return resize(intermediate, target, smart_box(intermediate, (box[2] - box[0], box[3] - box[1])))
+    # 'fill' : dimensions exactes, sans conserver le ratio
+    if intermediate.size == target:
+        return intermediate
+    return resize(intermediate, target)
+
+
+def decode_request(source_size, specs: List[RenditionSpec], reducing_gap=REDUCING_GAP):
+    # Plus petite taille de décodage suffisante pour toutes les renditions
+    target_width = max(intermediate_size(source_size, spec)[0] for spec in specs)
+    target_height = max(intermediate_size(source_size, spec)[1] for spec in specs)
+    return (int(target_width * reducing_gap), int(target_height * reducing_gap))
+
+
+def can_draft(image: Image.Image, requested) -> bool:
+    return image.format in DRAFT_FORMATS and image.width >= requested[0] and image.height >= requested[1]
+
+
+def decoded_pixels(image: Image.Image, specs: List[RenditionSpec], reducing_gap=REDUCING_GAP) -> int:
+    # Pixels alloués par decode_for_renditions, estimés à partir du seul en-tête :
+    # la réduction JPEG au décodage (1/2, 1/4, 1/8) évite la pleine résolution
+    if not reducing_gap:
+        return image.width * image.height
+    requested = decode_request(image.size, specs, reducing_gap)
+    if not can_draft(image, requested):
+        return image.width * image.height
+    scale = min(image.width // requested[0], image.height // requested[1])
+    factor = next(factor for factor in (8, 4, 2, 1) if scale >= factor)
+    return math.ceil(image.width / factor) * math.ceil(image.height / factor)
+
+
+def decode_for_renditions(image: Image.Image, specs: List[RenditionSpec], reducing_gap=REDUCING_GAP) -> Image.Image:
+    # Décode la source à la plus petite échelle suffisante pour toutes les renditions
+    if not reducing_gap:
+        image.load()
+        return image
+
+    requested = decode_request(image.size, specs, reducing_gap)
+
+    # draft() doit être appelé avant load() : le décodeur JPEG produit directement
+    # une image réduite, sans jamais allouer la pleine résolution
+    if can_draft(image, requested):
+        image.draft(image.mode, requested)
+    image.load()
+
+    if image.mode in ('1', 'P'):
+        converted = image.convert('RGBA' if 'transparency' in image.info else 'RGB')
+        converted.format = image.format
+        image = converted
+
+    # Pour les autres formats, réduction entière (moyenne de blocs) peu coûteuse avant le LANCZOS
+    factor = int(min(image.width / requested[0], image.height / requested[1]))
+    if factor > 1:
+        reduced = image.reduce(factor)
+        reduced.format = image.format
+        return reduced
+    return image
+
+
+def build_renditions(image: Image.Image, specs: List[RenditionSpec]) -> Dict[str, Image.Image]:
+    # Les palettes ne supportent que le rééchantillonnage NEAREST
+    if image.mode in ('1', 'P'):
+        image = image.convert('RGBA' if 'transparency' in image.info else 'RGB')
+
+    # La plus grande rendition est produite en premier, chaque intermédiaire
+    # servant de source à la suivante : la source n'est réduite qu'une seule fois
+    sizes = {spec.name: intermediate_size(image.size, spec) for spec in specs}
+    ordered = sorted(specs, key=lambda spec: sizes[spec.name][0] * sizes[spec.name][1], reverse=True)
+
+    results = {}
+    current = image
+    for spec in ordered:
+        size = sizes[spec.name]
+        source = current if size[0] <= current.width and size[1] <= current.height else image
+        intermediate = source if source.size == size else resize(source, size)
+        current = intermediate
+        results[spec.name] = apply_fit(intermediate, spec)
+
+    return results
+
+
+def encode_rendition(image: Image.Image, spec: RenditionSpec, output_format: str, output=None):
+    # output : tout objet fichier en écriture (BytesIO par défaut, ou S3StreamWriter)
+    output_buffer = output if output is not None else BytesIO()
+    encode_image(image, output_format, output_buffer, preset=spec.preset, quality=spec.quality)
+    if output is None:
+        output_buffer.seek(0)
+    return output_buffer, output_format
@@ -0,0 +1,21 @@
+import json
+import os
+
+# Réglages regroupés par la stack dans RUNTIME_CONFIG (JSON compact), décodés une seule fois
+# par conteneur. Une variable d'environnement du même nom reste prioritaire : surcharges
+# propres à une fonction (haute mémoire, tuning), exécution locale et tests
+RUNTIME_CONFIG = json.loads(os.environ.get('RUNTIME_CONFIG') or '{}')
+
+_MISSING = object()
+
+
+def setting(name, default=_MISSING):
+    # Valeur textuelle, comme os.environ : la conversion reste à l'appelant
+    if name in os.environ:
+        return os.environ[name]
+    if name in RUNTIME_CONFIG:
+        value = RUNTIME_CONFIG[name]
+        return value if isinstance(value, str) else json.dumps(value)
+    if default is _MISSING:
+        raise KeyError(name)
+    return default
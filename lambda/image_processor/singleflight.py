@@ -0,0 +1,98 @@
+import os
+import time
+import uuid
+import boto3
+from botocore.exceptions import ClientError
+from clients import CLIENT_CONFIG
+from settings import setting
+
+# Client créé au premier usage, comme pour la table des jobs
+_clients = {}
+
+# Durée de vie d'un verrou : au-delà, un verrou abandonné (invocation interrompue) est repris
+LOCK_SECONDS = int(setting('SINGLE_FLIGHT_LOCK_SECONDS', '30'))
+# Attente maximale du résultat d'une invocation concurrente avant de le calculer soi-même
+WAIT_SECONDS = float(setting('SINGLE_FLIGHT_WAIT_SECONDS', '10'))
+POLL_INTERVAL = 0.1
+MAX_POLL_INTERVAL = 0.5
+
+
+def enabled():
+    # Désactivé lorsque la fonction n'a pas de table de verrous (variantes de tuning, tests)
+    return bool(os.environ.get('LOCKS_TABLE'))
+
+
+def _table():
+    if 'dynamodb' not in _clients:
+        _clients['dynamodb'] = boto3.resource('dynamodb', config=CLIENT_CONFIG)
+    return _clients['dynamodb'].Table(os.environ['LOCKS_TABLE'])
+
+
+def acquire(lock_key, seconds=LOCK_SECONDS):
+    # Écriture conditionnelle : renvoie le jeton du verrou, ou None s'il est détenu ailleurs
+    token = uuid.uuid4().hex
+    now = int(time.time())
+    try:
+        _table().put_item(
+            Item={'lockKey': lock_key, 'token': token, 'expiresAt': now + seconds},
+            ConditionExpression='attribute_not_exists(lockKey) OR expiresAt < :now',
+            ExpressionAttributeValues={':now': now}
+        )
+    except ClientError as e:
+        if e.response['Error']['Code'] == 'ConditionalCheckFailedException':
+            return None
+        raise
+    return token
+
+
+def release(lock_key, token):
+    # Seul le détenteur libère le verrou : s'il a expiré et été repris, il n'est pas touché
+    try:
+        _table().delete_item(
+            Key={'lockKey': lock_key},
+            ConditionExpression='#token = :token',
+            ExpressionAttributeNames={'#token': 'token'},
+            ExpressionAttributeValues={':token': token}
+        )
+    except ClientError as e:
+        if e.response['Error']['Code'] != 'ConditionalCheckFailedException':
+            raise
+
+
+def wait_for(lookup, timeout=WAIT_SECONDS):
+    # Interroge lookup() jusqu'à obtenir un résultat, None si l'attente expire
+    deadline = time.monotonic() + timeout
+    interval = POLL_INTERVAL
+    while True:
+        result = lookup()
+        if result is not None or time.monotonic() >= deadline:
+            return result
+        time.sleep(min(interval, max(0.0, deadline - time.monotonic())))
+        interval = min(interval * 2, MAX_POLL_INTERVAL)
+
+
+class SingleFlight:
+    # Une seule invocation calcule un résultat donné ; les autres attendent qu'il soit publié.
+    #
+    #   with SingleFlight(key) as flight:
+    #       result = None if flight.leader else flight.wait(lookup)
+    #       if result is None:
+    #           result = compute()
+    def __init__(self, lock_key):
+        self.lock_key = lock_key
+        self.token = None
+        self.leader = True
+
+    def __enter__(self):
+        if enabled():
+            self.token = acquire(self.lock_key)
+            self.leader = self.token is not None
+        return self
+
+    def wait(self, lookup):
+        return wait_for(lookup)
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if self.token is not None:
+            release(self.lock_key, self.token)
+        return False
@@ -0,0 +1,72 @@
+import numpy as np
+from PIL import Image
+
+# Le score de saillance est calculé sur une miniature de PROXY_SIZE pixels de côté :
+# son coût ne dépend pas de la résolution de l'image recadrée
+PROXY_SIZE = 128
+
+# Entropie locale : histogramme de ENTROPY_LEVELS niveaux de gris par bloc de ENTROPY_BLOCK pixels
+ENTROPY_BLOCK = 8
+ENTROPY_LEVELS = 16
+
+# Départage les fenêtres de score équivalent (image uniforme) au profit du centre
+CENTER_BIAS = 0.01
+
+
+def saliency_map(proxy: Image.Image) -> np.ndarray:
+    # Somme des contours (gradient de luminance) et de l'entropie locale, normalisés entre 0 et 1
+    pixels = np.asarray(proxy.convert('L'), dtype=np.float32)
+    height, width = pixels.shape
+
+    edges = np.zeros_like(pixels)
+    edges[:, 1:] += np.abs(np.diff(pixels, axis=1))
+    edges[1:, :] += np.abs(np.diff(pixels, axis=0))
+    edges /= max(float(edges.max()), 1.0)
+
+    block = ENTROPY_BLOCK
+    rows, columns = max(1, height // block), max(1, width // block)
+    cells = pixels[:rows * block, :columns * block].astype(np.int64) * ENTROPY_LEVELS // 256
+    cells = cells.reshape(rows, min(block, height), columns, min(block, width)).transpose(0, 2, 1, 3)
+    cells = cells.reshape(rows, columns, -1)
+    histogram = (cells[..., None] == np.arange(ENTROPY_LEVELS)).mean(axis=2)
+    logs = np.log2(histogram, out=np.zeros_like(histogram), where=histogram > 0)
+    entropy = -(histogram * logs).sum(axis=2) / np.log2(ENTROPY_LEVELS)
+
+    # Bloc -> pixels ; les bords non couverts par un bloc complet reprennent le dernier bloc
+    entropy = np.repeat(np.repeat(entropy, block, axis=0), block, axis=1)
+    entropy = np.pad(entropy, ((0, max(0, height - entropy.shape[0])), (0, max(0, width - entropy.shape[1]))),
+                     mode='edge')[:height, :width]
+    return edges + entropy
+
+
+def best_offset(profile: np.ndarray, window: int) -> int:
+    # Position de la fenêtre de longueur window maximisant la somme du profil (sommes cumulées)
+    window = min(max(window, 1), len(profile))
+    cumulative = np.concatenate(([0.0], np.cumsum(profile, dtype=np.float64)))
+    scores = cumulative[window:] - cumulative[:-window]
+    if len(scores) > 1:
+        center = (len(scores) - 1) / 2
+        scores = scores + CENTER_BIAS * (scores.max() or 1.0) * (1 - np.abs(np.arange(len(scores)) - center) / center)
+    return int(np.argmax(scores))
+
+
+def smart_box(image: Image.Image, crop_size):
+    # Zone de crop_size pixels (ratio de la rendition) la plus saillante de l'image.
+    # Recherchée sur la miniature puis ramenée aux coordonnées de l'image complète ;
+    # l'image couvrant la cible, la fenêtre ne glisse que le long d'un seul axe.
+    crop_width, crop_height = crop_size
+    scale = min(1.0, PROXY_SIZE / max(image.size))
+    proxy_size = (max(1, round(image.width * scale)), max(1, round(image.height * scale)))
+    proxy = image.resize(proxy_size, Image.BILINEAR, reducing_gap=2.0)
+    saliency = saliency_map(proxy)
+
+    left, top = 0.0, 0.0
+    if crop_width < image.width:
+        ratio = proxy_size[0] / image.width
+        offset = best_offset(saliency.sum(axis=0), round(crop_width * ratio))
+        left = min(offset / ratio, image.width - crop_width)
+    if crop_height < image.height:
+        ratio = proxy_size[1] / image.height
+        offset = best_offset(saliency.sum(axis=1), round(crop_height * ratio))
+        top = min(offset / ratio, image.height - crop_height)
+    return (left, top, left + crop_width, top + crop_height)
@@ -0,0 +1,351 @@
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from datetime import datetime, timezone
+from concurrent.futures import Future, ThreadPoolExecutor
+import boto3
+from botocore.exceptions import ClientError
+from clients import CLIENT_CONFIG
+from settings import setting
+
+# Client créé au premier usage : sa construction pèse sur l'import du handler
+_clients = {}
+
+logger = logging.getLogger(__name__)
+
+# Préfixe des objets déposés directement par le client dans le bucket d'ingestion
+UPLOAD_PREFIX = 'uploads/'
+
+# Manifestes des renditions produites pour chaque upload direct
+MANIFEST_PREFIX = 'manifests/'
+
+# Sources reçues par l'API et confiées au traitement haute mémoire (hors de UPLOAD_PREFIX :
+# leur dépôt ne déclenche pas de notification)
+DEFERRED_PREFIX = 'deferred/'
+
+# Au-delà de ce seuil l'image téléchargée est déversée sur /tmp au lieu de rester en mémoire
+SPOOL_MAX_MEMORY = 16 * 1024 * 1024
+STREAM_CHUNK_SIZE = 1024 * 1024
+
+# Upload multipart des renditions : 5 Mo minimum imposé par S3 (sauf la dernière partie)
+MULTIPART_PART_SIZE = 8 * 1024 * 1024
+MAX_INFLIGHT_PARTS = 4
+UPLOAD_WORKERS = 8
+
+# URLs présignées réutilisées entre invocations chaudes tant qu'elles ont moins de
+# PRESIGNED_URL_CACHE_SECONDS : le client dispose toujours d'au moins
+# PRESIGNED_URL_EXPIRATION - PRESIGNED_URL_CACHE_SECONDS de validité
+PRESIGNED_URL_EXPIRATION = int(setting('PRESIGNED_URL_EXPIRATION', '3600'))
+PRESIGNED_URL_CACHE_SECONDS = int(setting('PRESIGNED_URL_CACHE_SECONDS', '300'))
+PRESIGNED_URL_CACHE_SIZE = 4096
+
+_presigned_urls = OrderedDict()
+_presigned_urls_lock = threading.Lock()
+
+# Âge à partir duquel une rendition lue est réécrite pour repousser son expiration
+# (RENDITION_TOUCH_DAYS=0 désactive le rafraîchissement)
+TOUCH_AFTER_SECONDS = int(setting('RENDITION_TOUCH_DAYS', '30')) * 86400
+
+CONTENT_TYPE_EXTENSIONS = {
+    'image/jpeg': 'jpeg',
+    'image/png': 'png',
+    'image/gif': 'gif',
+    'image/webp': 'webp',
+    'image/tiff': 'tiff',
+}
+
+
+def _s3():
+    if 's3' not in _clients:
+        _clients['s3'] = boto3.client('s3', config=CLIENT_CONFIG)
+    return _clients['s3']
+
+
+def create_upload_ticket(bucket_name, content_type, max_bytes, expires_in):
+    # Le client envoie l'image directement sur S3 via un POST présigné,
+    # la taille et le type de contenu sont imposés par la politique signée
+    extension = CONTENT_TYPE_EXTENSIONS[content_type]
+    upload_id = uuid.uuid4().hex
+    key = f"{UPLOAD_PREFIX}{upload_id}.{extension}"
+
+    post = _s3().generate_presigned_post(
+        Bucket=bucket_name,
+        Key=key,
+        Fields={'Content-Type': content_type},
+        Conditions=[
+            {'Content-Type': content_type},
+            ['content-length-range', 1, max_bytes]
+        ],
+        ExpiresIn=expires_in
+    )
+    return upload_id, key, post
+
+
+def manifest_key_for_upload(upload_key):
+    # uploads/<id>.<ext> -> manifests/<id>.json
+    file_name = os.path.basename(upload_key)
+    return f"{MANIFEST_PREFIX}{os.path.splitext(file_name)[0]}.json"
+
+
+def download_to_spool(bucket_name, key):
+    # Lecture en flux de l'objet : une seule copie de l'image, en mémoire
+    # pour les petits fichiers et sur disque au-delà de SPOOL_MAX_MEMORY.
+    # L'empreinte SHA-256 de la source est calculée au fil de la lecture.
+    try:
+        response = _s3().get_object(Bucket=bucket_name, Key=key)
+    except ClientError as e:
+        if e.response['Error']['Code'] in ('404', 'NoSuchKey', 'NotFound'):
+            raise FileNotFoundError(f"Objet introuvable: {key}")
+        raise
+    spool = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_MEMORY)
+    digest = hashlib.sha256()
+    for chunk in response['Body'].iter_chunks(chunk_size=STREAM_CHUNK_SIZE):
+        digest.update(chunk)
+        spool.write(chunk)
+    spool.seek(0)
+    return spool, digest.hexdigest()
+
+
+def head_image(bucket_name, key):
+    try:
+        response = _s3().head_object(Bucket=bucket_name, Key=key)
+    except ClientError as e:
+        if e.response['Error']['Code'] in ('404', 'NoSuchKey', 'NotFound'):
+            return None
+        raise
+    return _object_info(response)
+
+
+def _object_info(response):
+    return {
+        'bytes': response['ContentLength'],
+        'etag': response['ETag'].strip('"'),
+        'metadata': response.get('Metadata', {}),
+        'content_type': response.get('ContentType'),
+        'last_modified': response['LastModified']
+    }
+
+
+def read_image(bucket_name, key):
+    try:
+        return _s3().get_object(Bucket=bucket_name, Key=key)['Body'].read()
+    except ClientError as e:
+        if e.response['Error']['Code'] in ('404', 'NoSuchKey', 'NotFound'):
+            return None
+        raise
+
+
+def read_object(bucket_name, key):
+    # Contenu et métadonnées de l'objet en une seule requête, None s'il n'existe pas
+    try:
+        response = _s3().get_object(Bucket=bucket_name, Key=key)
+    except ClientError as e:
+        if e.response['Error']['Code'] in ('404', 'NoSuchKey', 'NotFound'):
+            return None
+        raise
+    return response['Body'].read(), _object_info(response)
+
+
+def touch_if_stale(bucket_name, key, head):
+    # L'expiration du cycle de vie S3 se compte depuis la dernière écriture, pas la dernière
+    # lecture : une rendition encore servie est réécrite sur elle-même (copie côté serveur,
+    # sans transfert) au plus une fois tous les RENDITION_TOUCH_DAYS pour ne pas expirer.
+    # Un échec est sans conséquence : l'objet sera au pire régénéré après expiration.
+    if not TOUCH_AFTER_SECONDS:
+        return False
+    age = datetime.now(timezone.utc) - head['last_modified']
+    if age.total_seconds() < TOUCH_AFTER_SECONDS:
+        return False
+    try:
+        params = {'ContentType': head['content_type']} if head.get('content_type') else {}
+        _s3().copy_object(
+            Bucket=bucket_name,
+            Key=key,
+            CopySource={'Bucket': bucket_name, 'Key': key},
+            Metadata=head['metadata'],
+            MetadataDirective='REPLACE',
+            **params
+        )
+    except ClientError as e:
+        logger.warning(f"Rafraîchissement de {key} impossible: {str(e)}")
+        return False
+    return True
+
+
+def format_for_key(key):
+    # Format Pillow déduit de l'extension (uploads/<id>.<ext>)
+    extension = os.path.splitext(key)[1].lstrip('.').lower()
+    extension = 'jpeg' if extension == 'jpg' else extension
+    if extension not in CONTENT_TYPE_EXTENSIONS.values():
+        raise ValueError(f"Extension non supportée: {key}")
+    return extension.upper()
+
+
+class S3StreamWriter:
+    # Fichier en écriture seule pour Pillow : la sortie de l'encodeur est découpée en
+    # parties envoyées en multipart pendant que l'encodage continue. Les blocs reçus
+    # sont conservés par référence (tranches de memoryview, sans copie) et assemblés
+    # une seule fois par partie ; au plus MAX_INFLIGHT_PARTS parties restent en mémoire.
+    # Une sortie plus petite qu'une partie est envoyée en un seul put_object.
+
+    def __init__(self, bucket_name, key, image_format, executor, metadata=None, part_size=MULTIPART_PART_SIZE):
+        self.bucket_name = bucket_name
+        self.key = key
+        self.content_type = f'image/{image_format.lower()}'
+        self.metadata = metadata or {}
+        self.executor = executor
+        self.part_size = part_size
+        self.upload_id = None
+        self.parts = []
+        self.chunks = []
+        self.buffered = 0
+        self.position = 0
+        self.body = None
+        self.future = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+    def write(self, data):
+        # Seuls les bytes, immuables, peuvent être conservés par référence
+        view = memoryview(data if isinstance(data, bytes) else bytes(data)).cast('B')
+        written = len(view)
+        while view:
+            size = min(len(view), self.part_size - self.buffered)
+            self.chunks.append(view[:size])
+            self.buffered += size
+            view = view[size:]
+            if self.buffered == self.part_size:
+                self._upload_part()
+        self.position += written
+        return written
+
+    def tell(self):
+        return self.position
+
+    def flush(self):
+        pass
+
+    def _take_chunks(self):
+        body = b''.join(self.chunks)
+        self.chunks = []
+        self.buffered = 0
+        return body
+
+    def _upload_part(self):
+        if self.upload_id is None:
+            self.upload_id = _s3().create_multipart_upload(
+                Bucket=self.bucket_name, Key=self.key, ContentType=self.content_type, Metadata=self.metadata
+            )['UploadId']
+
+        # Borne la mémoire : on attend la plus ancienne partie encore en vol
+        in_flight = [future for _, future in self.parts if not future.done()]
+        if len(in_flight) >= MAX_INFLIGHT_PARTS:
+            in_flight[0].result()
+
+        part_number = len(self.parts) + 1
+        self.parts.append((part_number, self.executor.submit(
+            _s3().upload_part, Bucket=self.bucket_name, Key=self.key, UploadId=self.upload_id,
+            PartNumber=part_number, Body=self._take_chunks()
+        )))
+
+    def getvalue(self):
+        # Contenu encodé, uniquement disponible s'il tient dans une seule partie
+        if self.upload_id is not None:
+            return None
+        if self.body is None:
+            self.body = self._take_chunks()
+        return self.body
+
+    def close(self):
+        if self.future is not None:
+            return self.future
+
+        if self.upload_id is None:
+            self.future = self.executor.submit(
+                _s3().put_object, Bucket=self.bucket_name, Key=self.key, Body=self.getvalue(),
+                ContentType=self.content_type, Metadata=self.metadata
+            )
+            return self.future
+
+        if self.buffered:
+            self._upload_part()
+        # Les parties sont déjà en vol : la finalisation se fait dans le thread appelant
+        # pour ne pas bloquer un thread du pool en attente d'autres tâches du même pool
+        try:
+            parts = [{'PartNumber': number, 'ETag': future.result()['ETag']} for number, future in self.parts]
+            _s3().complete_multipart_upload(
+                Bucket=self.bucket_name, Key=self.key, UploadId=self.upload_id,
+                MultipartUpload={'Parts': parts}
+            )
+        except Exception:
+            self.abort()
+            raise
+        self.future = Future()
+        self.future.set_result(None)
+        return self.future
+
+    def abort(self):
+        self.chunks = []
+        if self.upload_id is not None:
+            # Les parties en cours d'envoi doivent être terminées pour que l'abandon soit complet
+            for _, future in self.parts:
+                if not future.cancel():
+                    future.exception()
+            _s3().abort_multipart_upload(Bucket=self.bucket_name, Key=self.key, UploadId=self.upload_id)
+            self.upload_id = None
+
+
+def upload_executor():
+    return ThreadPoolExecutor(max_workers=UPLOAD_WORKERS)
+
+
+def upload_source(bucket_name, source_hash, data):
+    key = f"{DEFERRED_PREFIX}{source_hash}"
+    _s3().put_object(Bucket=bucket_name, Key=key, Body=data)
+    return key
+
+
+def upload_manifest(bucket_name, key, manifest):
+    _s3().put_object(
+        Bucket=bucket_name,
+        Key=key,
+        Body=json.dumps(manifest).encode(),
+        ContentType='application/json'
+    )
+
+
+def presigned_get_url(bucket_name, key, expires_in=PRESIGNED_URL_EXPIRATION):
+    # Les renditions sont immuables (clés adressées par contenu) : une URL signée
+    # récemment reste valable et évite de refaire la signature à chaque requête
+    entry = (bucket_name, key, expires_in)
+    now = time.monotonic()
+    with _presigned_urls_lock:
+        cached = _presigned_urls.get(entry)
+        if cached and now - cached[1] < min(PRESIGNED_URL_CACHE_SECONDS, expires_in / 2):
+            _presigned_urls.move_to_end(entry)
+            return cached[0]
+
+    url = _s3().generate_presigned_url(
+        'get_object',
+        Params={'Bucket': bucket_name, 'Key': key},
+        ExpiresIn=expires_in
+    )
+    with _presigned_urls_lock:
+        _presigned_urls[entry] = (url, now)
+        _presigned_urls.move_to_end(entry)
+        while len(_presigned_urls) > PRESIGNED_URL_CACHE_SIZE:
+            _presigned_urls.popitem(last=False)
+    return url
@@ -6,10 +6,11 @@ from aws_cdk import (
 )
 from aws_cdk.aws_apigatewayv2_integrations import HttpLambdaIntegration
 from constructs import Construct
+from config import Config
 
 
 class ApiGatewayStack(Stack):
-    def __init__(self, scope: Construct, construct_id: str, image_processor_lambda: lambda_.Function, **kwargs) -> None:
+    def __init__(self, scope: Construct, construct_id: str, image_processor_lambda: lambda_.IFunction, **kwargs) -> None:
         super().__init__(scope, construct_id, **kwargs)
 
         lambda_integration = HttpLambdaIntegration(
@@ -26,12 +27,76 @@ class ApiGatewayStack(Stack):
             )
         )
 
-        http_api.add_routes(
+        resize_routes = http_api.add_routes(
             path="/resize-image",
             methods=[apigatewayv2.HttpMethod.POST],
             integration=lambda_integration
         )
 
+        # Ticket d'upload : POST présigné vers le bucket d'ingestion
+        http_api.add_routes(
+            path="/upload-ticket",
+            methods=[apigatewayv2.HttpMethod.POST],
+            integration=lambda_integration
+        )
+
+        # Jobs de traitement par lot (SQS) et suivi de leur avancement
+        http_api.add_routes(
+            path="/jobs",
+            methods=[apigatewayv2.HttpMethod.POST],
+            integration=lambda_integration
+        )
+
+        http_api.add_routes(
+            path="/jobs/{jobId}",
+            methods=[apigatewayv2.HttpMethod.GET],
+            integration=lambda_integration
+        )
+
+        # Transformation à la volée, servie derrière CloudFront (qui relaie aussi les HEAD)
+        http_api.add_routes(
+            path="/img/{key+}",
+            methods=[apigatewayv2.HttpMethod.GET, apigatewayv2.HttpMethod.HEAD],
+            integration=lambda_integration
+        )
+
+        # Catalogue des images : liste paginée, fiche et quasi-doublons
+        http_api.add_routes(
+            path="/images",
+            methods=[apigatewayv2.HttpMethod.GET],
+            integration=lambda_integration
+        )
+
+        http_api.add_routes(
+            path="/images/{imageId}",
+            methods=[apigatewayv2.HttpMethod.GET],
+            integration=lambda_integration
+        )
+
+        http_api.add_routes(
+            path="/images/{imageId}/similar",
+            methods=[apigatewayv2.HttpMethod.GET],
+            integration=lambda_integration
+        )
+
+        # Limitation de débit de l'étape par défaut : HttpApi n'expose pas de réglage de
+        # throttling, appliqué sur la CfnStage. Le redimensionnement synchrone, le plus
+        # coûteux, a sa propre limite pour ne pas priver les autres routes de concurrence
+        default_stage = http_api.default_stage.node.default_child
+        default_stage.default_route_settings = apigatewayv2.CfnStage.RouteSettingsProperty(
+            throttling_rate_limit=Config.get_api_throttle_rate_limit(),
+            throttling_burst_limit=Config.get_api_throttle_burst_limit()
+        )
+        default_stage.route_settings = {
+            "POST /resize-image": {
+                "ThrottlingRateLimit": Config.get_resize_throttle_rate_limit(),
+                "ThrottlingBurstLimit": Config.get_resize_throttle_burst_limit()
+            }
+        }
+        # Les réglages d'une route ne peuvent être appliqués qu'une fois celle-ci créée
+        for route in resize_routes:
+            default_stage.node.add_dependency(route)
+
         CfnOutput(
             self, "HttpApiUrl",
             value=http_api.default_stage.url,
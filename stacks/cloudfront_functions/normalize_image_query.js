@@ -0,0 +1,93 @@
+// Normalise la query string des transformations d'image avant le calcul de la clé de cache :
+// paramètres inconnus supprimés, valeurs mises en minuscules et tailles arrondies au pas configuré.
+// Sans fmt explicite, le format est déduit de l'en-tête Accept pour entrer dans la clé de cache.
+var SIZE_STEP = __SIZE_STEP__;
+var MAX_DIMENSION = __MAX_DIMENSION__;
+var FORMATS = ['jpeg', 'png', 'webp', 'gif', 'tiff', 'avif'];
+var FITS = ['fill', 'contain', 'pad', 'cover', 'smart'];
+var PRESETS = ['fast', 'balanced', 'small'];
+
+// Préférence (q) de chaque type de l'en-tête Accept ; q=0 signifie refusé
+function acceptedTypes(accept) {
+    var accepted = {};
+    accept.split(',').forEach(function (entry) {
+        var parts = entry.split(';');
+        var type = parts[0].trim();
+        var quality = 1;
+        for (var i = 1; i < parts.length; i++) {
+            var param = parts[i].split('=');
+            if (param[0].trim() === 'q') {
+                quality = parseFloat(param[1]);
+                if (isNaN(quality)) {
+                    quality = 0;
+                }
+            }
+        }
+        if (type && quality > 0 && quality > (accepted[type] || 0)) {
+            accepted[type] = quality;
+        }
+    });
+    return accepted;
+}
+
+// Même choix que la Lambda : préférence la plus haute, AVIF puis WebP à égalité
+function negotiateFormat(headers) {
+    var accepted = acceptedTypes(headers.accept ? headers.accept.value.toLowerCase() : '');
+    var avif = accepted['image/avif'] || 0;
+    var webp = accepted['image/webp'] || 0;
+    if (avif > 0 && avif >= webp) {
+        return 'avif';
+    }
+    if (webp > 0) {
+        return 'webp';
+    }
+    return null;
+}
+
+function normalizeSize(value) {
+    var size = parseInt(value, 10);
+    if (isNaN(size) || size <= 0) {
+        return null;
+    }
+    size = Math.ceil(size / SIZE_STEP) * SIZE_STEP;
+    return String(Math.min(size, MAX_DIMENSION));
+}
+
+function handler(event) {
+    var request = event.request;
+    var query = request.querystring;
+    var normalized = {};
+
+    ['w', 'h'].forEach(function (name) {
+        if (query[name]) {
+            var size = normalizeSize(query[name].value);
+            if (size) {
+                normalized[name] = { value: size };
+            }
+        }
+    });
+
+    if (query.fmt && FORMATS.indexOf(query.fmt.value.toLowerCase()) !== -1) {
+        normalized.fmt = { value: query.fmt.value.toLowerCase() };
+    } else {
+        var negotiated = negotiateFormat(request.headers);
+        if (negotiated) {
+            normalized.fmt = { value: negotiated };
+        }
+    }
+    if (query.preset && PRESETS.indexOf(query.preset.value.toLowerCase()) !== -1) {
+        normalized.preset = { value: query.preset.value.toLowerCase() };
+    }
+    if (query.fit && FITS.indexOf(query.fit.value.toLowerCase()) !== -1) {
+        normalized.fit = { value: query.fit.value.toLowerCase() };
+    }
+    if (query.q) {
+        var quality = parseInt(query.q.value, 10);
+        if (!isNaN(quality)) {
+            normalized.q = { value: String(Math.max(1, Math.min(quality, 100))) };
+        }
+    }
+
+    request.querystring = normalized;
+    return request;
+}
@@ -0,0 +1,130 @@
+"""Publie le build React dans le bucket du site et invalide uniquement ce qui a changé.
+
+Exécuté par le projet CodeBuild de FrontStack après `npm run build` :
+
+    python3 deploy_site.py build/ --bucket <bucket> --distribution-id <id>
+
+Les assets dont le nom contient une empreinte de contenu (static/js/main.3f2a1c9b.js)
+sont immuables : envoyés une seule fois avec un Cache-Control d'un an, ils ne sont
+jamais invalidés. Les autres fichiers (index.html, manifest.json, ...) ont une durée
+de cache courte et seuls ceux dont le contenu a changé depuis le déploiement précédent
+sont envoyés puis invalidés, d'après le manifeste des empreintes stocké dans le bucket.
+
+Seule la CLI AWS de l'image CodeBuild est utilisée (pas de dépendance à installer).
+"""
+import argparse
+import hashlib
+import json
+import os
+import re
+import subprocess
+import tempfile
+
+MANIFEST_KEY = ".deploy-manifest.json"
+
+# Nommage des builds create-react-app / webpack : <nom>.<empreinte>[.chunk].<ext>
+HASHED_ASSET = re.compile(r"(^|/)static/.+\.[0-9a-f]{8,}(\.chunk)?\.[a-z0-9]+$")
+
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+SHORT_CACHE_CONTROL = "public, max-age=60, must-revalidate"
+
+# Au-delà, une invalidation globale coûte moins cher que la liste des chemins
+MAX_INVALIDATION_PATHS = 50
+
+
+def aws(*args, capture=False):
+    result = subprocess.run(["aws", *args], check=True, text=True, capture_output=capture)
+    return result.stdout if capture else None
+
+
+def file_hashes(build_dir):
+    hashes = {}
+    for root, _, files in os.walk(build_dir):
+        for name in files:
+            path = os.path.join(root, name)
+            with open(path, "rb") as f:
+                hashes[os.path.relpath(path, build_dir).replace(os.sep, "/")] = hashlib.md5(f.read()).hexdigest()
+    return hashes
+
+
+def load_manifest(bucket):
+    # Premier déploiement : aucun manifeste, tous les fichiers sont considérés comme nouveaux
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "manifest.json")
+        try:
+            aws("s3", "cp", f"s3://{bucket}/{MANIFEST_KEY}", path, "--only-show-errors", capture=True)
+        except subprocess.CalledProcessError:
+            return {"files": {}, "previous": {}}
+        with open(path) as f:
+            return json.load(f)
+
+
+def plan(current, manifest):
+    # Fichiers à envoyer, à supprimer, et chemins à invalider
+    deployed = manifest.get("files", {})
+    changed = sorted(path for path, digest in current.items() if deployed.get(path) != digest)
+
+    # Les assets immuables de la version précédente restent servis aux clients qui
+    # ont encore l'ancien index.html ; ils sont supprimés au déploiement suivant
+    retained = set(current) | {path for path in deployed if HASHED_ASSET.search(path)}
+    removed = sorted(
+        path for path in set(deployed) | set(manifest.get("previous", {}))
+        if path not in retained
+    )
+
+    # Sans manifeste (premier déploiement par ce script), les fichiers non immuables
+    # ont pu être mis en cache sans Cache-Control : ils sont tous invalidés
+    invalidations = []
+    for path in changed + removed:
+        if HASHED_ASSET.search(path) or (deployed and path not in deployed):
+            continue
+        invalidations.append(f"/{path}")
+        # index.html est aussi servi à la racine (default_root_object)
+        if path == "index.html":
+            invalidations.append("/")
+    return changed, removed, sorted(invalidations)
+
+
+def invalidation_paths(invalidations):
+    # Chemins passés à create-invalidation : la liste, ou une invalidation globale au-delà du seuil
+    return invalidations if len(invalidations) <= MAX_INVALIDATION_PATHS else ["/*"]
+
+
+def upload(build_dir, bucket, paths):
+    hashed = [path for path in paths if HASHED_ASSET.search(path)]
+    others = [path for path in paths if not HASHED_ASSET.search(path)]
+    # Assets immuables d'abord, index.html en dernier : il ne référence jamais un asset absent
+    for path in hashed + sorted(others, key=lambda path: path == "index.html"):
+        cache_control = IMMUTABLE_CACHE_CONTROL if path in hashed else SHORT_CACHE_CONTROL
+        aws("s3", "cp", os.path.join(build_dir, path), f"s3://{bucket}/{path}",
+            "--cache-control", cache_control, "--only-show-errors")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("build_dir")
+    parser.add_argument("--bucket", required=True)
+    parser.add_argument("--distribution-id", required=True)
+    args = parser.parse_args()
+
+    current = file_hashes(args.build_dir)
+    manifest = load_manifest(args.bucket)
+    changed, removed, invalidations = plan(current, manifest)
+    print(f"{len(changed)} fichiers modifiés, {len(removed)} supprimés, {len(invalidations)} chemins à invalider")
+
+    upload(args.build_dir, args.bucket, changed)
+    for path in removed:
+        aws("s3", "rm", f"s3://{args.bucket}/{path}", "--only-show-errors")
+
+    with tempfile.NamedTemporaryFile("w", suffix=".json", delete=False) as f:
+        json.dump({"files": current, "previous": manifest.get("files", {})}, f)
+    aws("s3", "cp", f.name, f"s3://{args.bucket}/{MANIFEST_KEY}", "--cache-control", "no-store", "--only-show-errors")
+    os.unlink(f.name)
+
+    if invalidations:
+        aws("cloudfront", "create-invalidation", "--distribution-id", args.distribution_id,
+            "--paths", *invalidation_paths(invalidations))
+
+
+if __name__ == "__main__":
+    main()
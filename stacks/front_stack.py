@@ -4,18 +4,26 @@ from aws_cdk import (
     aws_codepipeline as codepipeline,
     aws_codepipeline_actions as codepipeline_actions,
     aws_s3 as s3,
+    aws_s3_assets as s3_assets,
     aws_cloudfront as cloudfront,
     aws_cloudfront_origins as origins,
     aws_route53 as route53,
     aws_route53_targets as route53_targets,
     aws_iam as iam,
     aws_certificatemanager as acm,
+    Duration,
+    Fn,
     RemovalPolicy,
     SecretValue,
     CfnOutput
 )
 from constructs import Construct
 from config import Config
+import os
+
+CLOUDFRONT_FUNCTIONS_DIR = os.path.join(os.path.dirname(__file__), "cloudfront_functions")
+FRONT_DEPLOY_SCRIPT = os.path.join(os.path.dirname(__file__), "front_deploy", "deploy_site.py")
+MAX_IMAGE_DIMENSION = 4096
 
 
 class FrontStack(Stack):
@@ -68,6 +76,41 @@ class FrontStack(Stack):
             )
         )
 
+        # Origine API Gateway pour les transformations d'image à la volée (/img/{key})
+        # api_url est de la forme https://<id>.execute-api.<region>.amazonaws.com/
+        image_api_origin = origins.HttpOrigin(
+            Fn.select(2, Fn.split("/", api_url)),
+            protocol_policy=cloudfront.OriginProtocolPolicy.HTTPS_ONLY
+        )
+
+        # Seuls les paramètres de transformation composent la clé de cache
+        image_cache_policy = cloudfront.CachePolicy(
+            self, "ImageTransformCachePolicy",
+            comment="Cache des transformations d'image par paramètres normalisés",
+            query_string_behavior=cloudfront.CacheQueryStringBehavior.allow_list("w", "h", "fmt", "q", "fit", "preset"),
+            header_behavior=cloudfront.CacheHeaderBehavior.none(),
+            cookie_behavior=cloudfront.CacheCookieBehavior.none(),
+            default_ttl=Duration.days(30),
+            min_ttl=Duration.seconds(0),
+            max_ttl=Duration.days(365),
+            enable_accept_encoding_gzip=False,
+            enable_accept_encoding_brotli=False
+        )
+
+        # Normalisation de la query string avant le calcul de la clé de cache
+        with open(os.path.join(CLOUDFRONT_FUNCTIONS_DIR, "normalize_image_query.js")) as f:
+            normalize_code = (
+                f.read()
+                .replace("__SIZE_STEP__", str(Config.get_image_size_step()))
+                .replace("__MAX_DIMENSION__", str(MAX_IMAGE_DIMENSION))
+            )
+        normalize_image_query = cloudfront.Function(
+            self, "NormalizeImageQueryFunction",
+            code=cloudfront.FunctionCode.from_inline(normalize_code),
+            runtime=cloudfront.FunctionRuntime.JS_2_0,
+            comment="Normalise les paramètres de transformation d'image"
+        )
+
         # Création de la distribution CloudFront
         distribution = cloudfront.Distribution(
             self, "WebsiteDistribution",
@@ -84,7 +127,22 @@ class FrontStack(Stack):
                 cached_methods=cloudfront.CachedMethods.CACHE_GET_HEAD,
                 compress=True,
                 cache_policy=cloudfront.CachePolicy.CACHING_OPTIMIZED,
-            )
+            ),
+            additional_behaviors={
+                "/img/*": cloudfront.BehaviorOptions(
+                    origin=image_api_origin,
+                    viewer_protocol_policy=cloudfront.ViewerProtocolPolicy.REDIRECT_TO_HTTPS,
+                    allowed_methods=cloudfront.AllowedMethods.ALLOW_GET_HEAD,
+                    cached_methods=cloudfront.CachedMethods.CACHE_GET_HEAD,
+                    cache_policy=image_cache_policy,
+                    function_associations=[
+                        cloudfront.FunctionAssociation(
+                            function=normalize_image_query,
+                            event_type=cloudfront.FunctionEventType.VIEWER_REQUEST
+                        )
+                    ]
+                )
+            }
         )
 
         # Création du record set
@@ -97,18 +155,36 @@ class FrontStack(Stack):
             )
         )
 
+        # Script de publication incrémentale : envoi des seuls fichiers modifiés et
+        # invalidation des seuls chemins non immuables, d'après le manifeste du déploiement précédent
+        deploy_script = s3_assets.Asset(
+            self, "FrontDeployScript",
+            path=FRONT_DEPLOY_SCRIPT
+        )
+
+        # Cache du store npm entre deux builds : npm ci repart d'un node_modules vide
+        # mais ne télécharge plus que les paquets absents du cache
+        build_cache_bucket = s3.Bucket(
+            self, "ReactBuildCacheBucket",
+            removal_policy=RemovalPolicy.DESTROY,
+            auto_delete_objects=True,
+            block_public_access=s3.BlockPublicAccess.BLOCK_ALL,
+            lifecycle_rules=[s3.LifecycleRule(expiration=Duration.days(30))]
+        )
+
         # Création du projet CodeBuild
         build_project = codebuild.PipelineProject(
             self, "ReactBuildProject",
             environment=codebuild.BuildEnvironment(
                 build_image=codebuild.LinuxBuildImage.STANDARD_7_0,
             ),
+            cache=codebuild.Cache.bucket(build_cache_bucket, prefix="npm"),
             build_spec=codebuild.BuildSpec.from_object({
                 "version": "0.2",
                 "phases": {
                     "install": {
                         "commands": [
-                            "npm install",
+                            "npm ci --prefer-offline --no-audit --no-fund",
                         ]
                     },
                     "pre_build": {
@@ -123,16 +199,22 @@ class FrontStack(Stack):
                     },
                     "post_build": {
                         "commands": [
-                            "aws s3 sync build/ s3://${WEBSITE_BUCKET} --delete",
-                            "aws cloudfront create-invalidation --distribution-id ${CLOUDFRONT_DISTRIBUTION_ID} --paths '/*'"
+                            "aws s3 cp ${DEPLOY_SCRIPT_URL} /tmp/deploy_site.py --only-show-errors",
+                            "python3 /tmp/deploy_site.py build/ --bucket ${WEBSITE_BUCKET} "
+                            "--distribution-id ${CLOUDFRONT_DISTRIBUTION_ID}"
                         ]
                     }
+                },
+                "cache": {
+                    "paths": ["/root/.npm/**/*"]
                 }
             }),
         )
 
         # Ajout des permissions nécessaires au projet CodeBuild
         website_bucket.grant_read_write(build_project)
+        website_bucket.grant_delete(build_project)
+        deploy_script.grant_read(build_project)
         build_project.add_to_role_policy(
             iam.PolicyStatement(
                 actions=["cloudfront:CreateInvalidation"],
@@ -168,7 +250,7 @@ class FrontStack(Stack):
             owner=Config.get_github_owner(),
             repo=Config.get_github_repo(),
             branch=Config.get_github_branch(),
-            connection_arn='arn:aws:codeconnections:eu-west-1:532673134317:connection/2a30a395-8d38-43ab-827b-f39a83c9986a',
+            connection_arn=Config.get_github_connection_arn(),
             output=source_output,
         )
 
@@ -186,6 +268,9 @@ class FrontStack(Stack):
                 "CLOUDFRONT_DISTRIBUTION_ID": codebuild.BuildEnvironmentVariable(
                     value=distribution.distribution_id
                 ),
+                "DEPLOY_SCRIPT_URL": codebuild.BuildEnvironmentVariable(
+                    value=deploy_script.s3_object_url
+                ),
                 "REACT_APP_API_URL": codebuild.BuildEnvironmentVariable(
                     value=api_url[:-1]
                 ),
@@ -2,19 +2,35 @@ from aws_cdk import (
     Stack,
     aws_lambda as lambda_,
     aws_s3 as s3,
+    aws_s3_notifications as s3n,
     aws_iam as iam,
+    aws_dynamodb as dynamodb,
+    aws_sqs as sqs,
+    aws_lambda_event_sources as lambda_event_sources,
+    aws_cloudwatch as cloudwatch,
+    aws_cloudwatch_actions as cloudwatch_actions,
+    aws_sns as sns,
+    aws_sns_subscriptions as sns_subscriptions,
     Duration,
     CfnOutput,
-    RemovalPolicy,
-    BundlingOptions
+    RemovalPolicy
 )
 from constructs import Construct
+import json
 from config import Config
+from stacks.lambda_packaging import dependencies_layer_code, function_code, get_architecture, get_runtime
+
+# Opérations publiées par le handler (dimension Operation des métriques EMF)
+METRIC_OPERATIONS = ["POST /resize-image", "GET /img/{key+}", "S3Event", "SqsBatch"]
+
+# Étapes chronométrées par le handler, publiées en {étape}Duration
+METRIC_STAGES = ["Download", "Base64Decode", "Inspect", "CacheLookup", "Coalesce", "Decode", "Resize", "Encode", "Upload", "Index", "Presign"]
 
 
 class ImageProcessingStack(Stack):
     def __init__(self, scope: Construct, construct_id: str, **kwargs) -> None:
         super().__init__(scope, construct_id, **kwargs)
+        self._packages = {}
 
         # Créer le bucket S3 pour les images redimensionnées
         destination_bucket = s3.Bucket(
@@ -22,6 +38,7 @@ class ImageProcessingStack(Stack):
             versioned=True,
             removal_policy=RemovalPolicy.DESTROY,
             auto_delete_objects=True,
+            lifecycle_rules=self._rendition_lifecycle_rules(),
             cors=[
                 s3.CorsRule(
                     allowed_headers=["*"],
@@ -38,31 +55,214 @@ class ImageProcessingStack(Stack):
             ]
         )
 
+        # Créer le bucket S3 d'ingestion, alimenté directement par le client via POST présigné
+        ingest_bucket = s3.Bucket(
+            self, "IngestBucket",
+            removal_policy=RemovalPolicy.DESTROY,
+            auto_delete_objects=True,
+            block_public_access=s3.BlockPublicAccess.BLOCK_ALL,
+            lifecycle_rules=self._original_lifecycle_rules(),
+            cors=[
+                s3.CorsRule(
+                    allowed_headers=["*"],
+                    allowed_methods=[s3.HttpMethods.POST, s3.HttpMethods.PUT],
+                    allowed_origins=[
+                        "https://" + Config.get_domain_name(),
+                        "http://localhost:3000"
+                    ],
+                    exposed_headers=["ETag"],
+                    max_age=3000
+                )
+            ]
+        )
+
+        # Table des jobs de traitement par lot (synthèse + un élément par image)
+        jobs_table = dynamodb.Table(
+            self, "JobsTable",
+            partition_key=dynamodb.Attribute(name="jobId", type=dynamodb.AttributeType.STRING),
+            sort_key=dynamodb.Attribute(name="itemId", type=dynamodb.AttributeType.STRING),
+            billing_mode=dynamodb.BillingMode.PAY_PER_REQUEST,
+            time_to_live_attribute="expiresAt",
+            removal_policy=RemovalPolicy.DESTROY
+        )
+
+        # Verrous de courte durée du single-flight : une entrée par variante en cours de calcul,
+        # supprimée à la fin du traitement ou expirée par le TTL si l'invocation est interrompue
+        locks_table = dynamodb.Table(
+            self, "TransformLocksTable",
+            partition_key=dynamodb.Attribute(name="lockKey", type=dynamodb.AttributeType.STRING),
+            billing_mode=dynamodb.BillingMode.PAY_PER_REQUEST,
+            time_to_live_attribute="expiresAt",
+            removal_policy=RemovalPolicy.DESTROY
+        )
+
+        # Catalogue des images : fiche de métadonnées par source et bandes d'empreinte
+        # perceptuelle pour la recherche de quasi-doublons, sans parcours du bucket
+        images_table = self._images_table("ImagesTable")
+
+        # File des jobs et sa DLQ pour les messages en échec répété
+        jobs_dead_letter_queue = sqs.Queue(
+            self, "ResizeJobsDeadLetterQueue",
+            retention_period=Duration.days(14)
+        )
+        jobs_queue = sqs.Queue(
+            self, "ResizeJobsQueue",
+            # Recommandation AWS : au moins 6 fois le timeout de la Lambda consommatrice
+            visibility_timeout=Duration.seconds(6 * Config.get_lambda_timeout()),
+            dead_letter_queue=sqs.DeadLetterQueue(
+                max_receive_count=Config.get_batch_max_receive_count(),
+                queue=jobs_dead_letter_queue
+            )
+        )
+
+        # File des images trop coûteuses pour le traitement direct (budget de pixels
+        # décodés dépassé), consommée par une Lambda haute mémoire
+        heavy_jobs_dead_letter_queue = sqs.Queue(
+            self, "HeavyJobsDeadLetterQueue",
+            retention_period=Duration.days(14)
+        )
+        heavy_jobs_queue = sqs.Queue(
+            self, "HeavyJobsQueue",
+            visibility_timeout=Duration.seconds(6 * Config.get_heavy_lambda_timeout()),
+            dead_letter_queue=sqs.DeadLetterQueue(
+                max_receive_count=Config.get_batch_max_receive_count(),
+                queue=heavy_jobs_dead_letter_queue
+            )
+        )
+
+        # Code partagé par la Lambda HTTP et la Lambda de traitement par lot.
+        # Paquet allégé : sans boto3 (fourni par le runtime), plugins Pillow inutiles
+        # supprimés et bytecode précompilé, pour réduire le démarrage à froid
+        runtime = get_runtime(Config.get_lambda_runtime())
+        architecture = get_architecture(Config.get_lambda_architecture())
+        image_processor_code, layers = self._package(runtime, architecture)
+
+        snap_start = None
+        if Config.get_lambda_snapstart():
+            if runtime.name == "python3.11":
+                raise ValueError("SnapStart requiert un runtime Python 3.12 ou supérieur")
+            snap_start = lambda_.SnapStartConf.ON_PUBLISHED_VERSIONS
+
+        # Ressources en variables distinctes, réglages regroupés dans RUNTIME_CONFIG
+        environment = {
+            "DESTINATION_BUCKET": destination_bucket.bucket_name,
+            "INGEST_BUCKET": ingest_bucket.bucket_name,
+            "JOBS_TABLE": jobs_table.table_name,
+            "IMAGES_TABLE": images_table.table_name,
+            "LOCKS_TABLE": locks_table.table_name,
+            "JOBS_QUEUE_URL": jobs_queue.queue_url,
+            "HEAVY_JOBS_QUEUE_URL": heavy_jobs_queue.queue_url,
+            "RUNTIME_CONFIG": json.dumps(Config.get_runtime_config(), separators=(",", ":"))
+        }
+
         # Créer la Lambda avec bundling
         image_processor = lambda_.Function(
             self, "ImageProcessor",
-            runtime=lambda_.Runtime.PYTHON_3_11,
+            runtime=runtime,
             handler="app.lambda_handler",
-            code=lambda_.Code.from_asset(
-                "lambda/image_processor",
-                bundling=BundlingOptions(
-                    image=lambda_.Runtime.PYTHON_3_11.bundling_image,
-                    command=[
-                        "bash", "-c",
-                        "pip install -r requirements.txt -t /asset-output && cp -r . /asset-output"
-                    ]
-                )
-            ),
+            code=image_processor_code,
+            layers=layers,
+            architecture=architecture,
             timeout=Duration.seconds(Config.get_lambda_timeout()),
             memory_size=Config.get_lambda_memory_size(),
-            environment={
-                "DESTINATION_BUCKET": destination_bucket.bucket_name
-            }
+            snap_start=snap_start,
+            environment=environment
         )
 
+        # SnapStart et la concurrence provisionnée s'appliquent à une version publiée :
+        # l'API et les notifications S3 ciblent alors l'alias plutôt que $LATEST
+        image_processor_target = image_processor
+        provisioned_concurrency = Config.get_lambda_provisioned_concurrency()
+        if snap_start or provisioned_concurrency:
+            image_processor_target = lambda_.Alias(
+                self, "ImageProcessorLiveAlias",
+                alias_name="live",
+                version=image_processor.current_version,
+                provisioned_concurrent_executions=provisioned_concurrency or None
+            )
+
+        # Lambda consommatrice de la file : concurrence réservée pour ne pas affamer l'API
+        batch_image_processor = lambda_.Function(
+            self, "BatchImageProcessor",
+            runtime=runtime,
+            handler="app.lambda_handler",
+            code=image_processor_code,
+            layers=layers,
+            architecture=architecture,
+            timeout=Duration.seconds(Config.get_lambda_timeout()),
+            memory_size=Config.get_lambda_memory_size(),
+            reserved_concurrent_executions=Config.get_batch_reserved_concurrency(),
+            environment=environment
+        )
+        batch_image_processor.add_event_source(
+            lambda_event_sources.SqsEventSource(
+                jobs_queue,
+                batch_size=Config.get_batch_size(),
+                max_batching_window=Duration.seconds(Config.get_batch_max_window_seconds()),
+                report_batch_item_failures=True
+            )
+        )
+
+        # Lambda haute mémoire : mêmes budgets d'entrée, sans limite de pixels décodés
+        # (toute source admise est traitée), un message à la fois et une concurrence
+        # réservée faible pour ne pas consommer celle des autres fonctions
+        heavy_image_processor = lambda_.Function(
+            self, "HeavyImageProcessor",
+            runtime=runtime,
+            handler="app.lambda_handler",
+            code=image_processor_code,
+            layers=layers,
+            architecture=architecture,
+            timeout=Duration.seconds(Config.get_heavy_lambda_timeout()),
+            memory_size=Config.get_heavy_lambda_memory_size(),
+            reserved_concurrent_executions=Config.get_heavy_reserved_concurrency(),
+            environment=dict(
+                environment,
+                INLINE_MAX_DECODED_PIXELS=str(Config.get_max_input_pixels()),
+                SINGLE_FLIGHT_LOCK_SECONDS=str(Config.get_heavy_lambda_timeout()),
+                METRICS_NAMESPACE=f"{Config.get_metrics_namespace()}/HighMemory"
+            )
+        )
+        heavy_image_processor.add_event_source(
+            lambda_event_sources.SqsEventSource(
+                heavy_jobs_queue,
+                batch_size=1,
+                report_batch_item_failures=True
+            )
+        )
+
+        jobs_queue.grant_send_messages(image_processor)
+        heavy_jobs_queue.grant_send_messages(image_processor)
+        heavy_jobs_queue.grant_send_messages(batch_image_processor)
+        jobs_table.grant_read_write_data(image_processor)
+        jobs_table.grant_read_write_data(batch_image_processor)
+        images_table.grant_read_write_data(image_processor)
+        images_table.grant_read_write_data(batch_image_processor)
+        locks_table.grant_read_write_data(image_processor)
+        locks_table.grant_read_write_data(batch_image_processor)
+        destination_bucket.grant_put(batch_image_processor)
+        destination_bucket.grant_read(batch_image_processor)
+        ingest_bucket.grant_read(batch_image_processor)
+        jobs_table.grant_read_write_data(heavy_image_processor)
+        images_table.grant_read_write_data(heavy_image_processor)
+        locks_table.grant_read_write_data(heavy_image_processor)
+        destination_bucket.grant_put(heavy_image_processor)
+        destination_bucket.grant_read(heavy_image_processor)
+        ingest_bucket.grant_read(heavy_image_processor)
+
         # Ajouter les permissions S3 à la Lambda
         destination_bucket.grant_put(image_processor)
         destination_bucket.grant_read(image_processor)
+        # grant_put est nécessaire pour signer les POST présignés du bucket d'ingestion
+        ingest_bucket.grant_put(image_processor)
+        ingest_bucket.grant_read(image_processor)
+
+        # Déclencher le traitement dès qu'une image est déposée dans le bucket d'ingestion
+        ingest_bucket.add_event_notification(
+            s3.EventType.OBJECT_CREATED,
+            s3n.LambdaDestination(image_processor_target),
+            s3.NotificationKeyFilter(prefix="uploads/")
+        )
 
         # Ajouter les permissions CloudWatch Logs
         image_processor.add_to_role_policy(
@@ -72,6 +272,14 @@ class ImageProcessingStack(Stack):
             )
         )
 
+        self._add_monitoring([image_processor, batch_image_processor, heavy_image_processor], {
+            "ResizeJobsDeadLetterAlarm": jobs_dead_letter_queue,
+            "HeavyJobsDeadLetterAlarm": heavy_jobs_dead_letter_queue
+        })
+
+        if Config.get_tuning_enabled():
+            self._add_tuning_variants(runtime, environment, ingest_bucket)
+
         # Output les informations importantes
         CfnOutput(
             self, "DestinationBucketName",
@@ -79,11 +287,277 @@ class ImageProcessingStack(Stack):
             description="Nom du bucket de destination"
         )
 
+        CfnOutput(
+            self, "IngestBucketName",
+            value=ingest_bucket.bucket_name,
+            description="Nom du bucket d'ingestion"
+        )
+
+        CfnOutput(
+            self, "ResizeJobsDeadLetterQueueUrl",
+            value=jobs_dead_letter_queue.queue_url,
+            description="URL de la DLQ des jobs de traitement par lot"
+        )
+
+        CfnOutput(
+            self, "HeavyJobsDeadLetterQueueUrl",
+            value=heavy_jobs_dead_letter_queue.queue_url,
+            description="URL de la DLQ du traitement haute mémoire"
+        )
+
         CfnOutput(
             self, "ImageProcessorArn",
             value=image_processor.function_arn,
             description="ARN de la fonction Lambda"
         )
 
-        # Exposer la Lambda pour l'API Gateway
-        self.image_processor = image_processor
+        # Exposer la Lambda (ou son alias) pour l'API Gateway
+        self.image_processor = image_processor_target
+        self.ingest_bucket = ingest_bucket
+
+    def _images_table(self, construct_id):
+        table = dynamodb.Table(
+            self, construct_id,
+            partition_key=dynamodb.Attribute(name="pk", type=dynamodb.AttributeType.STRING),
+            sort_key=dynamodb.Attribute(name="sk", type=dynamodb.AttributeType.STRING),
+            billing_mode=dynamodb.BillingMode.PAY_PER_REQUEST,
+            removal_policy=RemovalPolicy.DESTROY
+        )
+        table.add_global_secondary_index(
+            index_name="ImagesByCreation",
+            partition_key=dynamodb.Attribute(name="entity", type=dynamodb.AttributeType.STRING),
+            sort_key=dynamodb.Attribute(name="createdAt", type=dynamodb.AttributeType.NUMBER)
+        )
+        return table
+
+    def _package(self, runtime, architecture):
+        # Un paquet (et une couche éventuelle) par architecture, partagé par les fonctions
+        if architecture.name in self._packages:
+            return self._packages[architecture.name]
+
+        slim_package = Config.get_lambda_slim_package()
+        suffix = "" if not self._packages else architecture.name.replace("_", "").capitalize()
+        layers = []
+        if Config.get_lambda_dependencies_layer():
+            # Les dépendances vivent dans une couche, le code du handler reste minimal
+            layers.append(lambda_.LayerVersion(
+                self, f"ImageProcessorDependencies{suffix}",
+                code=dependencies_layer_code(runtime, architecture, slim_package),
+                compatible_runtimes=[runtime],
+                compatible_architectures=[architecture],
+                description="Pillow et codecs du traitement d'images"
+            ))
+        code = function_code(runtime, architecture, slim_package, with_dependencies=not layers)
+        self._packages[architecture.name] = (code, layers)
+        return code, layers
+
+    def _rendition_lifecycle_rules(self) -> list:
+        # Le bucket des renditions est un cache : tout objet se régénère depuis sa source.
+        # Les renditions expirent après RENDITION_EXPIRATION_DAYS sans lecture (le handler
+        # réécrit celles qui sont encore demandées), les versions remplacées après quelques jours
+        rules = [
+            s3.LifecycleRule(
+                id="ExpireNoncurrentVersions",
+                noncurrent_version_expiration=Duration.days(Config.get_noncurrent_version_expiration_days()),
+                abort_incomplete_multipart_upload_after=Duration.days(1)
+            ),
+            # Marqueurs de suppression laissés seuls une fois les versions expirées
+            s3.LifecycleRule(id="RemoveExpiredDeleteMarkers", expired_object_delete_marker=True)
+        ]
+        if Config.get_rendition_expiration_days():
+            rules.append(s3.LifecycleRule(
+                id="ExpireRenditions",
+                prefix="renditions/",
+                expiration=Duration.days(Config.get_rendition_expiration_days())
+            ))
+        return rules
+
+    def _original_lifecycle_rules(self) -> list:
+        # Sources conservées (elles permettent de régénérer les renditions) mais rarement relues :
+        # Intelligent-Tiering les déplace vers les classes d'accès peu fréquent sans frais de lecture.
+        # Les objets de moins de 128 Ko ne sont pas surveillés par S3 : ils restent en Standard.
+        return [
+            s3.LifecycleRule(
+                id=f"TierOriginals{name}",
+                prefix=prefix,
+                object_size_greater_than=128 * 1024,
+                transitions=[s3.Transition(
+                    storage_class=s3.StorageClass.INTELLIGENT_TIERING,
+                    transition_after=Duration.days(0)
+                )],
+                abort_incomplete_multipart_upload_after=Duration.days(1)
+            )
+            for name, prefix in (("Uploads", "uploads/"), ("Deferred", "deferred/"))
+        ]
+
+    def _add_tuning_variants(self, runtime, environment, ingest_bucket) -> None:
+        # Variantes mémoire/architecture du traitement, invoquées uniquement par
+        # benchmarks/power_tuning.py : ni API, ni notification S3, ni alias.
+        # Elles écrivent dans un bucket dédié que le pilote peut vider entre deux mesures.
+        tuning_bucket = s3.Bucket(
+            self, "TuningDestinationBucket",
+            removal_policy=RemovalPolicy.DESTROY,
+            auto_delete_objects=True,
+            block_public_access=s3.BlockPublicAccess.BLOCK_ALL,
+            lifecycle_rules=[s3.LifecycleRule(expiration=Duration.days(1))]
+        )
+        tuning_images_table = self._images_table("TuningImagesTable")
+        tuning_environment = dict(
+            environment,
+            DESTINATION_BUCKET=tuning_bucket.bucket_name,
+            IMAGES_TABLE=tuning_images_table.table_name,
+            # Toutes les sources admises sont mesurées sur la variante, sans délégation
+            INLINE_MAX_DECODED_PIXELS=str(Config.get_max_input_pixels()),
+            # Chaque invocation mesure le traitement complet, sans attendre une autre variante
+            LOCKS_TABLE="",
+            METRICS_NAMESPACE=f"{Config.get_metrics_namespace()}/Tuning"
+        )
+
+        variants = {}
+        for architecture_name in Config.get_tuning_architectures():
+            architecture = get_architecture(architecture_name)
+            code, layers = self._package(runtime, architecture)
+            for memory_size in Config.get_tuning_memory_sizes():
+                variant = f"{architecture_name}-{memory_size}"
+                function = lambda_.Function(
+                    self, f"ImageProcessorTuning{architecture_name.replace('_', '').capitalize()}{memory_size}",
+                    runtime=runtime,
+                    handler="app.lambda_handler",
+                    code=code,
+                    layers=layers,
+                    architecture=architecture,
+                    timeout=Duration.seconds(Config.get_lambda_timeout()),
+                    memory_size=memory_size,
+                    environment=tuning_environment
+                )
+                tuning_bucket.grant_read_write(function)
+                tuning_images_table.grant_read_write_data(function)
+                ingest_bucket.grant_read(function)
+                variants[variant] = function.function_name
+
+        CfnOutput(
+            self, "TuningFunctions",
+            value=self.to_json_string(variants),
+            description="Variantes mémoire/architecture pour benchmarks.power_tuning"
+        )
+        CfnOutput(
+            self, "TuningDestinationBucketName",
+            value=tuning_bucket.bucket_name,
+            description="Bucket de destination des variantes de tuning"
+        )
+
+    def _add_monitoring(self, functions, dead_letter_queues) -> None:
+        namespace = Config.get_metrics_namespace()
+
+        def handler_metric(name, statistic, operation=None):
+            return cloudwatch.Metric(
+                namespace=namespace,
+                metric_name=name,
+                dimensions_map={"Operation": operation} if operation else None,
+                statistic=statistic,
+                period=Duration.minutes(1)
+            )
+
+        dashboard = cloudwatch.Dashboard(
+            self, "ImageProcessorDashboard",
+            dashboard_name=f"{self.stack_name}-image-processor"
+        )
+
+        # Une ligne par opération : répartition de la latence par étape (p50 et p95)
+        for operation in METRIC_OPERATIONS:
+            dashboard.add_widgets(
+                cloudwatch.GraphWidget(
+                    title=f"{operation} - durée des étapes p50 (ms)",
+                    left=[handler_metric(f"{stage}Duration", "p50", operation) for stage in METRIC_STAGES],
+                    width=12
+                ),
+                cloudwatch.GraphWidget(
+                    title=f"{operation} - durée des étapes p95 (ms)",
+                    left=[handler_metric(f"{stage}Duration", "p95", operation) for stage in METRIC_STAGES]
+                    + [handler_metric("TotalDuration", "p95", operation)],
+                    width=12
+                )
+            )
+
+        dashboard.add_widgets(
+            cloudwatch.GraphWidget(
+                title="Volumes (octets)",
+                left=[handler_metric("InputBytes", "Sum"), handler_metric("OutputBytes", "Sum")],
+                width=8
+            ),
+            cloudwatch.GraphWidget(
+                title="Pixels décodés et produits",
+                left=[handler_metric("DecodedPixels", "Sum"), handler_metric("OutputPixels", "Sum")],
+                width=8
+            ),
+            cloudwatch.GraphWidget(
+                title="Cache des renditions",
+                left=[handler_metric("CacheHits", "Sum"), handler_metric("CacheMisses", "Sum")],
+                width=8
+            )
+        )
+        dashboard.add_widgets(
+            cloudwatch.GraphWidget(
+                title="Mémoire maximale (Mo)",
+                left=[handler_metric("MaxMemoryUsed", "Maximum", operation) for operation in METRIC_OPERATIONS],
+                width=8
+            ),
+            cloudwatch.GraphWidget(
+                title="Démarrages à froid",
+                left=[handler_metric("ColdStart", "Sum", operation) for operation in METRIC_OPERATIONS],
+                width=8
+            ),
+            cloudwatch.GraphWidget(
+                title="Erreurs Lambda",
+                left=[handler_metric("Errors", "Sum")]
+                + [function.metric_errors(period=Duration.minutes(1)) for function in functions]
+                + [function.metric_throttles(period=Duration.minutes(1)) for function in functions],
+                width=8
+            )
+        )
+
+        alarms = [
+            cloudwatch.Alarm(
+                self, "ImageProcessorLatencyAlarm",
+                alarm_description="p95 de la durée totale du handler au-dessus du seuil",
+                metric=handler_metric("TotalDuration", "p95").with_(period=Duration.minutes(5)),
+                threshold=Config.get_alarm_p95_duration_ms(),
+                evaluation_periods=3,
+                treat_missing_data=cloudwatch.TreatMissingData.NOT_BREACHING
+            ),
+            cloudwatch.Alarm(
+                self, "ImageProcessorErrorsAlarm",
+                alarm_description="Erreurs du traitement d'images (réponses 5xx et exceptions)",
+                metric=handler_metric("Errors", "Sum").with_(period=Duration.minutes(5)),
+                threshold=5,
+                evaluation_periods=1,
+                treat_missing_data=cloudwatch.TreatMissingData.NOT_BREACHING
+            ),
+            cloudwatch.Alarm(
+                self, "ImageProcessorMemoryAlarm",
+                alarm_description="Mémoire maximale proche de la mémoire allouée à la Lambda",
+                metric=handler_metric("MaxMemoryUsed", "Maximum").with_(period=Duration.minutes(5)),
+                threshold=Config.get_lambda_memory_size() * Config.get_alarm_memory_ratio(),
+                evaluation_periods=1,
+                treat_missing_data=cloudwatch.TreatMissingData.NOT_BREACHING
+            )
+        ] + [
+            cloudwatch.Alarm(
+                self, alarm_id,
+                alarm_description="Messages de jobs en échec répété dans la DLQ",
+                metric=queue.metric_approximate_number_of_messages_visible(period=Duration.minutes(5)),
+                threshold=0,
+                comparison_operator=cloudwatch.ComparisonOperator.GREATER_THAN_THRESHOLD,
+                evaluation_periods=1,
+                treat_missing_data=cloudwatch.TreatMissingData.NOT_BREACHING
+            )
+            for alarm_id, queue in dead_letter_queues.items()
+        ]
+        dashboard.add_widgets(*[cloudwatch.AlarmWidget(alarm=alarm, width=6) for alarm in alarms])
+
+        # Notification par e-mail uniquement si une adresse est configurée
+        if Config.get_alarm_email():
+            topic = sns.Topic(self, "ImageProcessorAlarmsTopic")
+            topic.add_subscription(sns_subscriptions.EmailSubscription(Config.get_alarm_email()))
+            for alarm in alarms:
+                alarm.add_alarm_action(cloudwatch_actions.SnsAction(topic))
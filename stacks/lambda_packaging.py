@@ -0,0 +1,122 @@
+import hashlib
+import os
+
+from aws_cdk import (
+    aws_lambda as lambda_,
+    AssetHashType,
+    BundlingOptions
+)
+
+LAMBDA_SOURCE_DIR = "lambda/image_processor"
+
+# Hors empreinte du code : un bytecode régénéré localement ne relance pas le bundling
+SOURCE_EXCLUDES = ["__pycache__", "*.pyc"]
+
+RUNTIMES = {
+    "python3.11": lambda_.Runtime.PYTHON_3_11,
+    "python3.12": lambda_.Runtime.PYTHON_3_12,
+    "python3.13": lambda_.Runtime.PYTHON_3_13,
+}
+
+ARCHITECTURES = {
+    "x86_64": lambda_.Architecture.X86_64,
+    "arm64": lambda_.Architecture.ARM_64,
+}
+
+# Déjà fournis par le runtime Lambda : inutile de les embarquer dans le paquet allégé
+RUNTIME_PROVIDED_PACKAGES = ["boto3", "botocore"]
+
+# Plugins et modules Pillow jamais utilisés par le traitement (formats exotiques, Tk/Qt, affichage).
+# Image.init() ignore les plugins absents, seuls BMP, GIF, JPEG, MPO, PNG, PPM, TIFF et WebP restent.
+PILLOW_UNUSED_MODULES = [
+    "BlpImagePlugin.py", "BufrStubImagePlugin.py", "CurImagePlugin.py", "DcxImagePlugin.py",
+    "DdsImagePlugin.py", "EpsImagePlugin.py", "FitsImagePlugin.py", "FliImagePlugin.py",
+    "FpxImagePlugin.py", "FtexImagePlugin.py", "GbrImagePlugin.py", "GribStubImagePlugin.py",
+    "Hdf5StubImagePlugin.py", "IcnsImagePlugin.py", "IcoImagePlugin.py", "ImImagePlugin.py",
+    "ImtImagePlugin.py", "IptcImagePlugin.py", "Jpeg2KImagePlugin.py", "McIdasImagePlugin.py",
+    "MicImagePlugin.py", "MpegImagePlugin.py", "MspImagePlugin.py", "PalmImagePlugin.py",
+    "PcdImagePlugin.py", "PcxImagePlugin.py", "PdfImagePlugin.py", "PdfParser.py",
+    "PixarImagePlugin.py", "PsdImagePlugin.py", "QoiImagePlugin.py", "SgiImagePlugin.py",
+    "SpiderImagePlugin.py", "SunImagePlugin.py", "TgaImagePlugin.py", "WmfImagePlugin.py",
+    "XVThumbImagePlugin.py", "XbmImagePlugin.py", "XpmImagePlugin.py",
+    "ImageTk.py", "ImageQt.py", "ImageGrab.py", "ImageWin.py", "ImageShow.py", "PSDraw.py",
+    "_tkinter_finder.py", "_imagingtk.*.so", "*.pyi",
+]
+
+
+def get_runtime(name: str) -> lambda_.Runtime:
+    if name not in RUNTIMES:
+        raise ValueError(f"Runtime Lambda non supporté: {name}")
+    return RUNTIMES[name]
+
+
+def get_architecture(name: str) -> lambda_.Architecture:
+    if name not in ARCHITECTURES:
+        raise ValueError(f"Architecture Lambda non supportée: {name}")
+    return ARCHITECTURES[name]
+
+
+def _install_dependencies(target: str, slim: bool) -> list:
+    if not slim:
+        return [f"pip install -r requirements.txt -t {target}"]
+
+    excluded = "|".join(RUNTIME_PROVIDED_PACKAGES)
+    return [
+        f"grep -v -i -E '^({excluded})([=<> ]|$)' requirements.txt > /tmp/requirements.txt",
+        f"pip install --no-compile --only-binary=:all: -r /tmp/requirements.txt -t {target}",
+        f"(cd {target}/PIL && rm -f {' '.join(PILLOW_UNUSED_MODULES)})",
+        f"find {target} -type d \\( -name __pycache__ -o -name tests \\) -prune -exec rm -rf {{}} +",
+    ]
+
+
+def _precompile(target: str) -> list:
+    # unchecked-hash : les .pyc sont utilisés sans vérification de la date des sources,
+    # /var/task étant en lecture seule le runtime ne pourrait de toute façon pas les réécrire
+    return [f"python -m compileall -q -j 0 --invalidation-mode unchecked-hash {target}"]
+
+
+def _bundling(runtime: lambda_.Runtime, architecture: lambda_.Architecture, commands: list) -> BundlingOptions:
+    # Les wheels binaires (Pillow, AVIF) sont installées pour l'architecture cible
+    return BundlingOptions(
+        image=runtime.bundling_image,
+        platform=architecture.docker_platform,
+        command=["bash", "-c", " && ".join(commands)]
+    )
+
+
+def _dependencies_hash(runtime: lambda_.Runtime, architecture: lambda_.Architecture, commands: list) -> str:
+    with open(os.path.join(LAMBDA_SOURCE_DIR, "requirements.txt"), "rb") as f:
+        digest = hashlib.sha256(f.read())
+    digest.update("\n".join([runtime.name, architecture.name, *commands]).encode())
+    return digest.hexdigest()
+
+
+def function_code(runtime: lambda_.Runtime, architecture: lambda_.Architecture, slim: bool,
+                  with_dependencies: bool) -> lambda_.Code:
+    commands = []
+    if with_dependencies:
+        commands += _install_dependencies("/asset-output", slim)
+
+    if slim:
+        # Uniquement les modules du handler, sans caches ni fichiers annexes
+        commands += ["cp *.py /asset-output"] + _precompile("/asset-output")
+    else:
+        commands += ["cp -r . /asset-output"]
+
+    # Empreinte des sources (et des options de bundling) calculée avant le bundling :
+    # un code inchangé réutilise le paquet déjà construit dans cdk.out, sans lancer Docker
+    return lambda_.Code.from_asset(LAMBDA_SOURCE_DIR, bundling=_bundling(runtime, architecture, commands),
+                                   asset_hash_type=AssetHashType.SOURCE, exclude=SOURCE_EXCLUDES)
+
+
+def dependencies_layer_code(runtime: lambda_.Runtime, architecture: lambda_.Architecture, slim: bool) -> lambda_.Code:
+    # Les couches Python sont montées sous /opt/python
+    commands = _install_dependencies("/asset-output/python", slim)
+    if slim:
+        commands += _precompile("/asset-output/python")
+
+    # La couche ne dépend que de requirements.txt : une modification du handler ne la reconstruit pas
+    return lambda_.Code.from_asset(LAMBDA_SOURCE_DIR, bundling=_bundling(runtime, architecture, commands),
+                                   asset_hash_type=AssetHashType.CUSTOM,
+                                   asset_hash=_dependencies_hash(runtime, architecture, commands))
+
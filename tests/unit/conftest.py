@@ -0,0 +1,68 @@
+from dataclasses import fields
+from io import BytesIO
+
+import pytest
+from moto import mock_aws
+
+from benchmarks.bench_handler import create_resources, handler_environment, load_handler
+from benchmarks.corpus import synthetic_image
+from config import Config
+
+
+@pytest.fixture
+def default_config(monkeypatch):
+    # Configuration par défaut : ni variables d'environnement (AWS_REGION, LOG_LEVEL...)
+    # ni profil de STAGE, réglages rechargés avant et après le test
+    for field in fields(Config):
+        monkeypatch.delenv(field.name, raising=False)
+    Config.configure()
+    yield Config
+    Config.configure()
+
+
+@pytest.fixture(scope="module")
+def handler():
+    # Handler sur S3/DynamoDB simulés ; environnement et moto rétablis en fin de module
+    buffer = BytesIO()
+    synthetic_image((1200, 900)).save(buffer, format="JPEG")
+    with pytest.MonkeyPatch.context() as monkeypatch, mock_aws():
+        # Handler configuré par les valeurs par défaut, quel que soit l'environnement du shell
+        for field in fields(Config):
+            monkeypatch.delenv(field.name, raising=False)
+        Config.configure()
+        for name, value in handler_environment().items():
+            monkeypatch.setenv(name, value)
+        s3 = create_resources([("photo.jpeg", buffer.getvalue())])
+        _create_job_resources(monkeypatch)
+        yield s3, load_handler()
+    Config.configure()
+
+
+def _create_job_resources(monkeypatch):
+    # Table et files des jobs, même schéma que JobsTable dans ImageProcessingStack
+    import boto3
+
+    monkeypatch.setenv("JOBS_TABLE", "bench-jobs")
+    boto3.client("dynamodb").create_table(
+        TableName="bench-jobs",
+        KeySchema=[{"AttributeName": "jobId", "KeyType": "HASH"}, {"AttributeName": "itemId", "KeyType": "RANGE"}],
+        AttributeDefinitions=[{"AttributeName": name, "AttributeType": "S"} for name in ("jobId", "itemId")],
+        BillingMode="PAY_PER_REQUEST"
+    )
+    sqs = boto3.client("sqs")
+    monkeypatch.setenv("JOBS_QUEUE_URL", sqs.create_queue(QueueName="bench-jobs")["QueueUrl"])
+    monkeypatch.setenv("HEAVY_JOBS_QUEUE_URL", sqs.create_queue(QueueName="bench-heavy-jobs")["QueueUrl"])
+
+
+def pytest_terminal_summary(terminalreporter):
+    # Durées de synth enregistrées par les tests de snapshot (transmises aussi par pytest-xdist)
+    timings = [
+        (report.nodeid, value)
+        for report in terminalreporter.stats.get("passed", []) + terminalreporter.stats.get("failed", [])
+        if report.when == "call"
+        for name, value in report.user_properties if name == "synth_seconds"
+    ]
+    if timings:
+        terminalreporter.section("synth")
+        for nodeid, seconds in sorted(timings):
+            terminalreporter.write_line(f"{seconds:6.2f}s  {nodeid}")
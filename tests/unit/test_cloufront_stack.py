@@ -1,17 +1,19 @@
 import aws_cdk as core
 import aws_cdk.assertions as assertions
 
+from config import Config
 from stacks.front_stack import FrontStack
 
-# example tests. To run these tests, uncomment this file along with the example
-# resource in cloufront/cloufront_stack.py
 
-
-def test_sqs_queue_created():
+def test_distribution_serves_the_site_over_https():
     app = core.App()
-    stack = FrontStack(app, "front")
+    stack = FrontStack(app, "front", api_url="https://api.example.com/", env=core.Environment(**Config.get_env()))
     template = assertions.Template.from_stack(stack)
 
-#     template.has_resource_properties("AWS::SQS::Queue", {
-#         "VisibilityTimeout": 300
-#     })
+    template.resource_count_is("AWS::CloudFront::Distribution", 1)
+    template.has_resource_properties("AWS::CloudFront::Distribution", {
+        "DistributionConfig": assertions.Match.object_like({
+            "Aliases": [Config.get_domain_name()],
+            "DefaultCacheBehavior": assertions.Match.object_like({"ViewerProtocolPolicy": "redirect-to-https"})
+        })
+    })
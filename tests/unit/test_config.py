@@ -0,0 +1,74 @@
+import pytest
+
+from config import Config
+
+
+def _load(monkeypatch, env=None, context=None):
+    for name, value in (env or {}).items():
+        monkeypatch.setenv(name, value)
+    Config.configure(context=(context or {}).get)
+    return Config.settings()
+
+
+def test_defaults_apply_without_profile_environment_or_context(default_config, monkeypatch):
+    settings = _load(monkeypatch)
+
+    assert settings.STAGE == Config.STAGE
+    assert settings.LOG_LEVEL == Config.LOG_LEVEL
+    assert settings.LAMBDA_MEMORY_SIZE == Config.LAMBDA_MEMORY_SIZE
+
+
+def test_layers_override_each_other_in_order(default_config, monkeypatch):
+    # Défaut INFO < profil dev (DEBUG) < environnement < contexte CDK
+    assert _load(monkeypatch, env={"STAGE": "dev"}).LOG_LEVEL == "DEBUG"
+    assert _load(monkeypatch, env={"STAGE": "dev", "LOG_LEVEL": "WARNING"}).LOG_LEVEL == "WARNING"
+
+    settings = _load(monkeypatch, env={"STAGE": "dev", "LOG_LEVEL": "WARNING"}, context={"LOG_LEVEL": "ERROR"})
+    assert settings.LOG_LEVEL == "ERROR"
+    # Réglages absents des couches supérieures : valeur du profil
+    assert settings.JOB_TTL_DAYS == 1
+
+
+def test_stage_from_context_selects_the_profile(default_config, monkeypatch):
+    settings = _load(monkeypatch, env={"STAGE": "missing"}, context={"STAGE": "dev"})
+
+    assert settings.STAGE == "dev" and settings.METRICS_NAMESPACE == "ImageProcessor/Dev"
+
+
+def test_text_values_are_coerced_to_the_type_of_the_default(default_config, monkeypatch):
+    settings = _load(monkeypatch, env={
+        "LAMBDA_MEMORY_SIZE": "1_024",
+        "SKIP_BUNDLING": "yes",
+        "TUNING_MEMORY_SIZES": "512, 2048",
+    })
+
+    assert settings.LAMBDA_MEMORY_SIZE == 1024
+    assert settings.SKIP_BUNDLING is True
+    assert settings.TUNING_MEMORY_SIZES == (512, 2048)
+
+
+def test_invalid_values_are_all_reported(default_config, monkeypatch):
+    with pytest.raises(ValueError) as error:
+        _load(monkeypatch, env={"LAMBDA_MEMORY_SIZE": "large", "LAMBDA_TIMEOUT": "abc"})
+
+    assert "LAMBDA_MEMORY_SIZE" in str(error.value) and "LAMBDA_TIMEOUT" in str(error.value)
+
+
+@pytest.mark.parametrize("env, message", [
+    ({"LAMBDA_MEMORY_SIZE": "64"}, "LAMBDA_MEMORY_SIZE doit être compris"),
+    ({"LOG_LEVEL": "VERBOSE"}, "LOG_LEVEL doit valoir"),
+    ({"INLINE_MAX_DECODED_PIXELS": "200000000"}, "INLINE_MAX_DECODED_PIXELS ne peut pas dépasser"),
+    ({"RENDITION_TOUCH_DAYS": "120"}, "RENDITION_TOUCH_DAYS doit être compris"),
+    ({"STAGE": "unknown"}, "Profil de configuration introuvable"),
+    ({"RENDITIONS": '[{"name": "medium", "width": "800", "height": 600}]'}, "RENDITIONS : chaque rendition"),
+])
+def test_inconsistent_settings_are_rejected(default_config, monkeypatch, env, message):
+    with pytest.raises(ValueError, match=message):
+        _load(monkeypatch, env=env)
+
+
+def test_runtime_config_carries_the_client_settings(default_config, monkeypatch):
+    _load(monkeypatch, env={"CLIENT_READ_TIMEOUT": "30"})
+    runtime = Config.get_runtime_config()
+
+    assert runtime["CLIENT_READ_TIMEOUT"] == 30 and runtime["CLIENT_CONNECT_TIMEOUT"] == Config.CLIENT_CONNECT_TIMEOUT
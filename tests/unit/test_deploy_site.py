@@ -0,0 +1,58 @@
+from stacks.front_deploy.deploy_site import MAX_INVALIDATION_PATHS, invalidation_paths, plan
+
+BUILD = {
+    "index.html": "a1",
+    "manifest.json": "b1",
+    "static/js/main.3f2a1c9b.js": "c1",
+    "static/css/main.77aa01ff.css": "d1",
+}
+
+
+def test_first_deploy_uploads_everything_and_invalidates_mutable_files():
+    changed, removed, invalidations = plan(BUILD, {"files": {}, "previous": {}})
+
+    assert changed == sorted(BUILD)
+    assert removed == []
+    # Assets immuables jamais invalidés, index.html aussi servi à la racine
+    assert invalidations == ["/", "/index.html", "/manifest.json"]
+
+
+def test_changed_index_is_the_only_upload_and_invalidation():
+    current = dict(BUILD, **{"index.html": "a2"})
+
+    changed, removed, invalidations = plan(current, {"files": BUILD, "previous": {}})
+
+    assert changed == ["index.html"]
+    assert removed == []
+    assert invalidations == ["/", "/index.html"]
+
+
+def test_hashed_assets_are_kept_for_one_deploy_then_removed():
+    previous = dict(BUILD)
+    deployed = dict(BUILD, **{"index.html": "a2", "static/js/main.0badc0de.js": "c2"})
+    del deployed["static/js/main.3f2a1c9b.js"]
+    current = dict(deployed, **{"index.html": "a3", "static/js/main.12345678.js": "c3"})
+    del current["static/js/main.0badc0de.js"]
+
+    changed, removed, invalidations = plan(current, {"files": deployed, "previous": previous})
+
+    assert changed == ["index.html", "static/js/main.12345678.js"]
+    # L'asset du déploiement précédent reste servi aux anciens index.html, celui d'avant est supprimé
+    assert removed == ["static/js/main.3f2a1c9b.js"]
+    assert invalidations == ["/", "/index.html"]
+
+
+def test_removed_mutable_file_is_deleted_and_invalidated():
+    current = {path: digest for path, digest in BUILD.items() if path != "manifest.json"}
+
+    _, removed, invalidations = plan(current, {"files": BUILD, "previous": {}})
+
+    assert removed == ["manifest.json"]
+    assert invalidations == ["/manifest.json"]
+
+
+def test_large_invalidations_fall_back_to_a_wildcard():
+    paths = [f"/page-{index}.html" for index in range(MAX_INVALIDATION_PATHS + 1)]
+
+    assert invalidation_paths(paths[:MAX_INVALIDATION_PATHS]) == paths[:MAX_INVALIDATION_PATHS]
+    assert invalidation_paths(paths) == ["/*"]
@@ -0,0 +1,559 @@
+import base64
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from io import BytesIO
+from types import SimpleNamespace
+
+from PIL import Image
+
+from benchmarks.bench_handler import build_event
+from benchmarks.corpus import synthetic_image
+
+
+def _jpeg(size):
+    buffer = BytesIO()
+    synthetic_image(size).save(buffer, format="JPEG")
+    return buffer.getvalue()
+
+
+def test_resize_request_returns_configured_renditions(handler, capsys):
+    s3, app = handler
+    event = {"routeKey": "POST /resize-image", "body": json.dumps({"image": base64.b64encode(_jpeg((1000, 750))).decode()})}
+
+    response = app.lambda_handler(event, None)
+
+    assert response["statusCode"] == 200
+    renditions = json.loads(response["body"])["renditions"]
+    assert set(renditions) == {spec.name for spec in app.RENDITIONS}
+    medium = s3.get_object(Bucket="bench-destination", Key=renditions["medium"]["key"])["Body"].read()
+    assert Image.open(BytesIO(medium)).size == (800, 600)
+
+    # Une seule ligne EMF par invocation, avec les étapes du traitement
+    emf = [json.loads(line) for line in capsys.readouterr().out.splitlines() if line.startswith('{"_aws"')]
+    assert len(emf) == 1
+    assert emf[0]["Operation"] == "POST /resize-image"
+    assert {"DecodeDuration", "ResizeDuration", "EncodeDuration", "UploadDuration"} <= set(emf[0])
+
+
+def test_transform_request_is_served_from_cache_on_second_call(handler, capsys):
+    _, app = handler
+    event = build_event("transform", "photo.jpeg", None)
+
+    first = app.lambda_handler(event, None)
+    second = app.lambda_handler(event, None)
+
+    assert first["statusCode"] == second["statusCode"] == 200
+    assert first["headers"]["Content-Type"] == "image/webp"
+    assert Image.open(BytesIO(base64.b64decode(second["body"]))).width == 640
+    emf = [json.loads(line) for line in capsys.readouterr().out.splitlines() if line.startswith('{"_aws"')]
+    assert "DecodeDuration" in emf[0] and "DecodeDuration" not in emf[1]
+
+
+def test_invalid_image_is_rejected(handler):
+    _, app = handler
+    event = {"routeKey": "POST /resize-image", "body": json.dumps({"image": base64.b64encode(b"not an image").decode()})}
+
+    response = app.lambda_handler(event, None)
+
+    assert response["statusCode"] == 422
+
+
+def test_image_over_pixel_budget_is_rejected_before_decoding(handler, monkeypatch, capsys):
+    _, app = handler
+    # Module du handler, importable une fois le fixture exécuté
+    import admission
+
+    monkeypatch.setattr(admission, "MAX_INPUT_PIXELS", 500_000)
+    event = {"routeKey": "POST /resize-image", "body": json.dumps({"image": base64.b64encode(_jpeg((1000, 750))).decode()})}
+
+    response = app.lambda_handler(event, None)
+
+    assert response["statusCode"] == 413
+    emf = [json.loads(line) for line in capsys.readouterr().out.splitlines() if line.startswith('{"_aws"')]
+    assert "InspectDuration" in emf[0] and "DecodeDuration" not in emf[0]
+
+
+def test_processed_image_is_indexed_in_catalog(handler):
+    _, app = handler
+    data = _jpeg((900, 600))
+    app.lambda_handler({"routeKey": "POST /resize-image", "body": json.dumps({"image": base64.b64encode(data).decode()})}, None)
+
+    image_id = hashlib.sha256(data).hexdigest()
+    response = app.lambda_handler({"routeKey": "GET /images/{imageId}", "pathParameters": {"imageId": image_id}}, None)
+
+    assert response["statusCode"] == 200
+    image = json.loads(response["body"])
+    assert (image["width"], image["height"], image["format"]) == (900, 600, "JPEG")
+    assert len(image["phash"]) == 16
+    assert image["renditions"]["medium"]["url"]
+
+
+def test_smart_crop_keeps_the_detailed_region(handler):
+    s3, app = handler
+    # Fond uni avec un motif détaillé dans le tiers droit
+    source = Image.new("RGB", (1500, 500), (90, 140, 200))
+    source.paste(synthetic_image((400, 400)), (1050, 50))
+    buffer = BytesIO()
+    source.save(buffer, format="PNG")
+    renditions = [{"name": "smart", "width": 300, "height": 300, "fit": "smart"},
+                  {"name": "pad", "width": 300, "height": 300, "fit": "pad"}]
+    event = {"routeKey": "POST /resize-image",
+             "body": json.dumps({"image": base64.b64encode(buffer.getvalue()).decode(), "renditions": renditions})}
+
+    response = app.lambda_handler(event, None)
+
+    manifest = json.loads(response["body"])["renditions"]
+    smart = Image.open(BytesIO(s3.get_object(Bucket="bench-destination", Key=manifest["smart"]["key"])["Body"].read()))
+    padded = Image.open(BytesIO(s3.get_object(Bucket="bench-destination", Key=manifest["pad"]["key"])["Body"].read()))
+    assert smart.size == padded.size == (300, 300)
+    # Le recadrage centré ne contiendrait que le fond uni
+    assert len(set(smart.convert("RGB").getdata())) > 100
+    assert padded.convert("RGB").getpixel((150, 0)) == (255, 255, 255)
+
+
+def test_concurrent_transform_waits_for_the_invocation_holding_the_lock(handler, capsys):
+    s3, app = handler
+    import singleflight
+    from cache import cache_key
+    from renditions import parse_transform
+
+    event = build_event("transform", "photo.jpeg", None)
+    event["queryStringParameters"] = {"w": "320", "fmt": "webp"}
+    etag = s3.head_object(Bucket="bench-ingest", Key="uploads/bench/photo.jpeg")["ETag"].strip('"')
+    key = cache_key(f"etag-{etag}", parse_transform(event["queryStringParameters"]), "WEBP")
+    lock_key = f"bench-destination/{key}"
+
+    # Une autre invocation détient le verrou et publie son résultat pendant l'attente
+    token = singleflight.acquire(lock_key)
+    results = []
+    waiter = threading.Thread(target=lambda: results.append(app.lambda_handler(event, None)))
+    waiter.start()
+    time.sleep(0.3)
+    s3.put_object(Bucket="bench-destination", Key=key, Body=b"published by the leader")
+    singleflight.release(lock_key, token)
+    waiter.join()
+
+    assert base64.b64decode(results[0]["body"]) == b"published by the leader"
+    emf = [json.loads(line) for line in capsys.readouterr().out.splitlines() if line.startswith('{"_aws"')]
+    assert "CoalesceDuration" in emf[-1] and "DecodeDuration" not in emf[-1]
+
+
+def test_animated_gif_keeps_its_frames(handler):
+    s3, app = handler
+    frames = [Image.new("RGB", (400, 300), (index * 40, 80, 200 - index * 20)) for index in range(6)]
+    buffer = BytesIO()
+    frames[0].save(buffer, format="GIF", save_all=True, append_images=frames[1:], duration=80, loop=0)
+    renditions = [{"name": "clip", "width": 200, "height": 150, "format": "webp"},
+                  {"name": "poster", "width": 200, "height": 150, "format": "jpeg"}]
+    event = {"routeKey": "POST /resize-image",
+             "body": json.dumps({"image": base64.b64encode(buffer.getvalue()).decode(), "renditions": renditions})}
+
+    response = app.lambda_handler(event, None)
+
+    assert response["statusCode"] == 200
+    manifest = json.loads(response["body"])["renditions"]
+    clip = Image.open(BytesIO(s3.get_object(Bucket="bench-destination", Key=manifest["clip"]["key"])["Body"].read()))
+    assert clip.size == (200, 150) and clip.n_frames == 6
+    poster = Image.open(BytesIO(s3.get_object(Bucket="bench-destination", Key=manifest["poster"]["key"])["Body"].read()))
+    assert getattr(poster, "n_frames", 1) == 1
+
+
+def test_expired_rendition_is_reported_as_evicted(handler):
+    s3, app = handler
+    data = _jpeg((700, 500))
+    response = app.lambda_handler({"routeKey": "POST /resize-image", "body": json.dumps({"image": base64.b64encode(data).decode()})}, None)
+    manifest = json.loads(response["body"])["renditions"]
+    # Expiration par le cycle de vie du bucket
+    s3.delete_object(Bucket="bench-destination", Key=manifest["medium"]["key"])
+
+    response = app.lambda_handler({"routeKey": "GET /images/{imageId}", "pathParameters": {"imageId": hashlib.sha256(data).hexdigest()}}, None)
+
+    assert response["statusCode"] == 200
+    image = json.loads(response["body"])
+    assert image["renditions"]["medium"]["status"] == "evicted" and "url" not in image["renditions"]["medium"]
+    assert all(rendition["url"] for name, rendition in image["renditions"].items() if name != "medium")
+    # Source reçue en ligne, non conservée : pas de régénération possible
+    assert "regeneration" not in image
+
+
+def _animated_gif(frames, size):
+    images = [Image.new("RGB", size, (index * 8 % 256, 80, 200)) for index in range(frames)]
+    buffer = BytesIO()
+    images[0].save(buffer, format="GIF", save_all=True, append_images=images[1:], duration=40, loop=0)
+    return buffer.getvalue()
+
+
+def test_small_animation_from_an_upload_is_processed_inline(handler):
+    s3, app = handler
+    data = _animated_gif(30, (480, 270))
+    s3.put_object(Bucket="bench-ingest", Key="uploads/bench/clip.gif", Body=data, ContentType="image/gif")
+
+    app.lambda_handler(build_event("s3", "clip.gif", data), None)
+
+    # Trames de sortie estimées à leur taille réelle : pas de renvoi vers la fonction haute mémoire
+    manifest = json.loads(s3.get_object(Bucket="bench-destination", Key="manifests/clip.json")["Body"].read())
+    retina = Image.open(BytesIO(s3.get_object(Bucket="bench-destination", Key=manifest["renditions"]["retina"]["key"])["Body"].read()))
+    assert retina.size == (480, 270) and retina.n_frames == 30
+
+
+def test_high_memory_function_rejects_an_item_it_cannot_process(handler, monkeypatch):
+    s3, app = handler
+    import admission
+
+    # Budget de la fonction haute mémoire : égal à celui des sources
+    monkeypatch.setattr(admission, "INLINE_MAX_DECODED_PIXELS", 1_000_000)
+    monkeypatch.setattr(admission, "MAX_INPUT_PIXELS", 1_000_000)
+    data = _animated_gif(30, (400, 300))
+    s3.put_object(Bucket="bench-ingest", Key="uploads/bench/long.gif", Body=data, ContentType="image/gif")
+    message = {"key": "uploads/bench/long.gif", "renditions": [spec.to_dict() for spec in app.RENDITIONS],
+               "manifestKey": "manifests/long.json"}
+    event = {"Records": [{"eventSource": "aws:sqs", "messageId": "1", "body": json.dumps(message),
+                          "attributes": {"ApproximateReceiveCount": "1"}}]}
+
+    response = app.lambda_handler(event, None)
+
+    assert response == {"batchItemFailures": []}
+    manifest = json.loads(s3.get_object(Bucket="bench-destination", Key="manifests/long.json")["Body"].read())
+    assert "error" in manifest
+
+
+def test_catalog_entry_keeps_renditions_from_earlier_requests(handler):
+    _, app = handler
+    data = _jpeg((800, 800))
+    image_id = hashlib.sha256(data).hexdigest()
+    get = {"routeKey": "GET /images/{imageId}", "pathParameters": {"imageId": image_id}}
+    app.lambda_handler({"routeKey": "POST /resize-image", "body": json.dumps({"image": base64.b64encode(data).decode()})}, None)
+    first = json.loads(app.lambda_handler(get, None)["body"])
+
+    renditions = [{"name": "square", "width": 100, "height": 100, "fit": "cover"}]
+    app.lambda_handler({"routeKey": "POST /resize-image",
+                        "body": json.dumps({"image": base64.b64encode(data).decode(), "renditions": renditions})}, None)
+
+    image = json.loads(app.lambda_handler(get, None)["body"])
+    assert set(image["renditions"]) == {spec.name for spec in app.RENDITIONS} | {"square"}
+    assert image["createdAt"] == first["createdAt"]
+
+
+def test_concurrent_first_writes_keep_both_renditions(handler, monkeypatch):
+    import catalog
+
+    table = catalog._table()
+    update_item = table.update_item
+    # Les deux écritures créent la fiche avant que l'une ou l'autre n'y ajoute ses renditions
+    created = threading.Barrier(2, timeout=10)
+    first_call = threading.local()
+
+    def interleaved_update_item(**kwargs):
+        try:
+            return update_item(**kwargs)
+        finally:
+            if not getattr(first_call, "done", False):
+                first_call.done = True
+                created.wait()
+
+    monkeypatch.setattr(catalog, "_table", lambda: SimpleNamespace(update_item=interleaved_update_item,
+                                                                   batch_writer=table.batch_writer))
+    metadata = {"format": "JPEG", "width": 800, "height": 600, "phash": "0123456789abcdef"}
+    writers = [threading.Thread(target=catalog.put_image, args=("race", metadata, {name: {"key": f"{name}.webp"}}))
+               for name in ("small", "large")]
+    for writer in writers:
+        writer.start()
+    for writer in writers:
+        writer.join()
+
+    monkeypatch.undo()
+    assert set(catalog.get_image("race")["renditions"]) == {"small", "large"}
+
+
+def test_batch_reports_only_the_messages_that_can_be_retried(handler):
+    s3, app = handler
+    data = _jpeg((640, 480))
+    s3.put_object(Bucket="bench-ingest", Key="uploads/bench/batch.jpeg", Body=data, ContentType="image/jpeg")
+    renditions = [spec.to_dict() for spec in app.RENDITIONS]
+
+    def record(message_id, body):
+        return {"eventSource": "aws:sqs", "messageId": message_id, "body": body,
+                "attributes": {"ApproximateReceiveCount": "1"}}
+
+    event = {"Records": [
+        record("malformed", "not json"),
+        record("missing", json.dumps({"key": "uploads/bench/deleted.jpeg", "renditions": renditions,
+                                      "manifestKey": "manifests/deleted.json"})),
+        record("valid", json.dumps({"key": "uploads/bench/batch.jpeg", "renditions": renditions,
+                                    "manifestKey": "manifests/batch.json"})),
+    ]}
+
+    response = app.lambda_handler(event, None)
+
+    # Message illisible renvoyé seul en file, source supprimée traitée comme une erreur définitive
+    assert response == {"batchItemFailures": [{"itemIdentifier": "malformed"}]}
+    missing = json.loads(s3.get_object(Bucket="bench-destination", Key="manifests/deleted.json")["Body"].read())
+    assert "error" in missing
+    valid = json.loads(s3.get_object(Bucket="bench-destination", Key="manifests/batch.json")["Body"].read())
+    assert set(valid["renditions"]) == {spec.name for spec in app.RENDITIONS}
+
+
+def _js_list(source, name):
+    return re.search(rf"var {name} = \[(.*?)\];", source).group(1).replace("'", "").replace(" ", "").split(",")
+
+
+def test_edge_normalization_accepts_every_transform_parameter(handler):
+    from renditions import FIT_MODES, OUTPUT_FORMATS
+
+    path = os.path.join(os.path.dirname(__file__), "..", "..", "stacks", "cloudfront_functions", "normalize_image_query.js")
+    with open(path) as f:
+        source = f.read()
+
+    assert set(_js_list(source, "FITS")) == set(FIT_MODES)
+    # AVIF reste accepté en bordure même sans le plugin dans l'environnement de test
+    assert set(_js_list(source, "FORMATS")) == (set(OUTPUT_FORMATS) - {"auto"}) | {"avif"}
+
+
+def test_phone_jpeg_with_mpf_segment_is_reduced_while_decoding(handler):
+    _, app = handler
+    from renditions import decode_for_renditions, decoded_pixels, parse_rendition
+
+    photo = synthetic_image((3200, 2400))
+    buffer = BytesIO()
+    photo.save(buffer, format="MPO", save_all=True, append_images=[photo.resize((320, 240))])
+    image = Image.open(buffer)
+    specs = [parse_rendition({"name": "thumbnail", "width": 200, "height": 150})]
+
+    assert image.format == "MPO"
+    assert decoded_pixels(image, specs) == 400 * 300
+    assert decode_for_renditions(image, specs).size[0] < 3200
+    assert specs[0].output_format(image.format) == "JPEG"
+
+
+def test_memory_peak_is_measured_per_invocation(handler, capsys):
+    from metrics import metrics
+
+    def peak(allocate):
+        metrics.reset("test")
+        buffer = bytearray(allocate)
+        buffer[::4096] = b"x" * len(buffer[::4096])
+        del buffer
+        metrics.flush()
+        emf = json.loads(capsys.readouterr().out.splitlines()[-1])
+        return emf["MaxMemoryUsed"]
+
+    # Le pic d'une invocation précédente n'est pas reporté sur les suivantes
+    assert peak(200 * 1024 * 1024) - peak(0) > 150
+
+
+def test_listing_rejects_a_limit_below_one(handler):
+    _, app = handler
+
+    for limit in ("0", "-5"):
+        response = app.lambda_handler({"routeKey": "GET /images", "queryStringParameters": {"limit": limit}}, None)
+        assert response["statusCode"] == 400
+
+
+def test_accept_negotiation_honours_refused_formats(handler):
+    from formats import negotiate_format
+
+    assert negotiate_format("image/webp,*/*", "JPEG") == "WEBP"
+    assert negotiate_format("image/webp;q=0, image/png", "JPEG") == "JPEG"
+    assert negotiate_format(None, "png") == "PNG"
+
+
+def _sqs_record(message_id, message):
+    return {"eventSource": "aws:sqs", "messageId": message_id, "body": json.dumps(message),
+            "attributes": {"ApproximateReceiveCount": "1"}}
+
+
+def test_failed_forward_to_the_high_memory_queue_is_reported_for_that_message_only(handler, monkeypatch):
+    s3, app = handler
+    import admission
+
+    # Seule la photo de 1200x900 dépasse le budget de la fonction standard
+    monkeypatch.setattr(admission, "INLINE_MAX_DECODED_PIXELS", 50_000)
+    monkeypatch.setenv("HEAVY_JOBS_QUEUE_URL", "https://sqs.eu-west-1.amazonaws.com/123456789012/deleted")
+    s3.put_object(Bucket="bench-ingest", Key="uploads/bench/small.jpeg", Body=_jpeg((200, 150)), ContentType="image/jpeg")
+    renditions = [{"name": "thumbnail", "width": 100, "height": 100, "fit": "cover"}]
+    event = {"Records": [
+        _sqs_record("large", {"key": "uploads/bench/photo.jpeg", "renditions": renditions,
+                              "manifestKey": "manifests/large.json"}),
+        _sqs_record("small", {"key": "uploads/bench/small.jpeg", "renditions": renditions,
+                              "manifestKey": "manifests/small.json"}),
+    ]}
+
+    response = app.lambda_handler(event, None)
+
+    assert response == {"batchItemFailures": [{"itemIdentifier": "large"}]}
+    manifest = json.loads(s3.get_object(Bucket="bench-destination", Key="manifests/small.json")["Body"].read())
+    assert "thumbnail" in manifest["renditions"]
+
+
+def _create_job(app, body):
+    response = app.lambda_handler({"routeKey": "POST /jobs", "body": json.dumps(body)}, None)
+    return response["statusCode"], json.loads(response["body"])
+
+
+def _job_status(app, job_id):
+    response = app.lambda_handler({"routeKey": "GET /jobs/{jobId}", "pathParameters": {"jobId": job_id}}, None)
+    return response["statusCode"], json.loads(response["body"])
+
+
+def test_job_items_are_processed_and_aggregated(handler):
+    _, app = handler
+    import boto3
+
+    status, created = _create_job(app, {"keys": ["uploads/bench/photo.jpeg", "uploads/bench/absent.jpeg"],
+                                        "renditions": ["thumbnail"]})
+
+    assert status == 202 and created["total"] == 2 and created["statusPath"] == f"/jobs/{created['jobId']}"
+    assert _job_status(app, created["jobId"])[1]["status"] == "RUNNING"
+
+    # Traitement des messages publiés, comme par l'event source mapping SQS
+    sqs = boto3.client("sqs")
+    messages = sqs.receive_message(QueueUrl=os.environ["JOBS_QUEUE_URL"], MaxNumberOfMessages=10,
+                                   AttributeNames=["ApproximateReceiveCount"])["Messages"]
+    records = [{"eventSource": "aws:sqs", "messageId": message["MessageId"], "body": message["Body"],
+                "attributes": message["Attributes"]} for message in messages]
+    assert app.lambda_handler({"Records": records}, None) == {"batchItemFailures": []}
+
+    status, job = _job_status(app, created["jobId"])
+    assert status == 200
+    assert (job["status"], job["succeeded"], job["failed"]) == ("COMPLETED_WITH_ERRORS", 1, 1)
+    items = {item["key"]: item for item in job["items"]}
+    assert items["uploads/bench/photo.jpeg"]["status"] == "SUCCEEDED"
+    assert items["uploads/bench/photo.jpeg"]["renditions"]["thumbnail"].startswith("https://")
+    assert items["uploads/bench/absent.jpeg"]["status"] == "FAILED" and items["uploads/bench/absent.jpeg"]["error"]
+
+
+def test_job_over_the_item_limit_is_rejected(handler, monkeypatch):
+    _, app = handler
+    monkeypatch.setenv("MAX_JOB_ITEMS", "2")
+
+    status, body = _create_job(app, {"keys": ["a.jpeg", "b.jpeg", "c.jpeg"]})
+
+    assert status == 400 and "2 images" in body["message"]
+
+
+def test_unknown_job_is_not_found(handler):
+    _, app = handler
+
+    assert _job_status(app, "0" * 32)[0] == 404
+
+
+def test_banded_resize_matches_a_single_pass(handler, monkeypatch):
+    import parallel
+    import renditions
+    from PIL import ImageChops
+
+    # Quatre bandes de sortie, dimensions impaires, avec et sans box de recadrage
+    monkeypatch.setattr(renditions, "worker_count", lambda: 4)
+    monkeypatch.setattr(parallel, "worker_count", lambda: 4)
+    source = synthetic_image((2001, 1503), seed=3)
+
+    for size, box in (((701, 459), None), ((333, 517), (101.5, 37.25, 1799.0, 1480.75))):
+        banded = renditions.resize(source, size, box)
+        single = source.resize(size, Image.LANCZOS, box=box or (0, 0, source.width, source.height))
+        assert banded.size == single.size
+        assert max(high for _, high in ImageChops.difference(banded, single).getextrema()) <= 1
+
+
+def test_stream_writer_uploads_large_output_in_parts(handler):
+    s3, _ = handler
+    import storage
+
+    part_size = 5 * 1024 * 1024
+    data = os.urandom(2 * part_size + 12345)
+    with storage.upload_executor() as executor:
+        with storage.S3StreamWriter("bench-destination", "renditions/large.png", "PNG", executor,
+                                    metadata={"width": "10"}, part_size=part_size) as writer:
+            # Blocs de tailles irrégulières, à cheval sur les limites de parties
+            for start in range(0, len(data), 777_777):
+                writer.write(data[start:start + 777_777])
+            assert writer.getvalue() is None
+        writer.close().result()
+
+    stored = s3.get_object(Bucket="bench-destination", Key="renditions/large.png")
+    assert stored["Body"].read() == data
+    assert stored["ContentType"] == "image/png" and stored["Metadata"] == {"width": "10"}
+    assert len(writer.parts) == 3
+
+
+def test_stream_writer_aborts_the_upload_on_error(handler):
+    s3, _ = handler
+    import storage
+
+    part_size = 5 * 1024 * 1024
+    with storage.upload_executor() as executor:
+        try:
+            with storage.S3StreamWriter("bench-destination", "renditions/aborted.png", "PNG", executor,
+                                        part_size=part_size) as writer:
+                writer.write(os.urandom(part_size + 1))
+                raise RuntimeError("encodage interrompu")
+        except RuntimeError:
+            pass
+
+    assert "Uploads" not in s3.list_multipart_uploads(Bucket="bench-destination")
+    assert "Contents" not in s3.list_objects_v2(Bucket="bench-destination", Prefix="renditions/aborted.png")
+
+
+def test_presigned_urls_are_reused_until_the_cache_ttl(handler, monkeypatch):
+    import storage
+
+    clock = [1000.0]
+    monkeypatch.setattr(storage, "time", SimpleNamespace(monotonic=lambda: clock[0]))
+    monkeypatch.setattr(storage, "_presigned_urls", type(storage._presigned_urls)())
+    signed = []
+    generate = storage._s3().generate_presigned_url
+    monkeypatch.setattr(storage._s3(), "generate_presigned_url",
+                        lambda *args, **kwargs: signed.append(kwargs) or generate(*args, **kwargs))
+
+    first = storage.presigned_get_url("bench-destination", "renditions/cached.webp")
+    clock[0] += storage.PRESIGNED_URL_CACHE_SECONDS - 1
+    assert storage.presigned_get_url("bench-destination", "renditions/cached.webp") == first
+    assert len(signed) == 1
+
+    # Entrée expirée : nouvelle signature
+    clock[0] += 2
+    storage.presigned_get_url("bench-destination", "renditions/cached.webp")
+    assert len(signed) == 2
+
+
+def _upload_ticket(app, body):
+    response = app.lambda_handler({"routeKey": "POST /upload-ticket", "body": json.dumps(body)}, None)
+    return response["statusCode"], json.loads(response["body"])
+
+
+def test_upload_ticket_signs_a_bounded_post_policy(handler, monkeypatch):
+    _, app = handler
+    monkeypatch.setenv("MAX_UPLOAD_BYTES", "123456")
+
+    status, ticket = _upload_ticket(app, {"contentType": "image/png"})
+
+    assert status == 200
+    assert ticket["key"] == f"uploads/{ticket['uploadId']}.png"
+    assert ticket["fields"]["key"] == ticket["key"] and ticket["fields"]["Content-Type"] == "image/png"
+    assert "bench-ingest" in ticket["uploadUrl"]
+    policy = json.loads(base64.b64decode(ticket["fields"]["policy"]))
+    assert ["content-length-range", 1, 123456] in policy["conditions"]
+    assert {"Content-Type": "image/png"} in policy["conditions"]
+    assert f"manifests/{ticket['uploadId']}.json" in ticket["resultUrl"]
+
+
+def test_upload_ticket_rejects_unsupported_content_types(handler):
+    _, app = handler
+
+    for content_type in ("image/svg+xml", "application/pdf"):
+        status, body = _upload_ticket(app, {"contentType": content_type})
+        assert status == 400 and content_type in body["message"]
+
+
+def test_head_transform_returns_the_get_headers_without_body(handler):
+    _, app = handler
+    event = dict(build_event("transform", "photo.jpeg", None), routeKey="HEAD /img/{key+}")
+
+    response = app.lambda_handler(event, None)
+    get = app.lambda_handler(build_event("transform", "photo.jpeg", None), None)
+
+    assert response["statusCode"] == 200 and response["body"] == ""
+    assert response["headers"]["Content-Type"] == get["headers"]["Content-Type"] == "image/webp"
@@ -0,0 +1,66 @@
+import json
+import os
+import re
+import time
+
+import aws_cdk as core
+import pytest
+from aws_cdk.assertions import Template
+
+from config import Config
+from stacks.api_gateway_stack import ApiGatewayStack
+from stacks.front_stack import FrontStack
+from stacks.image_processing_stack import ImageProcessingStack
+
+# Snapshots des valeurs par défaut, indépendants des variables exportées dans le shell
+pytestmark = pytest.mark.usefixtures("default_config")
+
+# UPDATE_SNAPSHOTS=1 python -m pytest tests/unit/test_stack_snapshots.py régénère les snapshots
+SNAPSHOT_DIR = os.path.join(os.path.dirname(__file__), "snapshots")
+
+# Empreintes d'assets : elles suivent le code de la Lambda, pas l'infrastructure
+ASSET_HASH = re.compile(r"[0-9a-f]{64}")
+
+
+def _synth(build):
+    # Synth sans bundling Docker, chronométrée (affichée en fin de session par conftest.py)
+    app = core.App(context={"aws:cdk:bundling-stacks": []})
+    env = core.Environment(**Config.get_env())
+    started = time.perf_counter()
+    stack = build(app, env)
+    template = Template.from_stack(stack).to_json()
+    return template, time.perf_counter() - started
+
+
+def _image_processing(app, env):
+    return ImageProcessingStack(app, "ImageProcessingStack", env=env)
+
+
+def _api_gateway(app, env):
+    image_processing_stack = _image_processing(app, env)
+    return ApiGatewayStack(app, "ApiGatewayStack", image_processor_lambda=image_processing_stack.image_processor, env=env)
+
+
+def _front(app, env):
+    return FrontStack(app, "FrontStack", api_url="https://api.example.com/", env=env)
+
+
+STACKS = {
+    "ImageProcessingStack": _image_processing,
+    "ApiGatewayStack": _api_gateway,
+    "FrontStack": _front,
+}
+
+
+@pytest.mark.parametrize("name", STACKS)
+def test_template_matches_snapshot(name, record_property):
+    template, seconds = _synth(STACKS[name])
+    record_property("synth_seconds", seconds)
+    rendered = ASSET_HASH.sub("<asset-hash>", json.dumps(template, indent=2, sort_keys=True)) + "\n"
+
+    path = os.path.join(SNAPSHOT_DIR, f"{name}.json")
+    if os.environ.get("UPDATE_SNAPSHOTS") or not os.path.exists(path):
+        with open(path, "w") as f:
+            f.write(rendered)
+    with open(path) as f:
+        assert rendered == f.read(), f"{name} a changé : vérifier le diff puis UPDATE_SNAPSHOTS=1"